@@ -0,0 +1,235 @@
+"""
+This module contains the loader of the `Group01` class, which downloads the data file and other
+CSV datasets (like the fertilizer use, land use or population datasets of Our World in Data) to
+join with it.
+
+The datasets are fetched concurrently by a thread pool sharing one `requests.Session`, whose
+connection pool keeps the connections to the same host open between requests. Every response
+is streamed to a temporary file in chunks and moved into place once complete, so a failed
+download never leaves a truncated file behind. The ETag and Last-Modified of every download are
+saved next to the file, and later downloads of the same file are conditional requests.
+
+Classes:
+-------
+DatasetLoader(max_workers, timeout, data_dir):
+    Downloads datasets concurrently into a directory.
+
+
+Example usage:
+--------------
+    loader = DatasetLoader()
+    loader.fetch({"population": "https://example.org/population.csv"})
+    # {'population': 'downloads/datasets/population.csv'}
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+DATASETS_DIR = "downloads/datasets"
+CHUNK_SIZE = 1 << 16
+
+
+def _read_validators(data_file: str) -> dict:
+    """
+    Returns the HTTP validators (ETag and Last-Modified) saved with a downloaded data file.
+
+    Parameters:
+        data_file: str, path of the data file.
+
+    Returns:
+        dict: The "etag" and "last_modified" of the file, empty if none were saved.
+    """
+    try:
+        with open(f"{data_file}.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_validators(data_file: str, response) -> None:
+    """
+    Saves the HTTP validators (ETag and Last-Modified) of the response a data file was
+    downloaded from, next to the file, for conditional requests.
+
+    Parameters:
+        data_file: str, path of the data file.
+        response: requests.Response, the response of the download.
+
+    Returns:
+        None
+    """
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    with open(f"{data_file}.json", "w", encoding="utf-8") as f:
+        json.dump(validators, f)
+
+
+class DatasetLoader:
+    """
+    Downloads datasets concurrently through one connection-pooled HTTP session.
+
+    Attributes:
+    ----------
+    session : requests.Session
+        the session shared by all downloads, with a connection pool of `max_workers`
+        connections per host
+
+    max_workers : int
+        number of concurrent downloads
+
+    timeout : tuple
+        connect and read timeouts of every request, in seconds
+
+    data_dir : str
+        directory in which `fetch` saves the datasets
+
+    Methods:
+    -------
+    download(url, path, conditional):
+        Streams one file to disk.
+
+    fetch(datasets, use_cache, refresh):
+        Downloads several datasets concurrently.
+
+    close():
+        Closes the connections of the session.
+    """
+
+    def __init__(self, max_workers: int = 8, timeout: tuple = (10, 60), data_dir: str = DATASETS_DIR):
+        """
+        Initializes a loader and its session.
+
+        Parameters:
+            max_workers: int, number of concurrent downloads.
+            timeout: tuple, connect and read timeouts of every request, in seconds.
+            data_dir: str, directory in which `fetch` saves the datasets.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.data_dir = data_dir
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self) -> "DatasetLoader":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.close()
+        return False
+
+    def close(self) -> None:
+        """
+        Closes the connections of the session.
+
+        Returns:
+            None
+        """
+        self.session.close()
+
+    def download(self, url: str, path: str, conditional: bool = True) -> bool:
+        """
+        Streams the file at `url` into `path`. The response is written in chunks into a temporary
+        file, which replaces `path` once complete, and its validators are saved next to it.
+
+        Parameters:
+            url: str, the URL of the file.
+            path: str, the file to write.
+            conditional: bool, if True and `path` has saved validators, the request is
+                conditional and nothing is downloaded if the file did not change.
+
+        Raises:
+            requests.exceptions.RequestException: If the download fails
+
+        Returns:
+            bool: True if the file was downloaded, False if it was not modified.
+        """
+        headers = {}
+        if conditional and os.path.exists(path):
+            validators = _read_validators(path)
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304:
+                return False
+            response.raise_for_status()
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            try:
+                with open(f"{path}.tmp", "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+            except BaseException:
+                if os.path.exists(f"{path}.tmp"):
+                    os.remove(f"{path}.tmp")
+                raise
+            os.replace(f"{path}.tmp", path)
+            _write_validators(path, response)
+        return True
+
+    def path(self, name: str) -> str:
+        """
+        Returns the file of a dataset in `data_dir`.
+
+        Parameters:
+            name: str, name of the dataset.
+
+        Raises:
+            ValueError: If the name is not a valid file name
+
+        Returns:
+            str: The path of the dataset.
+        """
+        if not name or os.path.basename(name) != name or name in (".", ".."):
+            raise ValueError(f"{name!r} is not a valid dataset name")
+        return os.path.join(self.data_dir, f"{name}.csv")
+
+    def fetch(self, datasets: dict, use_cache: bool = True, refresh: bool = False) -> dict:
+        """
+        Downloads the given datasets concurrently into `data_dir`, one file per dataset named
+        after it. All downloads are finished before an error is raised.
+
+        Parameters:
+            datasets: dict, the URL of every dataset by name.
+            use_cache: bool, if True the datasets already downloaded are not downloaded again.
+            refresh: bool, if True the datasets already downloaded are downloaded again if
+                they changed, with conditional requests.
+
+        Raises:
+            ValueError: If a name is not a valid file name
+            requests.exceptions.RequestException: If a download fails
+
+        Returns:
+            dict: The path of every dataset by name.
+        """
+        paths = {name: self.path(name) for name in datasets}
+        pending = [
+            name
+            for name in datasets
+            if refresh or not use_cache or not os.path.exists(paths[name])
+        ]
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                futures = [
+                    pool.submit(self.download, datasets[name], paths[name], use_cache)
+                    for name in pending
+                ]
+            error: Optional[BaseException] = None
+            for future in futures:
+                if future.exception() is not None and error is None:
+                    error = future.exception()
+            if error is not None:
+                raise error
+        return paths
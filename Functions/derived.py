@@ -0,0 +1,191 @@
+"""
+This module contains the derived metrics of the `Group01` class: the growth rates of every
+metric and the decomposition of the growth of the total factor productivity (tfp), computed for
+all entities and years at once on the dense Year x Entity x metric cube of the data.
+
+For every metric `m`, `m_growth` is its growth over the previous year and `m_cagr` its compound
+annual growth rate over the last `window` years, both in percent, NaN where the earlier year is
+missing. The source defines tfp = 100 * output / inputs, so the log growth of tfp (in percentage
+points) is exactly `output_contribution + inputs_contribution`, the log growths of output and of
+the inverse of inputs. The inputs index aggregates the land, labor, capital and materials
+indices with cost shares that are not published: the shares of every entity are estimated by
+least squares of its input log growth on theirs, which splits `inputs_contribution` into
+`ag_land_contribution`, `labor_contribution`, `capital_contribution`,
+`materials_contribution` and `inputs_residual`.
+
+Classes:
+-------
+DerivedMetrics:
+    The derived metrics of every year and entity.
+
+Functions:
+---------
+derived_columns(metrics):
+    Returns the names of the derived metrics of the given metrics.
+
+derive(values, years, entities, metrics, window):
+    Computes the derived metrics of a Year x Entity x metric array.
+
+
+Example usage:
+--------------
+    cube = my_object.get_cube()
+    derived = derive(cube.values, cube.years, cube.entities, cube.metrics, window=10)
+    derived.values[:, derived.entity_positions["Germany"], derived.column_positions["tfp_cagr"]]
+"""
+
+from typing import NamedTuple
+import numpy as np
+
+# The indices aggregated by the inputs index, and the name of their contribution
+INPUT_INDICES = {
+    "ag_land_index": "ag_land_contribution",
+    "labor_index": "labor_contribution",
+    "capital_index": "capital_contribution",
+    "materials_index": "materials_contribution",
+}
+DECOMPOSITION = ("tfp", "output", "inputs") + tuple(INPUT_INDICES)
+
+
+class DerivedMetrics(NamedTuple):
+    """
+    The derived metrics of every year and entity, returned by `derive` and
+    `Group01.get_derived`.
+
+    Attributes:
+    ----------
+    values : numpy.ndarray
+        float array of shape (years, entities, columns), NaN where a metric cannot be derived
+
+    columns : list
+        the derived metrics of the third axis, see `derived_columns`
+
+    years : numpy.ndarray
+        the years of the first axis, in increasing order
+
+    entities : list
+        the entities of the second axis
+
+    window : int
+        the number of years of the compound annual growth rates
+
+    shares : numpy.ndarray
+        float array of shape (entities, 4), the estimated cost share of every index of
+        `INPUT_INDICES` in the inputs of every entity, NaN if it has too few years
+
+    year_positions, entity_positions, column_positions : dict
+        the position of every year, entity and column on its axis
+    """
+
+    values: np.ndarray
+    columns: list
+    years: np.ndarray
+    entities: list
+    window: int
+    shares: np.ndarray
+    year_positions: dict
+    entity_positions: dict
+    column_positions: dict
+
+
+def derived_columns(metrics: list) -> list:
+    """
+    Returns the names of the derived metrics of the given metrics, in the order of `derive`.
+    The decomposition is only derived if all the columns of `DECOMPOSITION` are metrics.
+
+    Parameters:
+        metrics: list, the numeric columns of the data.
+
+    Returns:
+        list: The names of the derived metrics.
+    """
+    columns = [f"{metric}_growth" for metric in metrics] + [f"{metric}_cagr" for metric in metrics]
+    if all(column in metrics for column in DECOMPOSITION):
+        columns += ["output_contribution", "inputs_contribution"]
+        columns += list(INPUT_INDICES.values()) + ["inputs_residual"]
+    return columns
+
+
+def _lagged(values: np.ndarray, years: np.ndarray, lag: int) -> np.ndarray:
+    """
+    Returns `values` shifted along the year axis, so that every year holds the values of the
+    year `lag` years earlier, NaN where that year is not among `years`.
+    """
+    positions = np.minimum(np.searchsorted(years, years - lag), len(years) - 1)
+    found = years[positions] == years - lag
+    lagged = np.full(values.shape, np.nan)
+    lagged[found] = values[positions[found]]
+    return lagged
+
+
+def derive(
+    values: np.ndarray, years: np.ndarray, entities: list, metrics: list, window: int = 10
+) -> DerivedMetrics:
+    """
+    Computes the derived metrics of a Year x Entity x metric array, see the module description.
+    Every metric is derived by whole-array operations over all years and entities, and the
+    cost shares of all entities are estimated by one batched least squares solve.
+
+    Parameters:
+        values: numpy.ndarray, float array of shape (years, entities, metrics), NaN where there
+            is no value.
+        years: numpy.ndarray, the years of the first axis, in increasing order.
+        entities, metrics: list, the labels of the other axes.
+        window: int, the number of years of the compound annual growth rates.
+
+    Raises:
+        ValueError: If `window` is not a positive integer
+
+    Returns:
+        DerivedMetrics: The derived metrics.
+    """
+    if isinstance(window, bool) or not isinstance(window, (int, np.integer)) or window < 1:
+        raise ValueError("window must be a positive integer")
+    years = np.asarray(years)
+    columns = derived_columns(metrics)
+    derived = np.full((len(years), len(entities), len(columns)), np.nan)
+    n_metrics = len(metrics)
+    shares = np.full((len(entities), len(INPUT_INDICES)), np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (values / _lagged(values, years, 1) - 1) * 100
+        cagr = ((values / _lagged(values, years, window)) ** (1 / window) - 1) * 100
+        derived[:, :, :n_metrics] = growth
+        derived[:, :, n_metrics : 2 * n_metrics] = cagr
+
+        if len(columns) > 2 * n_metrics:
+            positions = [metrics.index(column) for column in DECOMPOSITION[1:]]
+            logs = np.log(np.where(values[:, :, positions] > 0, values[:, :, positions], np.nan))
+            # Log growths of output, inputs and the input indices, (years, entities, 6)
+            changes = logs - _lagged(logs, years, 1)
+            output, inputs, indices = changes[:, :, 0], changes[:, :, 1], changes[:, :, 2:]
+
+            # Least squares of inputs on the indices per entity, from the normal equations
+            valid = np.isfinite(inputs) & np.isfinite(indices).all(axis=2)
+            x = np.where(valid[:, :, None], indices, 0.0)
+            y = np.where(valid, inputs, 0.0)
+            gram = np.einsum("yei,yej->eij", x, x)
+            moments = np.einsum("yei,ye->ei", x, y)
+            estimated = np.einsum("eij,ej->ei", np.linalg.pinv(gram), moments)
+            enough = valid.sum(axis=0) >= len(INPUT_INDICES)
+            shares[enough] = estimated[enough]
+
+            contributions = -indices * shares[None, :, :] * 100
+            start = 2 * n_metrics
+            derived[:, :, start] = output * 100
+            derived[:, :, start + 1] = -inputs * 100
+            derived[:, :, start + 2 : start + 6] = contributions
+            derived[:, :, start + 6] = -inputs * 100 - contributions.sum(axis=2)
+
+    derived[~np.isfinite(derived)] = np.nan
+    return DerivedMetrics(
+        values=derived,
+        columns=columns,
+        years=years,
+        entities=list(entities),
+        window=int(window),
+        shares=shares,
+        year_positions={int(year): i for i, year in enumerate(years)},
+        entity_positions={entity: i for i, entity in enumerate(entities)},
+        column_positions={column: i for i, column in enumerate(columns)},
+    )
@@ -0,0 +1,843 @@
+"""
+This module contains the forecasting functions used by the `Group01` class.
+
+The models are fitted one country at a time. The functions that fit them are defined at module
+level, so that they can be sent to the worker processes of a process pool.
+
+Functions:
+---------
+forecast_arima(values, order, steps):
+    Fits an ARIMA model to one series and returns its point forecasts.
+
+select_orders(series, grid, criterion, max_workers, prune_margin, patience, cache):
+    Selects the ARIMA order of every series of a dictionary by information criterion, in a
+    process pool.
+
+batch_forecast(series, order, end_year, max_workers, cache):
+    Forecasts every series of a dictionary in a process pool and returns a tidy DataFrame.
+
+backtest(series, order, cutoffs, horizon, max_workers):
+    Refits the ARIMA models on the data up to several cutoff years in a process pool, and
+    returns the MAE and MAPE of their forecasts per country and horizon.
+
+fast_batch_forecast(series, order, end_year):
+    Forecasts every series of a dictionary at once with AR models fitted by batched least
+    squares, and returns the same tidy DataFrame as `batch_forecast`.
+
+Classes:
+-------
+ForecastCache(cache_dir, max_entries, max_bytes, store_params):
+    A disk-backed cache of fitted forecasts with least-recently-used eviction.
+
+
+Example usage:
+--------------
+    series = {"Germany": (years, tfp)}
+    batch_forecast(series, order=(20, 2, 2), end_year=2050)
+"""
+
+import os
+import json
+import hashlib
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Union
+import numpy as np
+import pandas as pd
+
+# Default (p, d, q) grid of select_orders
+ORDER_GRID = [(p, d, q) for d in (1, 2) for q in range(3) for p in range(6)]
+CRITERIA = ("aic", "bic", "hqic")
+
+
+def _series_hash(years: np.ndarray, values: np.ndarray) -> str:
+    """
+    Returns a hash of an observed series, used in the keys of `ForecastCache`.
+
+    Parameters:
+        years: numpy.ndarray, the years of the series.
+        values: numpy.ndarray, the values of the series.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    return hashlib.sha256(
+        np.ascontiguousarray(years, dtype=np.int64).tobytes()
+        + np.ascontiguousarray(values, dtype=np.float64).tobytes()
+    ).hexdigest()
+
+
+class ForecastCache:
+    """
+    A disk-backed cache of fitted forecasts.
+
+    Every entry is stored in its own .npz file, named after a key computed from the country,
+    the model order, the forecast horizon and a hash of the observed series. A change of any of
+    them therefore misses the cache. The modification time of a file is its last use: when the
+    cache holds more than `max_entries` entries or `max_bytes` bytes, the least recently used
+    entries are deleted.
+
+    Attributes:
+    ----------
+    cache_dir : str
+        directory in which the entries are stored
+
+    max_entries : int
+        maximum number of entries
+
+    max_bytes : int
+        maximum total size of the entries in bytes
+
+    store_params : bool
+        whether the fitted model parameters are stored next to the forecasts
+
+    Methods:
+    -------
+    key(country, order, steps, years, values):
+        Returns the key of a forecast.
+
+    get(key):
+        Returns the cached forecasts and parameters of a key, or None.
+
+    put(key, forecasts, params):
+        Stores forecasts and parameters and evicts the least recently used entries.
+
+    order_key(country, grid, criterion, years, values), get_order(key), put_order(key, order):
+        Return the key of an order search, and get or store the order it selected.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_entries: int = 1000,
+        max_bytes: int = 50 * 2**20,
+        store_params: bool = False,
+    ):
+        """
+        Initializes a forecast cache.
+
+        Parameters:
+            cache_dir: str, directory in which the entries are stored.
+            max_entries: int, maximum number of entries.
+            max_bytes: int, maximum total size of the entries in bytes.
+            store_params: bool, whether the fitted model parameters are stored as well.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store_params = store_params
+
+    @staticmethod
+    def key(country: str, order: tuple, steps: int, years: np.ndarray, values: np.ndarray) -> str:
+        """
+        Returns the key of a forecast.
+
+        Parameters:
+            country: str, the forecast country.
+            order: tuple, the (p, d, q) order of the model.
+            steps: int, the forecast horizon.
+            years: numpy.ndarray, the years of the observed series.
+            values: numpy.ndarray, the observed series.
+
+        Returns:
+            str: A hexadecimal key.
+        """
+        description = json.dumps([country, list(order), int(steps), _series_hash(years, values)])
+        return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def order_key(country: str, grid: list, criterion: str, years: np.ndarray, values: np.ndarray) -> str:
+        """
+        Returns the key of the order search of a series, see `select_orders`.
+
+        Parameters:
+            country: str, the country of the series.
+            grid: list, the (p, d, q) orders searched.
+            criterion: str, the information criterion.
+            years: numpy.ndarray, the years of the observed series.
+            values: numpy.ndarray, the observed series.
+
+        Returns:
+            str: A hexadecimal key.
+        """
+        description = json.dumps(
+            [country, [list(order) for order in grid], criterion, _series_hash(years, values)]
+        )
+        return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+    def _orders(self) -> dict:
+        try:
+            with open(os.path.join(self.cache_dir, "orders.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get_order(self, key: str) -> Optional[tuple]:
+        """
+        Returns the order selected by the order search of a key.
+
+        Parameters:
+            key: str, a key returned by `order_key`.
+
+        Returns:
+            tuple or None: The (p, d, q) order, None if the key is not cached.
+        """
+        order = self._orders().get(key)
+        return tuple(order) if order is not None else None
+
+    def put_order(self, key: str, order: tuple) -> None:
+        """
+        Stores the order selected by the order search of a key. Only the latest `max_entries`
+        orders are kept.
+
+        Parameters:
+            key: str, a key returned by `order_key`.
+            order: tuple, the selected (p, d, q) order.
+
+        Returns:
+            None
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        orders = self._orders()
+        orders.pop(key, None)
+        orders[key] = [int(value) for value in order]
+        while len(orders) > self.max_entries:
+            del orders[next(iter(orders))]
+        path = os.path.join(self.cache_dir, "orders.json")
+        tmp_path = path + f".{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(orders, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key: str) -> Optional[tuple]:
+        """
+        Returns the cached forecasts of a key and marks the entry as recently used.
+
+        Parameters:
+            key: str, a key returned by `key`.
+
+        Returns:
+            tuple or None: (forecasts, params), params is None if they were not stored. None if
+            the key is not cached.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as entry:
+                forecasts = entry["forecasts"]
+                params = entry["params"] if "params" in entry.files else None
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return forecasts, params
+
+    def put(self, key: str, forecasts: np.ndarray, params: Optional[np.ndarray] = None) -> None:
+        """
+        Stores the forecasts of a key and evicts the least recently used entries if the cache
+        is too large.
+
+        Parameters:
+            key: str, a key returned by `key`.
+            forecasts: numpy.ndarray, the point forecasts.
+            params: numpy.ndarray, optional, the fitted model parameters.
+
+        Returns:
+            None
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        arrays = {"forecasts": forecasts}
+        if self.store_params and params is not None:
+            arrays["params"] = params
+        # Write to a temporary file first, so readers never see a partial entry
+        tmp_path = self._path(key) + f".{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".npz"):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, file_name))
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                entries.append((stat.st_mtime, stat.st_size, file_name))
+        entries.sort()  # least recently used first
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, file_name = entries.pop(0)
+            try:
+                os.remove(os.path.join(self.cache_dir, file_name))
+            except FileNotFoundError:
+                pass  # already evicted by another process
+            total_bytes -= size
+
+
+def forecast_arima(
+    values: np.ndarray,
+    order: tuple,
+    steps: int,
+    return_params: bool = False,
+    start_params: Optional[np.ndarray] = None,
+):
+    """
+    Fits an ARIMA model to a series and forecasts it.
+
+    Parameters:
+        values: numpy.ndarray, the observed values of the series.
+        order: tuple, the (p, d, q) order of the ARIMA model.
+        steps: int, the number of periods to forecast.
+        return_params: bool, if True the fitted parameters are returned as well.
+        start_params: numpy.ndarray, optional, the starting parameters of the fit, like the
+            parameters fitted on a shorter part of the series. The fit starts from the default
+            parameters if they are not valid.
+
+    Returns:
+        numpy.ndarray: The point forecasts of the next `steps` periods, or a tuple
+        (forecasts, params) if `return_params` is True.
+    """
+    # statsmodels is only imported when a model is fitted, it is slow to import
+    from statsmodels.tsa.arima.model import ARIMA
+
+    with warnings.catch_warnings():
+        # Short series regularly fail to converge, the forecast is still usable
+        warnings.simplefilter("ignore")
+        model = ARIMA(values, order=order)
+        try:
+            model_fit = model.fit(start_params=start_params)
+        except (ValueError, np.linalg.LinAlgError):
+            if start_params is None:
+                raise
+            model_fit = model.fit()
+        forecasts = np.asarray(model_fit.forecast(steps=steps))
+    if return_params:
+        return forecasts, np.asarray(model_fit.params)
+    return forecasts
+
+
+def _fit_order(values: np.ndarray, order: tuple, criterion: str, start: Optional[dict] = None) -> tuple:
+    """
+    Fits an ARIMA model of the given order and returns its information criterion.
+
+    Parameters:
+        values: numpy.ndarray, the observed values of the series.
+        order: tuple, the (p, d, q) order.
+        criterion: str, "aic", "bic" or "hqic".
+        start: dict, optional, fitted parameters of a neighbouring order by name, the starting
+            parameters of the fit. The parameters this order adds start at 0.
+
+    Returns:
+        tuple: (criterion value, fitted parameters by name), (inf, None) if the model cannot
+        be fitted.
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            model = ARIMA(values, order=order)
+            start_params = None
+            if start is not None:
+                start_params = np.array([start.get(name, 0.0) for name in model.param_names])
+            try:
+                result = model.fit(start_params=start_params)
+            except (ValueError, np.linalg.LinAlgError):
+                if start_params is None:
+                    raise
+                result = model.fit()
+        except (ValueError, np.linalg.LinAlgError):
+            return np.inf, None
+    value = float(getattr(result, criterion))
+    if not np.isfinite(value):
+        return np.inf, None
+    return value, dict(zip(model.param_names, np.asarray(result.params, dtype=float)))
+
+
+def _order_line_job(job: tuple) -> tuple:
+    """
+    Searches one line of the grid of `select_orders` in a worker process: the orders of a
+    country with the same d and q, by increasing p. Every fit starts from the parameters of the
+    previous order, and the line stops after `patience` orders in a row that do not improve
+    its best criterion.
+
+    Parameters:
+        job: tuple, (country, values, orders, criterion, patience, start), where `orders` is
+            the line sorted by p and `start` the parameters of the order before it or None.
+
+    Returns:
+        tuple: (country, [(order, criterion value, parameters), ...]) for the fitted orders.
+    """
+    country, values, orders, criterion, patience, start = job
+    fitted = []
+    best, worse = np.inf, 0
+    for order in orders:
+        value, params = _fit_order(values, order, criterion, start)
+        fitted.append((order, value, params))
+        if params is not None:
+            start = params
+        if value < best:
+            best, worse = value, 0
+        else:
+            worse += 1
+            if worse >= patience:
+                break
+    return country, fitted
+
+
+def select_orders(
+    series: dict,
+    grid: Optional[list] = None,
+    criterion: str = "aic",
+    max_workers: Optional[int] = None,
+    prune_margin: float = 10.0,
+    patience: int = 1,
+    cache: Optional[ForecastCache] = None,
+) -> dict:
+    """
+    Selects the (p, d, q) order of the ARIMA model of every series from a grid, as the order
+    with the lowest information criterion.
+
+    The grid is split into lines of orders with the same d and q, searched by increasing p.
+    The search runs in two rounds in a process pool:
+
+    - the first order of every line of every series is fitted;
+    - the lines whose first order is more than `prune_margin` above the best first order of
+      their series are pruned, and the others are searched further in parallel. Every fit of
+      a line starts from the parameters of the previous order (a warm start), and a line stops
+      after `patience` orders in a row that do not improve it.
+
+    If a cache is given, the orders it holds for the same series, grid and criterion are used
+    and the selected orders are stored in it.
+
+    Parameters:
+        series: dict, maps each country to a (years, values) tuple of numpy arrays.
+        grid: list, optional, the (p, d, q) orders to search, `ORDER_GRID` by default.
+        criterion: str, "aic", "bic" or "hqic".
+        max_workers: int, optional, the number of worker processes. Defaults to the number of
+            cores. With one worker or one job, the models are fitted in this process.
+        prune_margin: float, the margin of the criterion above which a line is pruned.
+        patience: int, the number of orders in a row without improvement that stop a line.
+        cache: ForecastCache, optional, cache of previously selected orders.
+
+    Raises:
+        ValueError: If the grid is empty or the criterion is unknown
+
+    Returns:
+        dict: The selected order of every country, (criterion value, order). The value is
+        None for a cached order, and inf if no order of the grid could be fitted.
+
+    Example usage:
+        select_orders({"Germany": (years, tfp)}, grid=[(p, 1, q) for p in range(4) for q in range(2)])
+    """
+    grid = [tuple(int(value) for value in order) for order in (ORDER_GRID if grid is None else grid)]
+    if not grid:
+        raise ValueError("the grid of orders is empty")
+    if criterion not in CRITERIA:
+        raise ValueError(f"criterion must be one of {CRITERIA}")
+    lines = {}
+    for order in sorted(set(grid), key=lambda order: (order[1], order[2], order[0])):
+        lines.setdefault((order[1], order[2]), []).append(order)
+    lines = list(lines.values())
+
+    selected, values, keys = {}, {}, {}
+    for country, (years, observed) in series.items():
+        values[country] = np.asarray(observed, dtype=float)
+        if cache is not None:
+            keys[country] = cache.order_key(country, grid, criterion, years, values[country])
+            order = cache.get_order(keys[country])
+            if order is not None:
+                selected[country] = (None, order)
+    searched = [country for country in series if country not in selected]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(searched) * len(lines))
+    executor = ProcessPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+    run = executor.map if executor is not None else map
+    try:
+        # First round: the first order of every line
+        first = {country: [] for country in searched}
+        jobs = [(country, values[country], line[:1], criterion, patience, None)
+                for country in searched for line in lines]
+        for (country, fitted), line in zip(run(_order_line_job, jobs), lines * len(searched)):
+            first[country].append((line, fitted[0]))
+
+        # Second round: the rest of the lines that are not pruned, warm-started
+        jobs = []
+        for country in searched:
+            best = min(value for _, (_, value, _) in first[country])
+            for line, (_, value, params) in first[country]:
+                if len(line) > 1 and np.isfinite(value) and value <= best + prune_margin:
+                    jobs.append((country, values[country], line[1:], criterion, patience, params))
+        rest = list(run(_order_line_job, jobs))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    candidates = {country: [fitted for _, fitted in first[country]] for country in searched}
+    for country, fitted in rest:
+        candidates[country].extend(fitted)
+    for country in searched:
+        value, order = min((value, order) for order, value, _ in candidates[country])
+        if not np.isfinite(value):
+            warnings.warn(f"Could not fit any order of the grid for {country}")
+        elif cache is not None:
+            cache.put_order(keys[country], order)
+        selected[country] = (value, order)
+    return {country: selected[country] for country in series}
+
+
+def _forecast_frame(series: dict, results: dict, first_years: dict, column: str) -> pd.DataFrame:
+    """
+    Builds the tidy DataFrame of forecasts returned by the batch functions.
+
+    Parameters:
+        series: dict, the forecast series, in the order of the result.
+        results: dict, maps each country to its forecasts.
+        first_years: dict, maps each country to its first forecast year.
+        column: str, name of the forecast column.
+
+    Returns:
+        pandas.DataFrame: The forecasts with the columns "Entity", "Year" and `column`.
+    """
+    frames = []
+    for country in series:
+        predictions = results[country]
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Entity": country,
+                    "Year": np.arange(first_years[country], first_years[country] + len(predictions)),
+                    column: predictions,
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=["Entity", "Year", column])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _forecast_job(job: tuple) -> tuple:
+    """
+    Runs `forecast_arima` for one country, in a worker process.
+
+    Parameters:
+        job: tuple, (country, values, order, steps).
+
+    Returns:
+        tuple: (country, forecasts, params, error message or None).
+    """
+    country, values, order, steps = job
+    try:
+        forecasts, params = forecast_arima(values, order, steps, return_params=True)
+        return country, forecasts, params, None
+    except (ValueError, np.linalg.LinAlgError) as e:
+        return country, np.full(steps, np.nan), None, str(e)
+
+
+def batch_forecast(
+    series: dict,
+    order: Union[tuple, dict] = (20, 2, 2),
+    end_year: int = 2050,
+    max_workers: Optional[int] = None,
+    column: str = "tfp",
+    cache: Optional[ForecastCache] = None,
+) -> pd.DataFrame:
+    """
+    Forecasts every series up to `end_year`, fitting one ARIMA model per series in a process
+    pool that uses all cores by default.
+
+    A series that cannot be fitted does not stop the batch: its forecasts are NaN and a warning
+    names the series. If a cache is given, only the series that miss it are fitted.
+
+    Parameters:
+        series: dict, maps each country to a (years, values) tuple of numpy arrays.
+        order: tuple or dict, the (p, d, q) order of the ARIMA models, or the order of every
+            country (see `select_orders`).
+        end_year: int, the last year to forecast.
+        max_workers: int, optional, the number of worker processes. Defaults to the number of
+            cores. With one worker or one series, the models are fitted in this process.
+        column: str, name of the forecast column in the result.
+        cache: ForecastCache, optional, cache of previously fitted forecasts.
+
+    Returns:
+        pandas.DataFrame: The forecasts with the columns "Entity", "Year" and `column`, one row
+        per country and forecast year.
+
+    Example usage:
+        batch_forecast({"Germany": (years, tfp)}, order=(20, 2, 2), end_year=2050)
+    """
+    jobs = []
+    first_years = {}
+    keys = {}
+    cached = {}
+    for country, (years, values) in series.items():
+        last_year = int(years[-1])
+        steps = end_year - last_year
+        first_years[country] = last_year + 1
+        values = np.asarray(values, dtype=float)
+        country_order = order[country] if isinstance(order, dict) else order
+        if cache is not None:
+            keys[country] = cache.key(country, country_order, steps, years, values)
+            entry = cache.get(keys[country])
+            if entry is not None:
+                cached[country] = entry[0]
+                continue
+        jobs.append((country, values, country_order, steps))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(jobs))
+
+    if max_workers <= 1:
+        fitted = [_forecast_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            fitted = list(executor.map(_forecast_job, jobs))
+
+    results = {}
+    for country, predictions, params, error in fitted:
+        if error is not None:
+            warnings.warn(f"Could not fit a model for {country}: {error}")
+        elif cache is not None:
+            cache.put(keys[country], predictions, params)
+        results[country] = predictions
+    results.update(cached)
+    return _forecast_frame(series, results, first_years, column)
+
+
+def _backtest_job(job: tuple) -> tuple:
+    """
+    Refits the model of one country on the data up to consecutive cutoff years, in a worker
+    process. Every fit starts from the parameters fitted at the previous cutoff.
+
+    Parameters:
+        job: tuple, (country, years, values, order, cutoffs, horizon).
+
+    Returns:
+        tuple: (country, cutoffs, forecasts, actual values, error message or None), the
+        forecasts and actual values as (cutoffs x horizon) arrays, NaN where there is no
+        forecast or no observation.
+    """
+    country, years, values, order, cutoffs, horizon = job
+    observed = dict(zip(years.tolist(), values.tolist()))
+    forecasts = np.full((len(cutoffs), horizon), np.nan)
+    actual = np.full((len(cutoffs), horizon), np.nan)
+    params, error = None, None
+    for i, cutoff in enumerate(cutoffs):
+        actual[i] = [observed.get(cutoff + step, np.nan) for step in range(1, horizon + 1)]
+        try:
+            forecasts[i], params = forecast_arima(
+                values[years <= cutoff], order, horizon, return_params=True, start_params=params
+            )
+        except (ValueError, np.linalg.LinAlgError) as e:
+            params, error = None, str(e)
+    return country, cutoffs, forecasts, actual, error
+
+
+def backtest(
+    series: dict,
+    order: Union[tuple, dict] = (20, 2, 2),
+    cutoffs: Optional[list] = None,
+    horizon: int = 10,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Measures the out-of-sample errors of the ARIMA forecasts of every series by rolling-origin
+    backtesting: for every cutoff year, the model is fitted on the values up to the cutoff and
+    its forecasts of the next `horizon` years are compared with the observed values.
+
+    The (country, cutoff) fits run in a process pool. The cutoffs of a country are split into
+    runs of consecutive cutoffs, as many per country as needed to keep all workers busy, and
+    every fit of a run starts from the parameters of the previous cutoff (a warm start), which
+    are close to its solution.
+
+    Parameters:
+        series: dict, maps each country to a (years, values) tuple of numpy arrays.
+        order: tuple or dict, the (p, d, q) order of the models, or the order of every country
+            (see `select_orders`).
+        cutoffs: list, optional, the last years of the training data. Defaults to the `horizon`
+            years before the last year of the series.
+        horizon: int, the number of years forecast after every cutoff.
+        max_workers: int, optional, the number of worker processes. Defaults to the number of
+            cores. With one worker or one job, the models are fitted in this process.
+
+    Raises:
+        ValueError: If `horizon` is not positive
+
+    Returns:
+        pandas.DataFrame: The columns "Entity", "horizon", "MAE", "MAPE" (in percent) and
+        "count", the number of forecasts with an observed value, one row per country and
+        horizon. The errors are NaN where no forecast could be scored.
+
+    Example usage:
+        backtest({"Germany": (years, tfp)}, order=(1, 1, 0), cutoffs=range(2000, 2015), horizon=5)
+    """
+    if horizon < 1:
+        raise ValueError("horizon must be positive")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    runs = max(1, -(-max_workers // max(len(series), 1)))
+
+    jobs = []
+    for country, (years, values) in series.items():
+        years = np.asarray(years, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        if cutoffs is None:
+            last_year = int(years[-1])
+            country_cutoffs = list(range(last_year - horizon, last_year))
+        else:
+            country_cutoffs = sorted(int(cutoff) for cutoff in cutoffs)
+        country_order = order[country] if isinstance(order, dict) else order
+        for run in np.array_split(np.array(country_cutoffs, dtype=np.int64), min(runs, len(country_cutoffs)) or 1):
+            if len(run):
+                jobs.append((country, years, values, country_order, run.tolist(), horizon))
+
+    max_workers = min(max_workers, len(jobs))
+    if max_workers <= 1:
+        fitted = [_backtest_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            fitted = list(executor.map(_backtest_job, jobs))
+
+    errors = {country: [] for country in series}
+    actuals = {country: [] for country in series}
+    for country, _, forecasts, actual, error in fitted:
+        if error is not None:
+            warnings.warn(f"Could not fit a model for {country} at every cutoff: {error}")
+        errors[country].append(forecasts - actual)
+        actuals[country].append(actual)
+
+    rows = []
+    for country in series:
+        if not errors[country]:
+            error = actual = np.full((0, horizon), np.nan)
+        else:
+            error, actual = np.concatenate(errors[country]), np.concatenate(actuals[country])
+        scored = ~np.isnan(error)
+        count = scored.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mae = np.where(count > 0, np.nansum(np.abs(error), axis=0) / count, np.nan)
+            mape = np.where(
+                count > 0, np.nansum(np.abs(error / actual), axis=0) / count * 100, np.nan
+            )
+        for step in range(horizon):
+            rows.append((country, step + 1, mae[step], mape[step], int(count[step])))
+    return pd.DataFrame(rows, columns=["Entity", "horizon", "MAE", "MAPE", "count"])
+
+
+def fast_batch_forecast(
+    series: dict,
+    order: tuple = (20, 2, 2),
+    end_year: int = 2050,
+    column: str = "tfp",
+    ridge: float = 1e-6,
+) -> pd.DataFrame:
+    """
+    Forecasts every series up to `end_year` with AR models fitted by batched least squares,
+    a fast approximation of `batch_forecast` for screening and interactive use.
+
+    The series are aligned on their last observation in one (countries x years) matrix, padded
+    with NaN, and differenced `d` times at once. An AR(p) model without constant (like the
+    ARIMA models for d > 0) is fitted per country by solving all the normal equations of the
+    stacked (countries x periods x lags) design in one batch. The moving average part of the
+    order is ignored. A small ridge penalty keeps the equations of short series solvable. The
+    forecasts of all countries are computed in one vectorized recursion and integrated back.
+    With p = 0, the differenced series are forecast as zero, so that (0, 1, 0) is a random walk.
+
+    The missing values of every series are dropped before it is aligned, so a series forecasts
+    from its last observation. A series without any value cannot be fitted: its forecasts are
+    NaN and a warning names the series, like in `batch_forecast`.
+
+    Parameters:
+        series: dict, maps each country to a (years, values) tuple of numpy arrays.
+        order: tuple, the (p, d, q) order, q is ignored.
+        end_year: int, the last year to forecast.
+        column: str, name of the forecast column in the result.
+        ridge: float, ridge penalty relative to the mean variance of the lags.
+
+    Returns:
+        pandas.DataFrame: The forecasts with the columns "Entity", "Year" and `column`, one row
+        per country and forecast year.
+
+    Example usage:
+        fast_batch_forecast({"Germany": (years, tfp)}, order=(20, 2, 2), end_year=2050)
+    """
+    p, d, _ = order
+    countries = list(series)
+    if not countries:
+        return _forecast_frame(series, {}, {}, column)
+
+    # A missing value would make the lags and the integration of its whole series NaN
+    observed = {}
+    for country, (years, values) in series.items():
+        years, values = np.asarray(years), np.asarray(values, dtype=float)
+        present = ~np.isnan(values)
+        if present.any():
+            years, values = years[present], values[present]
+        else:
+            warnings.warn(f"Could not fit a model for {country}: the series has no values")
+        observed[country] = (years, values)
+    series = observed
+
+    last_years = np.array([int(years[-1]) for years, _ in series.values()])
+    steps = end_year - last_years
+    horizon = max(int(steps.max()), 0)
+    length = max(len(values) for _, values in series.values())
+
+    # Align the series on their last observation
+    levels = np.full((len(countries), length), np.nan)
+    for i, (_, values) in enumerate(series.values()):
+        levels[i, length - len(values):] = values
+
+    # Difference all series at once, keeping the last value of every level for integration
+    last_values = []
+    z = levels
+    for _ in range(d):
+        last_values.append(z[:, -1])
+        z = np.diff(z, axis=1)
+
+    # Stacked design: X[c, t, k] is the value of lag k + 1 for period t of country c
+    periods = z.shape[1] - p
+    if p == 0:
+        # No lags to fit, every forecast of the differenced series is zero
+        XtX = Xty = None
+    elif periods > 0:
+        X = np.stack([z[:, p - 1 - k : p - 1 - k + periods] for k in range(p)], axis=2)
+        y = z[:, p:]
+        valid = ~(np.isnan(X).any(axis=2) | np.isnan(y))
+        X = np.where(valid[:, :, None], X, 0.0)
+        y = np.where(valid, y, 0.0)
+        XtX = np.einsum("ctk,ctl->ckl", X, X)
+        Xty = np.einsum("ctk,ct->ck", X, y)
+    else:
+        XtX = np.zeros((len(countries), p, p))
+        Xty = np.zeros((len(countries), p))
+    if p == 0:
+        coefficients = np.zeros((len(countries), 0))
+    else:
+        penalty = ridge * np.trace(XtX, axis1=1, axis2=2) / p + 1e-12
+        coefficients = np.linalg.solve(XtX + penalty[:, None, None] * np.eye(p), Xty[:, :, None])[:, :, 0]
+
+    # Forecast the differenced series of all countries in one recursion
+    # Missing lags of short series count as zero
+    history = np.zeros((len(countries), p))
+    available = min(p, z.shape[1])
+    if available:
+        history[:, p - available :] = np.nan_to_num(z[:, z.shape[1] - available :])
+    predictions = np.empty((len(countries), horizon))
+    for step in range(horizon):
+        predictions[:, step] = np.einsum("ck,ck->c", history[:, ::-1], coefficients)
+        history = np.concatenate((history[:, 1:], predictions[:, step : step + 1]), axis=1)
+
+    # Integrate the forecasts back to levels
+    for last_value in reversed(last_values):
+        predictions = last_value[:, None] + np.cumsum(predictions, axis=1)
+
+    results = {country: predictions[i, : max(int(steps[i]), 0)] for i, country in enumerate(countries)}
+    first_years = {country: int(last_years[i]) + 1 for i, country in enumerate(countries)}
+    return _forecast_frame(series, results, first_years, column)
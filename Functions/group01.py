@@ -5,17 +5,61 @@ The `Group01` class has the following methods:
 
 Methods:
 -------
-__init__(name):
-    Initializes the object with the given name.
-
-get_data():
+__init__(name, headless, use_cube, streaming, profile, compact, prefetch, shared):
+    Initializes the object with the given name. A headless object renders its plots on
+    Agg figures outside of pyplot and returns them instead of showing them. A streaming object
+    reads the data in chunks into an on-disk panel instead of loading it into memory. A
+    prefetching object starts loading the data in the background right away. A shared object
+    uses the read-only copy of the data that every shared object and process maps.
+
+get_data(use_cache: bool, geographical: bool, data_file: str, compact: bool):
     Downloads a CSV file containing agricultural total factor productivity data from
     this Github repository (https://github.com/owid/owid-datasets/tree/master/datasets),
     saves it into a downloads/ directory and reads the dataset into a pandas DataFrame.
+    The filtered DataFrame is cached column by column, so later loads skip the CSV parsing.
+    Another CSV file or columnar directory with the same schema, like the synthetic panels of
+    the `synthetic` module, can be loaded instead with `data_file`.
+
+prefetch(), ready(part: str), wait(part: str, timeout: float), wait_async(part: str):
+    Load the tabular and geographical data in background threads, and tell or wait until
+    they are loaded.
+
+refresh(url: str) -> dict:
+    Downloads the data file again with a conditional request and only updates the rows, the
+    indexes and the cached results that changed.
+
+add_datasets(datasets: dict, use_cache: bool, refresh: bool) -> list:
+    Downloads other datasets with Entity and Year columns concurrently and registers them
+    for `joined`.
+
+joined(names: list) -> pd.DataFrame:
+    Returns the data joined with the registered datasets on (Entity, Year).
 
 get_countries():
     Returns a list of available countries in the dataset.
 
+memory_report() -> pd.DataFrame:
+    Returns the bytes used by every column of the DataFrame with the default dtypes and in
+    compact mode.
+
+get_cube():
+    Returns the dataset as a dense Year x Entity x metric NumPy array with its axis labels and
+    precomputed world totals. With `use_cube=True`, the methods read their data from it.
+
+get_regions(), get_rollup(weight: str) -> RegionRollup:
+    Return the regions of the countries, and the sums and weighted averages of every region,
+    year and metric, computed by one sparse matrix product and cached. The plots and the
+    predictor accept regions like countries.
+
+get_derived(window: int) -> DerivedMetrics, derived_frame(window: int) -> pd.DataFrame:
+    Return the year-over-year growth and the compound annual growth rate of every metric and
+    the decomposition of the tfp growth into output and input contributions, for all entities
+    and years at once. The plotting methods accept them like columns.
+
+correlation(years: tuple, countries: list, window: int) -> pd.DataFrame:
+    Returns the cached correlation matrix of the '_quantity' columns, over a range of years,
+    a subset of countries or all rolling windows of a given length.
+
 plot_quantity():
     Plots a heatmap of the correlation between all the columns in the Pandas
     DataFrame that end with the string '_quantity'.
@@ -26,20 +70,68 @@ plot_area_chart(country: str, normalize: bool):
     The columns are normalized by the total output if the `normalize` parameter
     is set to True.
 
-plot_country_chart(args: Union[list[str], str]):
+plot_country_chart(args: Union[list[str], str], column: str):
     Plots the total of the _output_ values of each
     selected country given by `country`, on the same chart with the
-    X-axis being the Year.
+    X-axis being the Year, or another column or derived metric.
 
 gapminder_plot(year: int):
     Visualize Gapminder data for a specific year.
 
-choropleth(self, year: int) -> None:
-    Plots a choropleth map of the total factor productivity (tfp) for the given year
+choropleth(self, year: int, column: str) -> None:
+    Plots a choropleth map of the total factor productivity (tfp), or of another column or
+    derived metric, for the given year
+
+choropleth_series(self, years: list, out_dir: str, animation: str) -> list:
+    Renders the choropleth map of several years as PNG files or an animation, drawing the
+    geometries only once.
+
+get_adjacency(distance: float) -> tuple:
+    Returns the sparse adjacency matrix of the countries on the map, built with an STRtree
+    and cached on disk.
+
+spatial_lag(column: str, years: list), morans_i(column: str, years: list),
+hot_spots(column: str, years: list) -> pd.DataFrame:
+    Return the average of the neighbours of every country, the Moran's I of every year and the
+    Getis-Ord hot and cold spots of a column or derived metric.
+
+select_orders(self, countries: list, grid: list, criterion: str) -> pd.DataFrame:
+    Selects the ARIMA order of the given countries by information criterion, in a process
+    pool, and stores it for `forecast(order="auto")`.
+
+backtest(self, countries: list, order: tuple, cutoffs: list, horizon: int) -> pd.DataFrame:
+    Refits the models of the given countries up to several cutoff years in a process pool
+    and returns the MAE and MAPE of their forecasts per country and horizon.
+
+forecast(self, countries: list, order: tuple, end_year: int) -> pd.DataFrame:
+    Forecasts the total factor productivity (tfp) of the given countries, or of all
+    countries, in a process pool and returns a tidy DataFrame.
+
+plot_forecast(self, forecasts: pd.DataFrame) -> None:
+    Plots the observed and forecast tfp of the countries in the result of `forecast`.
 
 predictor(self, countries: list) -> None:
     Predicts the total factor productivity (tfp) by year for the given countries
-    up to three until the year 2050.
+    until the year 2050 and plots it.
+
+
+In streaming mode (`Group01(name, streaming=True)`), the data is read in chunks into an on-disk
+`StreamingPanel` instead of a DataFrame, and the methods work from its per-year aggregates and
+from the rows of single countries and years, so the dataset does not need to fit in memory.
+
+With `Group01(name, shared=True)`, the data is published once into memory-mapped files in
+downloads/shared, and every shared object of every process wraps the same read-only pages in its
+`df` instead of holding its own copy (see the `shared` module). The geometries are read once per
+process and shared by its objects as well.
+
+With `Group01(name, profile=True)`, the methods time their load, index, compute, fit and render
+phases in `profiler`, which keeps statistics per method and phase and exports them as JSON or
+as a Chrome trace (see the `profiling` module).
+
+Every plotting method also accepts an `output` argument: "figure" returns the matplotlib
+Figure, "png" or "svg" returns the image bytes and a path ending with .png or .svg writes the
+image into that file. These outputs never use pyplot, so charts can be rendered concurrently in
+server workers or process pools.
 
 
 Example usage:
@@ -56,15 +148,376 @@ Example usage:
 """
 
 import os
-import warnings
-from typing import Optional, Union
+import io
+import json
+import time
+import shutil
+import hashlib
+from typing import TYPE_CHECKING, Callable, NamedTuple, Optional, Union
 import pandas as pd
-import requests
 import numpy as np
-import seaborn as sns
-from matplotlib import pyplot as plt
-import geopandas as gpd
-from statsmodels.tsa.arima.model import ARIMA
+from forecasting import (
+    ORDER_GRID,
+    ForecastCache,
+    backtest,
+    batch_forecast,
+    fast_batch_forecast,
+    select_orders,
+)
+from streaming import StreamingPanel
+from profiling import Profiler, profiled
+from datasets import DatasetLoader
+from regions import RegionHierarchy, RegionRollup, rollup
+from derived import DerivedMetrics, derive, derived_columns
+from spatial import cached_adjacency, getis_ord, morans_i, spatial_lag
+from shared import shared_dataset, shared_object
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+DATA_URL = "https://raw.githubusercontent.com/owid/owid-datasets/master/datasets/Agricultural%20total%20factor%20productivity%20(USDA)/Agricultural%20total%20factor%20productivity%20(USDA).csv"
+DATA_FILE = "downloads/data.csv"
+CACHE_DIR = "downloads/cache"
+GEOMETRY_CACHE_DIR = "downloads/geometry_cache"
+FORECAST_CACHE_DIR = "downloads/forecast_cache"
+SPATIAL_CACHE_DIR = "downloads/spatial_cache"
+STREAM_DIR = "downloads/stream"
+SHARED_DIR = "downloads/shared"
+
+# Entities of the source that aggregate several countries
+AGGREGATED_ENTITIES = (
+    "Caribbean",
+    "Central Africa",
+    "Central African Republic",
+    "Central America",
+    "Central Asia",
+    "Central Europe",
+    "Czechoslovakia",
+    "Developed Asia",
+    "Developed countries",
+    "Former Soviet Union",
+    "High income",
+    "Horn of Africa",
+    "Latin America and the Caribbean",
+    "Least developed countries",
+    "Low income",
+    "Lower-middle income",
+    "North Africa",
+    "Northeast Asia",
+    "Northern Europe",
+    "South Asia",
+    "Southeast Asia",
+    "Southern Africa",
+    "Southern Europe",
+    "Sub-Saharan Africa",
+    "Upper-middle income",
+    "West Africa",
+    "West Asia",
+    "Western Europe",
+    "World",
+    "Yugoslavia",
+)
+
+
+def _file_checksum(path: str) -> str:
+    """
+    Returns the SHA-256 checksum of a file, read in chunks.
+
+    Parameters:
+        path: str, path of the file to hash.
+
+    Returns:
+        str: The hexadecimal digest of the file content.
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _write_column_cache(
+    df: pd.DataFrame, cache_dir: str, checksum: str, write: Optional[Callable] = None
+) -> None:
+    """
+    Writes a DataFrame into a columnar cache of one .npy file per column.
+
+    String columns are stored as integer codes plus a separate file with the categories,
+    so that every file can be memory-mapped on load. The files are written into a new version
+    directory of `cache_dir`, and the manifest, which records the checksum of the source file
+    (invalidating the cache when it changes) and the files of the version, is moved into place
+    last. The files of the previous version are never rewritten, so a process reading or
+    memory-mapping them meanwhile is not affected, and a failed write keeps the previous
+    version. The version replaced is kept for the readers that are opening it, the older ones
+    are removed.
+
+    Parameters:
+        df: pandas.DataFrame, the (already filtered) data to cache.
+        cache_dir: str, directory in which the cache is stored.
+        checksum: str, checksum of the source file the data was read from.
+        write: callable, optional, called with the version directory to write other files into
+            it before the manifest (see `_write_geometry_cache`).
+
+    Returns:
+        None
+    """
+    version = f"v{time.time_ns():020d}-{os.getpid()}"
+    version_dir = os.path.join(cache_dir, version)
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    temporary = f"{manifest_path}.{version}"
+    os.makedirs(version_dir)
+    try:
+        columns = []
+        np.save(os.path.join(version_dir, "index.npy"), df.index.to_numpy())
+        for i, column in enumerate(df.columns):
+            entry = {"name": column, "file": f"{version}/col_{i}.npy"}
+            values = df[column]
+            if values.dtype == object:
+                categorical = pd.Categorical(values)
+                np.save(os.path.join(cache_dir, entry["file"]), categorical.codes)
+                entry["categories"] = f"{version}/col_{i}_categories.npy"
+                np.save(
+                    os.path.join(cache_dir, entry["categories"]),
+                    categorical.categories.to_numpy(dtype=str),
+                )
+            else:
+                np.save(os.path.join(cache_dir, entry["file"]), values.to_numpy())
+            columns.append(entry)
+        if write is not None:
+            write(version_dir)
+
+        previous = (_read_manifest(cache_dir, None) or {}).get("version")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "checksum": checksum,
+                    "version": version,
+                    "index": f"{version}/index.npy",
+                    "columns": columns,
+                },
+                f,
+            )
+        os.replace(temporary, manifest_path)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+    # Remove the versions older than the one replaced, which are named in the order they were
+    # written (the other directories of the cache are not versions)
+    for name in os.listdir(cache_dir):
+        if previous is not None and name[:1] == "v" and name[1:21].isdigit() and name < previous:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+def _read_manifest(cache_dir: str, checksum: Optional[str]) -> Optional[dict]:
+    """
+    Returns the manifest of a columnar cache, None if there is none or if it was written for
+    another checksum (any checksum is accepted if `checksum` is None).
+    """
+    try:
+        with open(os.path.join(cache_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if checksum is not None and manifest.get("checksum") != checksum:
+        return None
+    return manifest
+
+
+def _read_column_cache(
+    cache_dir: str, checksum: Optional[str], manifest: Optional[dict] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Reads a DataFrame from a columnar cache written by `_write_column_cache`.
+
+    Parameters:
+        cache_dir: str, directory in which the cache is stored.
+        checksum: str, checksum of the current source file, or None to read the cache whatever
+            its checksum (a columnar data file, see `synthetic.write_panel`).
+        manifest: dict, optional, the manifest of the cache if it was read already.
+
+    Returns:
+        pandas.DataFrame or None: The cached data, or None if there is no cache or it was
+        written for a different version of the source file.
+    """
+    if manifest is None:
+        manifest = _read_manifest(cache_dir, checksum)
+    if manifest is None:
+        return None
+
+    data = {}
+    try:
+        for entry in manifest["columns"]:
+            values = np.load(os.path.join(cache_dir, entry["file"]), mmap_mode="r")
+            if "categories" in entry:
+                categories = np.load(os.path.join(cache_dir, entry["categories"]))
+                values = categories.astype(object)[values]
+            data[entry["name"]] = values
+        # The index of the caches written before versions were introduced is at the top
+        index = np.load(os.path.join(cache_dir, manifest.get("index", "index.npy")))
+    except (OSError, ValueError, KeyError):
+        # A missing or truncated column file invalidates the whole cache
+        return None
+    return pd.DataFrame(data, index=index)
+
+
+def _compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns a copy of a DataFrame with smaller dtypes holding exactly the same values: string
+    columns become categorical, integer columns (like Year) the smallest integer type of their
+    range and float columns float32 if every value is a float32.
+
+    Parameters:
+        df: pandas.DataFrame, the data to compact.
+
+    Returns:
+        pandas.DataFrame: The compact data, with the same index.
+    """
+    data = {}
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == object:
+            values = values.astype("category")
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            values = pd.to_numeric(values, downcast="integer")
+        elif values.dtype == np.float64:
+            compact = values.astype(np.float32)
+            if np.array_equal(compact.to_numpy(dtype=np.float64), values.to_numpy(), equal_nan=True):
+                values = compact
+        data[column] = values
+    return pd.DataFrame(data, index=df.index)
+
+
+def _expand_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns a copy of a DataFrame with the default dtypes of `pandas.read_csv`, the inverse of
+    `_compact_frame`.
+
+    Parameters:
+        df: pandas.DataFrame, the data to expand.
+
+    Returns:
+        pandas.DataFrame: The data with object, int64 and float64 columns, with the same index.
+    """
+    data = {}
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            values = values.astype(np.int64)
+        elif pd.api.types.is_float_dtype(values.dtype):
+            values = values.astype(np.float64)
+        data[column] = values
+    return pd.DataFrame(data, index=df.index)
+
+
+def _write_geometry_cache(gdf, cache_dir: str, checksum: str) -> None:
+    """
+    Writes a GeoDataFrame into a cache directory. The geometries are stored as concatenated WKB
+    with an array of offsets in the version directory of the columnar cache of the other
+    columns (see `_write_column_cache`), whose manifest is written last.
+
+    Parameters:
+        gdf: geopandas.GeoDataFrame, the geographical data to cache.
+        cache_dir: str, directory in which the cache is stored.
+        checksum: str, checksum of the source file the data was read from.
+
+    Returns:
+        None
+    """
+    import shapely
+
+    wkb = shapely.to_wkb(np.asarray(gdf.geometry))
+    offsets = np.cumsum([0] + [len(geometry) for geometry in wkb])
+
+    def write(version_dir):
+        with open(os.path.join(version_dir, "geometry.bin"), "wb") as f:
+            f.write(b"".join(wkb))
+        np.save(os.path.join(version_dir, "geometry_offsets.npy"), offsets)
+        with open(os.path.join(version_dir, "geometry.json"), "w", encoding="utf-8") as f:
+            json.dump({"crs": gdf.crs.to_wkt() if gdf.crs else None}, f)
+
+    _write_column_cache(
+        pd.DataFrame(gdf.drop(columns=gdf.geometry.name)), cache_dir, checksum, write
+    )
+
+
+def _read_geometry_cache(cache_dir: str, checksum: str):
+    """
+    Reads a GeoDataFrame from a cache written by `_write_geometry_cache`.
+
+    Parameters:
+        cache_dir: str, directory in which the cache is stored.
+        checksum: str, checksum of the current source file.
+
+    Returns:
+        geopandas.GeoDataFrame or None: The cached data, or None if there is no cache or it was
+        written for a different version of the source file.
+    """
+    import geopandas as gpd
+    import shapely
+
+    manifest = _read_manifest(cache_dir, checksum)
+    attributes = _read_column_cache(cache_dir, checksum, manifest)
+    if attributes is None:
+        return None
+    # The geometry files are in the version directory of the manifest
+    version_dir = os.path.join(cache_dir, manifest.get("version", ""))
+    try:
+        with open(os.path.join(version_dir, "geometry.json"), "r", encoding="utf-8") as f:
+            crs = json.load(f)["crs"]
+        offsets = np.load(os.path.join(version_dir, "geometry_offsets.npy"))
+        with open(os.path.join(version_dir, "geometry.bin"), "rb") as f:
+            buffer = f.read()
+    except (OSError, ValueError, KeyError):
+        return None
+    wkb = np.array(
+        [buffer[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])], dtype=object
+    )
+    return gpd.GeoDataFrame(attributes, geometry=shapely.from_wkb(wkb), crs=crs)
+
+
+class PanelCube(NamedTuple):
+    """
+    A dense Year x Entity x metric representation of the dataset, returned by
+    `Group01.get_cube`.
+
+    Attributes:
+    ----------
+    values : numpy.ndarray
+        float array of shape (years, entities, metrics), NaN where there is no data
+
+    present : numpy.ndarray
+        bool array of shape (years, entities), True where the entity has a row in that year
+
+    world : numpy.ndarray
+        float array of shape (years, metrics), the sum of every metric over all entities
+
+    years : numpy.ndarray
+        the years of the first axis, in increasing order
+
+    entities : list
+        the entities of the second axis
+
+    metrics : list
+        the columns of the third axis
+
+    year_positions, entity_positions, metric_positions : dict
+        the position of every year, entity and metric on its axis
+    """
+
+    values: np.ndarray
+    present: np.ndarray
+    world: np.ndarray
+    years: np.ndarray
+    entities: list
+    metrics: list
+    year_positions: dict
+    entity_positions: dict
+    metric_positions: dict
 
 
 class Group01:
@@ -76,8 +529,53 @@ class Group01:
     name : str
         name of the object
 
+    headless : bool
+        whether the plotting methods return Figures instead of showing them
+
+    use_cube : bool
+        whether the methods read their data from the dense cube of `get_cube`
+
+    streaming : bool
+        whether the data is read out of core, from `panel`
+
+    compact : bool
+        whether `df` is stored with a categorical Entity and downcast numeric columns
+
+    shared : bool
+        whether `df` is a read-only view of the data shared by every object and process
+
     df : pandas.DataFrame
-        a pandas DataFrame containing the data
+        a pandas DataFrame containing the data, None in streaming mode
+
+    panel : StreamingPanel
+        the on-disk panel of the data in streaming mode, with its per-year aggregates
+
+    profiler : Profiler
+        times the load, index, compute, fit and render phases of the methods when enabled
+
+    data_file : str
+        the CSV file or columnar directory the data is read from, downloads/data.csv by default
+
+    loader : DatasetLoader
+        downloads the data file and the other datasets through one connection-pooled session
+
+    datasets : dict
+        the numeric columns of the datasets of `add_datasets` by name, indexed by (Entity, Year)
+
+    forecast_cache : ForecastCache
+        the disk-backed cache of fitted forecasts and selected orders in downloads/forecast_cache
+
+    order_grid : list
+        the (p, d, q) orders searched by `select_orders`, `forecasting.ORDER_GRID` by default
+
+    orders : dict
+        the order selected by `select_orders` for every country
+
+    regions : RegionHierarchy
+        the regions and the countries they cover, `regions.REGIONS` by default
+
+    cagr_window : int
+        the number of years of the compound annual growth rates read by the plotting methods
 
     Methods:
     -------
@@ -85,9 +583,37 @@ class Group01:
         Downloads a CSV file containing agricultural total factor productivity data from this Github
         repository (https://github.com/owid/owid-datasets/tree/master/datasets)
 
+    prefetch(), ready(part), wait(part, timeout), wait_async(part):
+        Load the data in background threads, and tell or wait until it is loaded.
+
+    refresh(url):
+        Downloads the data file again with a conditional request and only updates what changed.
+
+    add_datasets(datasets, use_cache, refresh):
+        Downloads other datasets concurrently and registers them for `joined`.
+
+    joined(names):
+        Returns the data joined with the registered datasets on (Entity, Year).
+
     get_countries():
         Returns a list of available countries in the dataset.
 
+    memory_report():
+        Returns the bytes used by every column with the default dtypes and in compact mode.
+
+    get_cube():
+        Returns the dataset as a dense Year x Entity x metric NumPy array.
+
+    get_regions(), get_rollup(weight):
+        Return the regions, and the sums and weighted averages of every region, year and metric.
+
+    get_derived(window), derived_frame(window):
+        Return the growth rates and the tfp growth decomposition of every entity and year.
+
+    correlation(years, countries, window):
+        Returns the cached correlation matrix of the '_quantity' columns, optionally over a range
+        of years, a subset of countries or rolling windows.
+
     plot_quantity():
         Plots a heatmap of the correlation between all the columns in the Pandas DataFrame that end
         with the string '_quantity'.
@@ -107,9 +633,32 @@ class Group01:
     choropleth(self, year: int) -> None:
         Plots a choropleth map of the total factor productivity (tfp) for the given year
 
+    choropleth_series(self, years: list, out_dir: str, animation: str) -> list:
+        Renders the choropleth map of several years as PNG files or an animation, drawing the
+        geometries only once.
+
+    get_adjacency(distance):
+        Returns the sparse adjacency matrix of the countries on the map.
+
+    spatial_lag(column, years), morans_i(column, years), hot_spots(column, years):
+        Return the neighbour averages, the Moran's I per year and the hot and cold spots.
+
+    select_orders(self, countries: list, grid: list, criterion: str) -> pd.DataFrame:
+        Selects the ARIMA order of the given countries by information criterion.
+
+    backtest(self, countries: list, order: tuple, cutoffs: list, horizon: int) -> pd.DataFrame:
+        Returns the out-of-sample MAE and MAPE of the forecasts per country and horizon.
+
+    forecast(self, countries: list, order: tuple, end_year: int) -> pd.DataFrame:
+        Forecasts the total factor productivity (tfp) of the given countries, or of all
+        countries, in a process pool and returns a tidy DataFrame.
+
+    plot_forecast(self, forecasts: pd.DataFrame) -> None:
+        Plots the observed and forecast tfp of the countries in the result of `forecast`.
+
     predictor(self, countries: list) -> None:
         Predicts the total factor productivity (tfp) by year for the given
-        countries up to three until the year 2050.
+        countries until the year 2050 and plots it.
     """
 
     merge_dict = {
@@ -128,18 +677,111 @@ class Group01:
         "Macedonia": "North Macedonia",
     }
 
-    def __init__(self, name: str):
+    def __init__(
+        self,
+        name: str,
+        headless: bool = False,
+        use_cube: bool = False,
+        streaming: bool = False,
+        profile: bool = False,
+        compact: bool = False,
+        prefetch: bool = False,
+        shared: bool = False,
+    ):
         """
         Initializes an instance of the Group01 class.
 
         Parameters:
             name: str, name of the object.
+            headless: bool, if True the plotting methods never use pyplot and return their
+                Figure instead of showing it (see `_render`).
+            use_cube: bool, if True the methods read their data from the dense cube returned by
+                `get_cube` instead of slicing the DataFrame.
+            streaming: bool, if True the data is never loaded into memory: `get_data` reads the
+                CSV file in chunks into a `StreamingPanel` on disk, and the methods read its
+                per-year aggregates and the rows of single entities and years.
+            profile: bool, if True the phases of the methods are timed by `self.profiler`, which
+                can also be switched on and off later with `self.profiler.enabled`.
+            compact: bool, if True `self.df` is stored with smaller dtypes holding the same
+                values (see `get_data` and `memory_report`).
+            prefetch: bool, if True the tabular and the geographical data start loading in
+                background threads right away (see `prefetch`, `ready` and `wait`).
+            shared: bool, if True `self.df` is a read-only view of the memory-mapped data shared
+                by every shared object and process, and the geometries are shared by the
+                objects of the process (see `get_data`).
+
+        Raises:
+            ValueError: If `streaming` is set with `use_cube` or `shared`
         """
+        if use_cube and streaming:
+            raise ValueError("use_cube needs the data in memory, it cannot be used in streaming mode")
+        if shared and streaming:
+            raise ValueError("shared needs the data in memory, it cannot be used in streaming mode")
         self.name = name
+        self.headless = headless
+        self.use_cube = use_cube
+        self.streaming = streaming
+        self.compact = compact
+        self.shared = shared
+        # The order of the columns of the data file in shared mode, see _columns
+        self._column_order = None
+        self.panel = None
+        self.profiler = Profiler(enabled=profile)
+        self._cube = None
+        self._cube_df = None
+        # Regions and their cached aggregates by weight, see get_rollup
+        self.regions = RegionHierarchy()
+        self._rollups = {}
+        self._rollups_key = None
+        # Derived metrics by CAGR window, see get_derived
+        self.cagr_window = 10
+        self._derived = {}
+        self._derived_cube = None
+        self._derived_names = (None, frozenset())
+        # Cached results of correlation
+        self._correlations = {}
+        self._correlations_df = None
         self.df = None
         self.df_geographical = None
-
-    def get_data(self) -> None:
+        self.data_file = DATA_FILE
+        # Other datasets indexed by (Entity, Year), see add_datasets and joined
+        self.loader = None
+        self.datasets = {}
+        self._joined = {}
+        self._joined_df = None
+        self.forecast_cache = ForecastCache(FORECAST_CACHE_DIR)
+        # Orders searched by select_orders, and the order selected for every country
+        self.order_grid = list(ORDER_GRID)
+        self.orders = {}
+        # Entity/Year index of self.df, see _build_index
+        self._indexed_df = None
+        self._entity_index = {}
+        self._year_index = {}
+        self._year_order = None
+        self._countries = []
+        self._country_set = frozenset()
+        # Join of the geometries with the entities, see _geo_join_index
+        self._geo_join = None
+        self._geo_join_df = None
+        self._geo_join_geographical = None
+        self._geo_paths = None
+        self._geo_paths_join = None
+        # Adjacency of the joined geometries by distance, see get_adjacency
+        self._adjacency = {}
+        self._adjacency_join = None
+        # Background loads of the "data" and "geographical" parts, see prefetch
+        self._pending = {}
+        if prefetch:
+            self.prefetch()
+
+    @profiled
+    def get_data(
+        self,
+        use_cache: bool = True,
+        geographical: bool = True,
+        data_file: Optional[str] = None,
+        compact: Optional[bool] = None,
+    ) -> None:
         """
         This method downloads a CSV file containing agricultural total factor productivity data from
         this Github repository (https://github.com/owid/owid-datasets/tree/master/datasets) and
@@ -149,11 +791,49 @@ class Group01:
         the class. If the DataFrame already exists (i.e., has already been loaded), the method does
         not reload it.
 
+        The first time the CSV file is parsed, the filtered DataFrame is written into a columnar
+        cache (one .npy file per column) in downloads/cache. Later loads read the cache instead of
+        parsing the CSV file again, as long as the checksum of the CSV file has not changed.
+
+        The naturalearth_lowres geometries of geopandas are read into `df_geographical` and cached
+        the same way in downloads/geometry_cache, as WKB, invalidated by the checksum of the
+        shapefile.
+
+        The heavy dependencies (requests, geopandas) are only imported when they are needed, so
+        methods that only use the tabular data load it with `geographical=False`.
+
+        With `data_file`, the data is read from another file with the same columns instead, for
+        example a synthetic panel written by `synthetic.write_panel`: a CSV file (cached like the
+        downloaded one, in a subdirectory of downloads/cache) or a columnar directory in the layout of the cache, which is
+        memory-mapped as is. The object keeps using that file until another one is passed.
+
+        In compact mode, `self.df` has a categorical Entity column, a small integer Year column
+        and every other column in the smallest dtype that holds exactly its values (integer
+        columns downcast to their range, float columns to float32 only if no value changes),
+        see `memory_report`. The caches are written with the default dtypes, and the methods
+        return the same results in both modes.
+
+        In shared mode, the data is read once and published into memory-mapped files in
+        downloads/shared, as long as the checksum of the data file has not changed. `self.df` is
+        then a DataFrame over those read-only pages, with a categorical Entity column and the
+        other columns grouped by dtype: the objects and processes that load the same file map the
+        same memory, and writing into `self.df` raises a ValueError. `refresh` gives the object a
+        private copy of the new data.
+
         Parameters:
-            None
+            use_cache : bool, optional (default=True)
+                If True, the data is read from and written to the columnar and geometry caches.
+            geographical : bool, optional (default=True)
+                If True, the geographical data is read into `df_geographical` as well.
+            data_file : str, optional
+                A CSV file or columnar directory to read instead of downloads/data.csv.
+            compact : bool, optional
+                Switches the compact mode of the object on or off, which reloads the data if it
+                changes. The mode of the constructor is kept if None.
 
         Raises:
             Exception: If there is an error while downloading the data file
+            FileNotFoundError: If `data_file` does not exist
 
         Returns:
             None
@@ -163,353 +843,1925 @@ class Group01:
             my_object.get_data()
         """
 
-        url = "https://raw.githubusercontent.com/owid/owid-datasets/master/datasets/Agricultural%20total%20factor%20productivity%20(USDA)/Agricultural%20total%20factor%20productivity%20(USDA).csv"
+        self.profiler.phase("load")
+        # Wait for the background load of the data, see prefetch
+        future = self._pending.pop("data", None)
+        if future is not None:
+            future.result()
+
+        if data_file is not None and data_file != self.data_file:
+            # Reload the data from the new file
+            self.data_file = data_file
+            self.df = None
+            self.panel = None
+
+        if compact is not None and compact != self.compact:
+            self.compact = compact
+            self.df = None
+
+        if not self._load_data(use_cache):
+            return
+
+        if not geographical:
+            return
+
+        future = self._pending.pop("geographical", None)
+        if future is not None:
+            future.result()
+        if self.df_geographical is None:
+            self._read_geographical(use_cache)
+
+    def _load_data(self, use_cache: bool) -> bool:
+        """
+        Downloads the data file if it does not exist and reads it into `self.df`, or into
+        `self.panel` in streaming mode (see `get_data`).
+
+        Parameters:
+            use_cache: bool, if True the data is read from and written to the columnar cache.
+
+        Raises:
+            FileNotFoundError: If `data_file` does not exist
 
+        Returns:
+            bool: False if the data file could not be downloaded, True otherwise.
+        """
         if os.path.exists("downloads"):  # check if the downloads directory exists
             print("downloads directory already exists")
         else:
             print("creating downloads directory...")
-            os.mkdir("downloads")  # create a downloads directory
+            os.makedirs("downloads", exist_ok=True)  # create a downloads directory
 
-        if os.path.exists("downloads/data.csv"):  # check if the data file exists
+        if os.path.exists(self.data_file):  # check if the data file exists
             print("data file already exists")
+        elif self.data_file != DATA_FILE:
+            raise FileNotFoundError(f"{self.data_file} does not exist")
         else:
-            print("downloading data file...")
+            print("downloading data file into downloads/data.csv...")
+            import requests
+
             try:
-                # get the data from url
-                response = requests.get(url, timeout=60)
+                # stream the data from url into the file
+                self._loader().download(DATA_URL, DATA_FILE, conditional=False)
             except requests.exceptions.RequestException as e:
                 print("Error: unable to download data file")
                 print(e)
-                return
+                return False
                 # exit the method
 
-            print("saving data into file ... downloads/data.cs")
-            with open("downloads/data.csv", "w", encoding="utf-8") as f:
-                f.write(response.text)  # write the data to a csv file
+        if self.streaming:
+            if self.panel is None:
+                self._read_panel(use_cache)
+        else:
+            self._read_frame(use_cache)
+        return True
 
-        if self.df is None:
-            print("reading data file into pandas dataframe...")
-            self.df = pd.read_csv(
-                "downloads/data.csv"
-            )  # read the data into a pandas dataframe
-            aggregated_columns = (
-                "Caribbean",
-                "Central Africa",
-                "Central African Republic",
-                "Central America",
-                "Central Asia",
-                "Central Europe",
-                "Czechoslovakia",
-                "Developed Asia",
-                "Developed countries",
-                "Former Soviet Union",
-                "High income",
-                "Horn of Africa",
-                "Latin America and the Caribbean",
-                "Least developed countries",
-                "Low income",
-                "Lower-middle income",
-                "North Africa",
-                "Northeast Asia",
-                "Northern Europe",
-                "South Asia",
-                "Southeast Asia",
-                "Southern Africa",
-                "Southern Europe",
-                "Sub-Saharan Africa",
-                "Upper-middle income",
-                "West Africa",
-                "West Asia",
-                "Western Europe",
-                "World",
-                "Yugoslavia",
-            )
-            self.df = self.df[~self.df["Entity"].isin(aggregated_columns)]
+    def _read_geographical(self, use_cache: bool) -> None:
+        """
+        Reads the naturalearth_lowres geometries of geopandas into `self.df_geographical`, from
+        the geometry cache if it is up to date (see `get_data`).
+
+        Parameters:
+            use_cache: bool, if True the geometries are read from and written to the cache.
 
-        if os.path.exists(
-            "downloads/data_geographical.csv"
-        ):  # check if the data file exists
-            print("data_geographical file already exists")
+        Returns:
+            None
+        """
+        self.profiler.phase("load")
+        import geopandas as gpd
+
+        path = gpd.datasets.get_path("naturalearth_lowres")
+        checksum = _file_checksum(path)
+
+        def read():
+            geographical = None
+            if use_cache:
+                geographical = _read_geometry_cache(GEOMETRY_CACHE_DIR, checksum)
+                if geographical is not None:
+                    print("read data_geographical from geometry cache")
+
+            if geographical is None:
+                print("reading data_geographical file into pandas geo dataframe...")
+                geographical = gpd.read_file(path)
+                if use_cache:
+                    print("writing geometry cache into downloads/geometry_cache...")
+                    _write_geometry_cache(geographical, GEOMETRY_CACHE_DIR, checksum)
+            return geographical
+
+        # The geometries cannot be memory-mapped, the shared objects of a process share one copy
+        if self.shared:
+            self.df_geographical = shared_object(("geographical", checksum), read)
         else:
-            print("downloading data_geographical file...")
-            df_geographical = gpd.read_file(
-                gpd.datasets.get_path("naturalearth_lowres")
-            )
-            df_geographical.to_csv("downloads/data_geographical.csv")
+            self.df_geographical = read()
 
-        if self.df_geographical is None:
-            print("reading data_geographical file into pandas geo dataframe...")
-            self.df_geographical = gpd.read_file(
-                gpd.datasets.get_path("naturalearth_lowres")
-            )
+    def _needs_data(self, geographical: bool = False) -> bool:
+        """
+        Returns whether a method has to call `get_data` before reading the data: if the data is
+        not loaded or still loading in the background (see `prefetch`).
 
-    def get_countries(self) -> list:
+        Parameters:
+            geographical: bool, if True the geographical data is needed as well.
+
+        Returns:
+            bool: True if `get_data` has to be called.
         """
-        Returns a list of available countries in the dataset.
+        if "data" in self._pending or (self.df is None and self.panel is None):
+            return True
+        return geographical and ("geographical" in self._pending or self.df_geographical is None)
 
-        If the dataframe is not available, the method will first call the `get_data` method to
-        download and read the dataset into the `df` attribute. Then it returns a list of unique
-        countries in the 'Entity' column.
+    def ready(self, part: Optional[str] = None) -> bool:
+        """
+        Returns whether the data is loaded, without waiting for the background load.
 
         Parameters:
-            None
+            part: str, optional, "data" (the tabular data) or "geographical", both if None.
 
         Raises:
-            None
+            ValueError: If `part` is not "data", "geographical" or None
 
         Returns:
-            list: A list of unique countries in the dataset.
+            bool: True if the data is loaded.
 
         Example usage:
-            my_object = Group01("my_object")
-            my_object.get_countries() # Output: ['Afghanistan', 'Albania', 'Algeria'...]
-
+            my_object = Group01("my_object", prefetch=True)
+            my_object.ready("data")
         """
-        if self.df is None:
-            self.get_data()  # check if df is available
-        # return all countries in a list
-        return self.df["Entity"].unique().tolist()
-
-    def plot_quantity(self) -> None:
+        parts = self._parts(part)
+        for name in parts:
+            future = self._pending.get(name)
+            if future is not None and (not future.done() or future.exception() is not None):
+                return False
+        loaded = {
+            "data": self.df is not None or self.panel is not None,
+            "geographical": self.df_geographical is not None,
+        }
+        return all(loaded[name] for name in parts)
+
+    def wait(self, part: Optional[str] = None, timeout: Optional[float] = None) -> bool:
         """
-        Plots a heatmap of the correlation between all the columns in the Pandas DataFrame that end
-        with the string '_quantity'.
+        Waits until the background load of the data started by `prefetch` is finished.
 
-        If the DataFrame does not exist as an attribute of the class instance, the method calls the
-        'get_data()' method to obtain the data.
+        Parameters:
+            part: str, optional, "data" (the tabular data) or "geographical", both if None.
+            timeout: float, optional, the maximum time to wait in seconds, no limit if None.
+
+        Raises:
+            ValueError: If `part` is not "data", "geographical" or None
+            Exception: The error of the background load, if it failed
 
-        The method creates an empty list called 'plotted_columns', and loops through each column in
-        the DataFrame, checking if the column name ends with the string '_quantity'. If a column
-        name ends with '_quantity', the name is appended to the 'plotted_columns' list.
+        Returns:
+            bool: True if the data is loaded, False if it is not, or the timeout expired first.
 
-        Finally, the method calls the 'heatmap()' function from the seaborn library on the
-        'plotted_columns' data in the DataFrame, and displays the lower triangle
-        heatmap plot using 'plt.show()'.
+        Example usage:
+            my_object = Group01("my_object", prefetch=True)
+            my_object.wait(timeout=60)
+        """
+        from concurrent.futures import wait
+
+        futures = [self._pending[name] for name in self._parts(part) if name in self._pending]
+        if wait(futures, timeout=timeout).not_done:
+            return False
+        for future in futures:
+            future.result()
+        return self.ready(part)
+
+    async def wait_async(self, part: Optional[str] = None) -> bool:
+        """
+        Awaitable version of `wait`, which does not block the event loop of a service.
 
         Parameters:
-            None
+            part: str, optional, "data" (the tabular data) or "geographical", both if None.
 
         Raises:
-            None
+            ValueError: If `part` is not "data", "geographical" or None
+            Exception: The error of the background load, if it failed
 
         Returns:
-            None
+            bool: True if the data is loaded.
 
         Example usage:
-            my_object = Group01("my_object")
-            my_object.plot_quantity()
+            my_object = Group01("my_object", prefetch=True)
+            await my_object.wait_async("data")
         """
-        # Check if self.df exists
-        if self.df is None:
-            self.get_data()
-
-        plotted_columns = []
-
-        # Loop through each column in the DataFrame
-        for column in self.df.columns:
-            # Check if the column name ends with '_quantity'
-            if column.endswith("_quantity"):
-                # Append the column name to the plotted_columns list
-                plotted_columns.append(column)
-
-        # Set the plot size and font scale
-        plt.figure(figsize=(10, 8))
-        sns.set(font_scale=1.2)
-
-        # Getting the lower Triangle of the correlation matrix
-        matrix = np.triu(self.df[plotted_columns].corr())
-
-        # Create a correlation heatmap with all columns from the plotted_columns list
-        sns.heatmap(
-            self.df[plotted_columns].corr(),
-            annot=True,
-            cmap="crest",
-            cbar_kws={"label": "Correlation Coefficient"},
-            mask=matrix,
-        )
+        import asyncio
 
-        # Set the plot title and show the plot
-        plt.title("Correlation between Quantity Columns")
-        # Add the source of the data as a subtitle
-        fig = plt.gcf()
-        fig.suptitle(
-            "Source: Agricultural total factor productivity (USDA), OWID",
-            fontsize=10,
-            y=-0.2,
-        )
-        # Show the plot
-        plt.show()
+        for name in self._parts(part):
+            future = self._pending.get(name)
+            if future is not None:
+                await asyncio.wrap_future(future)
+        return self.ready(part)
 
-    def plot_area_chart(
-        self,
-        country: Optional[str] = None,
-        normalize: bool = False,
-        optional: Optional[str] = None,
-    ) -> None:
+    @staticmethod
+    def _parts(part: Optional[str]) -> tuple:
         """
-        Plots an area chart of the distinct "_output_" columns for the given country or all
-        countries if `country` is set to "World" or None. The columns are normalized by the total
-        output if the `normalize` parameter is set to True.
-
-        If the dataframe is not available, the method will first call the `get_data` method to
-        download and read the dataset into the `df` attribute.
+        Returns the parts of the data named by the `part` argument of `ready` and `wait`.
 
         Parameters:
-        country (str, optional):
-            The country to plot the data for. If set to "World" or None,
-            the data for all countries will be plotted.
-
-        normalize : bool
-            If set to True, the data will be normalized by the total output.
+            part: str, optional, "data", "geographical" or None for both.
 
         Raises:
-            TypeError: If the `country` parameter is not a string or the `normalize`
-            parameter is not a bool
+            ValueError: If `part` is not "data", "geographical" or None
 
-            Exception: If one or less columns with the "_output_" suffix are available or if the
-            given country does not exist
+        Returns:
+            tuple: The names of the parts.
+        """
+        if part is None:
+            return ("data", "geographical")
+        if part not in ("data", "geographical"):
+            raise ValueError(f'part must be "data", "geographical" or None, not {part!r}')
+        return (part,)
+
+    def prefetch(self, use_cache: bool = True) -> None:
+        """
+        Starts loading the tabular data and the geographical data in two background threads.
+        The methods that need the data wait for the background load of the part they use, so
+        the tabular methods do not wait for the geometries; the first one raises the error of
+        a failed load. Called by the constructor with `prefetch=True`.
+
+        Parameters:
+            use_cache: bool, if True the data is read from and written to the caches.
 
         Returns:
             None
 
         Example usage:
             my_object = Group01("my_object")
-            my_object.plot_area_chart("World", True)
+            my_object.prefetch()
+            my_object.get_countries()  # waits for the tabular data only
         """
+        from concurrent.futures import ThreadPoolExecutor
 
-        if country is not None and not isinstance(country, str):
-            raise TypeError("country is not a string, Please pass a string")
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"prefetch-{self.name}")
+        if "data" not in self._pending and self.df is None and self.panel is None:
+            self._pending["data"] = executor.submit(self._load_data, use_cache)
+        if "geographical" not in self._pending and self.df_geographical is None:
+            self._pending["geographical"] = executor.submit(self._read_geographical, use_cache)
+        # The threads finish the submitted loads and exit
+        executor.shutdown(wait=False)
 
-        if not isinstance(normalize, bool):
-            raise TypeError("normalize is not a bool, Please pass a bool")
+    def _read_frame(self, use_cache: bool) -> None:
+        """
+        Reads `self.data_file` into `self.df`, from the columnar cache if it is up to date, and
+        builds its index (see `get_data`). In shared mode, `self.df` is read from the shared
+        dataset of the data file, which is published first if it is missing or outdated.
+
+        Parameters:
+            use_cache: bool, if True the data is read from and written to the columnar cache.
+
+        Raises:
+            FileNotFoundError: If a directory `data_file` is not a columnar data file
+
+        Returns:
+            None
+        """
+        publish = False
+        if self.df is None and self.shared:
+            store_dir, store_checksum = self._shared_store()
+            dataset = shared_dataset(store_dir, store_checksum)
+            if dataset is not None:
+                print("read data from shared dataset")
+                self.df = dataset.frame()
+                self._column_order = dataset.columns
+                self._build_index()
+            publish = dataset is None
+
+        if self.df is None and os.path.isdir(self.data_file):
+            print("reading columnar data file...")
+            self.df = _read_column_cache(self.data_file, None)
+            if self.df is None:
+                raise FileNotFoundError(f"{self.data_file} is not a columnar data file")
+
+        cache_dir = self._cache_dir()
+
+        if self.df is None and use_cache:
+            checksum = _file_checksum(self.data_file)
+            self.df = _read_column_cache(cache_dir, checksum)
+            if self.df is not None:
+                print("read data from column cache")
 
         if self.df is None:
-            self.get_data()
+            print("reading data file into pandas dataframe...")
+            self.df = pd.read_csv(self.data_file)  # read the data into a pandas dataframe
+            self.df = self.df[~self.df["Entity"].isin(AGGREGATED_ENTITIES)]
 
-        # Get all columns with "_quantity" suffix and check if there are enough columns
-        column_names = self.df.columns.tolist()
-        df_subset = [c for c in column_names if "_output_" in c]
-        df_subset.append("Year")
-        if len(df_subset) < 2:
-            raise Exception("Not enough columns with '_output' suffix")
+            if use_cache:
+                print(f"writing column cache into {cache_dir}...")
+                _write_column_cache(self.df, cache_dir, checksum)
 
-        # Plotting function
-        def country_plot(df_temp):
-            norm = ""
-            if normalize:
-                df_temp["Total"] = (df_temp.iloc[:, :-1]).sum(axis=1)
-                df_temp.iloc[:, :-2] = (
-                    df_temp.iloc[:, :-2].div(df_temp.Total, axis=0) * 100
-                )
-                norm = "% (Normalized)"
-            list_outputs = []
-            list_labels = []
-            for each in df_subset[:-1]:
-                list_outputs.append(df_temp[each])
+        if self.compact and self._indexed_df is not self.df:
+            self.df = _compact_frame(self.df)
+
+        if self._indexed_df is not self.df:
+            self.profiler.phase("index")
+            self._build_index()
+
+        if publish:
+            # Published in the order of the index, so the views never need to be sorted
+            print(f"publishing shared dataset into {store_dir}...")
+            dataset = shared_dataset(store_dir, store_checksum, df=self.df)
+            self.df = dataset.frame()
+            self._column_order = dataset.columns
+            self._build_index()
+
+    def _shared_store(self) -> tuple:
+        """
+        Returns the shared dataset directory of `self.data_file` and the checksum of its
+        source, see `_read_frame`. The compact data is shared in its own directory.
+
+        Parameters:
+            None
+
+        Returns:
+            tuple: The directory and the checksum.
+        """
+        key = f"{os.path.abspath(self.data_file)}|{'compact' if self.compact else 'default'}"
+        store_dir = os.path.join(SHARED_DIR, hashlib.sha256(key.encode()).hexdigest()[:16])
+        source = self.data_file
+        if os.path.isdir(source):
+            source = os.path.join(source, "manifest.json")
+        return store_dir, _file_checksum(source)
+
+    def _cache_dir(self) -> str:
+        """
+        Returns the column cache directory of `self.data_file`. Other CSV files than the
+        downloaded one are cached in their own directory, so they do not evict each other.
+
+        Parameters:
+            None
+
+        Returns:
+            str: The cache directory.
+        """
+        if self.data_file == DATA_FILE:
+            return CACHE_DIR
+        path_hash = hashlib.sha256(os.path.abspath(self.data_file).encode("utf-8")).hexdigest()
+        return os.path.join(CACHE_DIR, path_hash[:16])
+
+    def _read_panel(self, use_cache: bool) -> None:
+        """
+        Reads `self.data_file` into `self.panel` in chunks, with the aggregates filtered out,
+        or opens the panel already built from it (see `StreamingPanel`). The panels are stored
+        in downloads/stream, one directory per data file.
+
+        Parameters:
+            use_cache: bool, if True a panel built from the same version of the file is reused.
+
+        Raises:
+            ValueError: If `data_file` is a columnar directory, which is memory-mapped already
+
+        Returns:
+            None
+        """
+        if os.path.isdir(self.data_file):
+            raise ValueError("streaming mode reads CSV files, columnar data files are memory-mapped already")
+        path_hash = hashlib.sha256(os.path.abspath(self.data_file).encode("utf-8")).hexdigest()
+        store_dir = os.path.join(STREAM_DIR, path_hash[:16])
+        checksum = _file_checksum(self.data_file)
+        if use_cache:
+            self.panel = StreamingPanel.open(store_dir, checksum)
+            if self.panel is not None:
+                print("read data from streaming panel")
+        if self.panel is None:
+            print(f"reading data file into streaming panel {store_dir}...")
+            self.panel = StreamingPanel.build(
+                self.data_file, store_dir, checksum, exclude=AGGREGATED_ENTITIES
+            )
+        self._countries = list(self.panel.entities)
+        self._country_set = self.panel.entity_set
+
+    @profiled
+    def refresh(self, url: str = DATA_URL, use_cache: bool = True) -> dict:
+        """
+        Refreshes the data file from `url` and updates the loaded data in place of downloading
+        and reloading everything.
+
+        The request is conditional: it sends the ETag and Last-Modified of the previous download,
+        and nothing else happens if the server answers 304 Not Modified. Otherwise the new file
+        replaces the data file and is compared with the loaded data by (Entity, Year), and only
+        what the added, removed and changed rows affect is updated:
+
+        - the rows of `self.df`; the Entity/Year index is kept when only values changed.
+        - the cube of `get_cube`, whose changed cells and world totals are patched.
+        - the cached correlations whose countries and years contain a changed '_quantity' value.
+        - the join with the geometries, only rebuilt if the countries changed.
+
+        The cached forecasts are keyed by the tfp series, so only the countries whose series
+        changed are fitted again. In streaming mode, the panel is read again from the new file.
+
+        Parameters:
+            url : str, optional
+                The URL of the CSV file, the source of `get_data` by default.
+            use_cache : bool, optional (default=True)
+                If True, the column cache (or the streaming panel) is updated as well.
+
+        Raises:
+            requests.exceptions.RequestException: If the download fails
+
+        Returns:
+            dict: "status" ("not modified", "unchanged" or "updated"), the numbers of
+            "added", "removed" and "changed" rows (None in streaming mode) and the
+            affected "countries".
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.get_data()
+            my_object.refresh()
+        """
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(use_cache=use_cache, geographical=False)
+
+        # The data file is replaced atomically, with the validators of the new version
+        if not self._loader().download(url, self.data_file):
+            return {"status": "not modified", "added": 0, "removed": 0, "changed": 0, "countries": []}
+
+        if self.streaming:
+            self.panel = None
+            self._read_panel(use_cache)
+            self.profiler.phase("compute")
+            self._correlations = {}
+            self._correlations_df = self.panel
+            return {"status": "updated", "added": None, "removed": None, "changed": None,
+                    "countries": list(self._countries)}
+
+        new = pd.read_csv(self.data_file)
+        new = new[~new["Entity"].isin(AGGREGATED_ENTITIES)].reset_index(drop=True)
+        self.profiler.phase("compute")
+        if self.compact:
+            new = _compact_frame(new)
+        elif self.shared:
+            new["Entity"] = new["Entity"].astype("category")
+        if self.shared and set(new.columns) == set(self.df.columns):
+            # The new rows are a private copy of this object, in the column order of the view
+            new = new[self.df.columns]
+        summary = self._apply_rows(new)
+        if use_cache:
+            df = _expand_frame(self.df) if self.compact or self.shared else self.df
+            _write_column_cache(df, self._cache_dir(), _file_checksum(self.data_file))
+        return summary
+
+    def _apply_rows(self, new: pd.DataFrame) -> dict:
+        """
+        Updates `self.df` and the cached results derived from it to the new version `new` of
+        the data, see `refresh`.
+
+        Parameters:
+            new: pandas.DataFrame, the new (already filtered) data.
+
+        Returns:
+            dict: The summary returned by `refresh`.
+        """
+        old = self.df
+        try:
+            old_keys = pd.MultiIndex.from_arrays([old["Entity"].to_numpy(), old["Year"].to_numpy()])
+            new_keys = pd.MultiIndex.from_arrays([new["Entity"].to_numpy(), new["Year"].to_numpy()])
+            positions = old_keys.get_indexer(new_keys)
+        except pd.errors.InvalidIndexError:
+            positions = None
+        if positions is None or list(new.columns) != list(old.columns):
+            # Duplicated (Entity, Year) keys or other columns: replace everything
+            self.df = new
+            self._build_index()
+            return {"status": "updated", "added": len(new), "removed": len(old),
+                    "changed": 0, "countries": list(self._countries)}
+
+        matched = positions >= 0
+        added = np.flatnonzero(~matched)
+        removed = np.setdiff1d(np.arange(len(old)), positions[matched])
+        old_rows, new_rows = positions[matched], np.flatnonzero(matched)
+        values = [column for column in old.columns if column not in ("Entity", "Year")]
+        differs = np.zeros((len(old_rows), len(values)), dtype=bool)
+        for i, column in enumerate(values):
+            before = old[column].to_numpy()[old_rows]
+            after = new[column].to_numpy()[new_rows]
+            differs[:, i] = (before != after) & ~(pd.isna(before) & pd.isna(after))
+        changed = differs.any(axis=1)
+        old_rows, new_rows, differs = old_rows[changed], new_rows[changed], differs[changed]
+
+        if not len(added) and not len(removed) and not len(old_rows):
+            return {"status": "unchanged", "added": 0, "removed": 0, "changed": 0, "countries": []}
+
+        # The (Entity, Year) of every affected row, and whether a '_quantity' value changed
+        quantities = np.array([column.endswith("_quantity") for column in values])
+        affected = pd.concat(
+            [
+                new[["Entity", "Year"]].iloc[added],
+                old[["Entity", "Year"]].iloc[removed],
+                old[["Entity", "Year"]].iloc[old_rows[differs[:, quantities].any(axis=1)]],
+            ]
+        )
+        countries = sorted(
+            set(new["Entity"].iloc[added])
+            | set(old["Entity"].iloc[removed])
+            | set(old["Entity"].iloc[old_rows])
+        )
+
+        old_countries = self._country_set
+        cube = self._cube if self._cube_df is old else None
+        geo_join = self._geo_join if self._geo_join_df is old else None
+        if not len(added) and not len(removed):
+            # Only values changed: patch the changed rows, the index stays valid
+            df = old.copy()
+            for column in values:
+                column_values = df[column].to_numpy(copy=True)
+                update = new[column].to_numpy()[new_rows]
+                if not np.can_cast(update.dtype, column_values.dtype):
+                    column_values = column_values.astype(np.result_type(column_values, update))
+                column_values[old_rows] = update
+                df[column] = column_values
+            self.df = df
+            self._indexed_df = df
+            if cube is not None:
+                year_axis = np.array([cube.year_positions[int(year)] for year in old["Year"].to_numpy()[old_rows]])
+                entity_axis = np.array([cube.entity_positions[entity] for entity in old["Entity"].to_numpy()[old_rows]])
+                cube_values = cube.values.copy()
+                cube_values[year_axis, entity_axis] = df[cube.metrics].to_numpy(dtype=float)[old_rows]
+                world = cube.world.copy()
+                years = np.unique(year_axis)
+                world[years] = np.nansum(cube_values[years], axis=1)
+                self._cube = cube._replace(values=cube_values, world=world)
+                self._cube_df = df
+        else:
+            self.df = new
+            self._build_index()
+        if geo_join is not None and self._country_set == old_countries:
+            self._geo_join_df = self.df
+
+        # Keep the correlations that no affected row falls into
+        kept = {}
+        for key, result in self._correlations.items():
+            years, selected, _ = key
+            rows = affected
+            if selected is not None:
+                rows = rows[rows["Entity"].isin(selected)]
+            if years is not None:
+                rows = rows[rows["Year"].between(*years)]
+            if rows.empty:
+                kept[key] = result
+        self._correlations = kept
+        self._correlations_df = self.df
+
+        return {"status": "updated", "added": len(added), "removed": len(removed),
+                "changed": len(old_rows), "countries": countries}
+
+    def _loader(self) -> DatasetLoader:
+        """
+        Returns the loader of the object, created on first use, whose session is shared by all
+        downloads of the object.
+
+        Parameters:
+            None
+
+        Returns:
+            DatasetLoader: The loader.
+        """
+        if self.loader is None:
+            self.loader = DatasetLoader()
+        return self.loader
+
+    @profiled
+    def add_datasets(self, datasets: dict, use_cache: bool = True, refresh: bool = False) -> list:
+        """
+        Downloads other datasets with "Entity" and "Year" columns, like the fertilizer use, land
+        use or population datasets of Our World in Data, and registers them for `joined`.
+
+        The datasets are downloaded concurrently by `self.loader` into downloads/datasets, one
+        CSV file per dataset, and their numeric columns are read into `self.datasets`, indexed by
+        (Entity, Year). Like the data file, every dataset is cached column by column in
+        downloads/cache/datasets, so later loads skip the CSV parsing.
+
+        Parameters:
+            datasets : dict
+                The URL of every dataset by name, a valid file name.
+            use_cache : bool, optional (default=True)
+                If True, the datasets already downloaded are not downloaded again and the column
+                cache is used.
+            refresh : bool, optional (default=False)
+                If True, the datasets already downloaded are downloaded again if they changed,
+                with conditional requests.
+
+        Raises:
+            ValueError: If a name is not a valid file name, or a dataset has no "Entity" and
+                "Year" columns or several rows with the same (Entity, Year)
+            requests.exceptions.RequestException: If a download fails
+
+        Returns:
+            list: The names of the registered datasets.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.add_datasets({"population": "https://example.org/population.csv"})
+            my_object.joined()
+        """
+        self.profiler.phase("load")
+        paths = self._loader().fetch(datasets, use_cache=use_cache, refresh=refresh)
+
+        frames = {}
+        for name, path in paths.items():
+            cache_dir = os.path.join(CACHE_DIR, "datasets", name)
+            frame = None
+            if use_cache:
+                checksum = _file_checksum(path)
+                frame = _read_column_cache(cache_dir, checksum)
+            if frame is None:
+                frame = pd.read_csv(path)
+                if "Entity" not in frame.columns or "Year" not in frame.columns:
+                    raise ValueError(f"the dataset {name} has no Entity and Year columns")
+                # Only the numeric columns are joined, string columns like Code are dropped
+                frame = frame[
+                    ["Entity", "Year"]
+                    + [
+                        column
+                        for column in frame.columns
+                        if column not in ("Entity", "Year")
+                        and pd.api.types.is_numeric_dtype(frame[column])
+                    ]
+                ]
+                if use_cache:
+                    _write_column_cache(frame, cache_dir, checksum)
+
+            self.profiler.phase("index")
+            frame = frame.set_index(["Entity", "Year"])
+            if not frame.index.is_unique:
+                raise ValueError(f"the dataset {name} has several rows with the same Entity and Year")
+            frames[name] = frame.sort_index()
+            self.profiler.phase("load")
+
+        self.datasets.update(frames)
+        self._joined = {}
+        return list(paths)
+
+    @profiled
+    def joined(self, names: Optional[list] = None) -> pd.DataFrame:
+        """
+        Returns the data joined with the datasets registered by `add_datasets` on (Entity, Year).
+        Every row of the data is kept, with missing values where a dataset has no row. A column
+        of a dataset with the name of an existing column is suffixed with "_<dataset name>". The
+        result is cached until the data or the datasets change.
+
+        Parameters:
+            names : list, optional
+                The datasets to join, in this order, all registered datasets if None.
+
+        Raises:
+            ValueError: In streaming mode, or if a dataset is not registered
+
+        Returns:
+            pandas.DataFrame: The data with the columns of the datasets, with the index of
+            the data.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.add_datasets({"population": "https://example.org/population.csv"})
+            my_object.joined(["population"])
+        """
+        if self.streaming:
+            raise ValueError("joined needs the data in memory, it cannot be used in streaming mode")
+        names = list(self.datasets) if names is None else list(names)
+        for name in names:
+            if name not in self.datasets:
+                raise ValueError(f"{name} is not a registered dataset")
+        if self._needs_data():
+            self.profiler.phase("load")
+            self.get_data(geographical=False)
+            self.profiler.phase("compute")
+
+        if self._joined_df is not self.df:
+            self._joined = {}
+            self._joined_df = self.df
+        key = tuple(names)
+        if key not in self._joined:
+            self.profiler.phase("compute")
+            result = self.df
+            keys = pd.MultiIndex.from_arrays([self.df["Entity"], self.df["Year"]])
+            for name in names:
+                values = self.datasets[name].reindex(keys)
+                values.index = self.df.index
+                values.columns = [
+                    f"{column}_{name}" if column in result.columns else column
+                    for column in values.columns
+                ]
+                result = pd.concat([result, values], axis=1)
+            self._joined[key] = result
+        return self._joined[key]
+
+    def _build_index(self) -> None:
+        """
+        Builds the Entity and Year index of `self.df`, so that methods can slice the rows of
+        one country or one year without scanning the whole DataFrame.
+
+        The rows of each entity are a contiguous range of `self.df` (the DataFrame is sorted by
+        Entity if they are not). The rows of each year are a contiguous range of
+        `self._year_order`, the row positions sorted by Year. The list and the set of available
+        countries are cached as well.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+
+        def ranges(values):
+            # Start and stop positions of the runs of equal values
+            change = np.flatnonzero(values[1:] != values[:-1]) + 1
+            starts = np.concatenate(([0], change)) if len(values) else change
+            stops = np.concatenate((change, [len(values)]))
+            return values[starts], starts, stops
+
+        entities, starts, stops = ranges(self.df["Entity"].to_numpy())
+        if len(set(entities)) != len(entities):
+            self.df = self.df.sort_values("Entity", kind="stable")
+            entities, starts, stops = ranges(self.df["Entity"].to_numpy())
+        self._entity_index = {
+            entity: (start, stop) for entity, start, stop in zip(entities, starts, stops)
+        }
+        self._countries = entities.tolist()
+        self._country_set = frozenset(self._countries)
+
+        years = self.df["Year"].to_numpy()
+        self._year_order = np.argsort(years, kind="stable")
+        year_values, starts, stops = ranges(years[self._year_order])
+        self._year_index = {
+            int(year): (start, stop) for year, start, stop in zip(year_values, starts, stops)
+        }
+        self._indexed_df = self.df
+
+    def _entity_rows(self, country: str) -> pd.DataFrame:
+        """
+        Returns the rows of `self.df` for the given country, using the Entity index, or the rows
+        read from `self.panel` in streaming mode.
+
+        Parameters:
+            country: str, a country in the dataset.
+
+        Returns:
+            pandas.DataFrame: The rows of the country, in the order of `self.df`.
+        """
+        if self.panel is not None:
+            return self.panel.entity_rows(country)
+        if self._indexed_df is not self.df:
+            self._build_index()
+        start, stop = self._entity_index[country]
+        return self.df.iloc[start:stop]
+
+    def _year_rows(self, year: int) -> pd.DataFrame:
+        """
+        Returns the rows of `self.df` for the given year, using the Year index, or the rows
+        read from `self.panel` in streaming mode.
+
+        Parameters:
+            year: int, a year in the dataset.
+
+        Returns:
+            pandas.DataFrame: The rows of the year, in the order of `self.df`.
+        """
+        if self.panel is not None:
+            return self.panel.year_rows(year)
+        if self._indexed_df is not self.df:
+            self._build_index()
+        start, stop = self._year_index[year]
+        return self.df.iloc[self._year_order[start:stop]]
+
+    @profiled
+    def get_cube(self) -> PanelCube:
+        """
+        Returns the dataset as a dense Year x Entity x metric float array, with NaN for missing
+        cells, together with its axis labels and the world total of every metric per year.
+
+        The cube is built once per loaded DataFrame. It is small (about 60 years x 170 entities
+        x 21 metrics), and lets numeric code take any slice without pandas overhead.
+
+        Parameters:
+            None
+
+        Raises:
+            ValueError: In streaming mode, where the data is not loaded into memory
+
+        Returns:
+            PanelCube: The cube, see `PanelCube`.
+
+        Example usage:
+            my_object = Group01("my_object")
+            cube = my_object.get_cube()
+            cube.values[:, cube.entity_positions["Germany"], cube.metric_positions["tfp"]]
+        """
+        if self.streaming:
+            raise ValueError("get_cube needs the data in memory, it is not available in streaming mode")
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(geographical=False)  # check if df is available
+        self.profiler.phase("compute")
+        if self._indexed_df is not self.df:
+            self._build_index()
+        if self._cube is not None and self._cube_df is self.df:
+            return self._cube
+
+        years = np.array(sorted(self._year_index))
+        metrics = [
+            column
+            for column in self._columns()
+            if column not in ("Entity", "Year") and pd.api.types.is_numeric_dtype(self.df[column])
+        ]
+        # The rows of each entity are contiguous in the order of self._countries
+        lengths = [stop - start for start, stop in self._entity_index.values()]
+        entity_axis = np.repeat(np.arange(len(self._countries)), lengths)
+        year_axis = np.searchsorted(years, self.df["Year"].to_numpy())
+
+        values = np.full((len(years), len(self._countries), len(metrics)), np.nan)
+        values[year_axis, entity_axis] = self.df[metrics].to_numpy(dtype=float)
+        present = np.zeros((len(years), len(self._countries)), dtype=bool)
+        present[year_axis, entity_axis] = True
+
+        self._cube = PanelCube(
+            values=values,
+            present=present,
+            world=np.nansum(values, axis=1),
+            years=years,
+            entities=list(self._countries),
+            metrics=metrics,
+            year_positions={int(year): i for i, year in enumerate(years)},
+            entity_positions={entity: i for i, entity in enumerate(self._countries)},
+            metric_positions={metric: i for i, metric in enumerate(metrics)},
+        )
+        self._cube_df = self.df
+        return self._cube
+
+    def get_regions(self) -> list:
+        """
+        Returns the regions of `self.regions`, whose aggregates are rebuilt from their countries
+        (see `get_rollup`). A region can be passed to `plot_area_chart`, `plot_country_chart`
+        and `predictor` like a country, unless the dataset has an entity of the same name.
+
+        Parameters:
+            None
+
+        Returns:
+            list: The names of the regions.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.get_regions()  # Output: ['World', 'Africa', 'North Africa', ...]
+        """
+        return list(self.regions.regions)
+
+    @profiled
+    def get_rollup(self, weight: str = "output_quantity") -> RegionRollup:
+        """
+        Returns the sums and the weighted averages of every metric for every region of
+        `self.regions` and every year. They are computed from the cube by one product with the
+        sparse region x country membership matrix (see the `regions` module), and cached until
+        the data or the regions change.
+
+        Parameters:
+            weight: str, the metric the averages are weighted by, the output quantity by default.
+
+        Raises:
+            ValueError: In streaming mode, or if `weight` is not a numeric column
+
+        Returns:
+            RegionRollup: The aggregates, see `regions.RegionRollup`.
+
+        Example usage:
+            my_object = Group01("my_object")
+            rollup = my_object.get_rollup()
+            rollup.averages[rollup.region_positions["West Asia"], :, rollup.metric_positions["tfp"]]
+        """
+        if self.streaming:
+            raise ValueError("get_rollup needs the data in memory, it is not available in streaming mode")
+        cube = self.get_cube()
+        self.profiler.phase("compute")
+        key = (cube, self.regions.version)
+        if self._rollups_key is None or self._rollups_key[0] is not cube or self._rollups_key[1] != key[1]:
+            self._rollups = {}
+            self._rollups_key = key
+        if weight not in self._rollups:
+            self._rollups[weight] = rollup(
+                self.regions, cube.values, cube.entities, cube.years, cube.metrics, weight
+            )
+        return self._rollups[weight]
+
+    def _is_region(self, name: str) -> bool:
+        """
+        Returns whether a name is a region and not an entity of the dataset. Regions are not
+        available in streaming mode.
+        """
+        return not self.streaming and name in self.regions and name not in self._available_countries()
+
+    def _region_frame(self, region: str, columns: list) -> pd.DataFrame:
+        """
+        Returns the given columns of a region like the rows of a country: the sums of its
+        countries for the '_quantity' columns and their averages weighted by the output
+        quantity for the others (indices like tfp).
+
+        Parameters:
+            region: str, a region of `self.regions`.
+            columns: list, the columns to return, "Year" and numeric columns.
+
+        Returns:
+            pandas.DataFrame: The years in which a country of the region has data, in
+            increasing order.
+        """
+        aggregates = self.get_rollup()
+        position = aggregates.region_positions[region]
+        rows = aggregates.counts[position].any(axis=1)
+        frame = {}
+        for column in columns:
+            if column == "Year":
+                frame[column] = aggregates.years[rows]
+                continue
+            if column in aggregates.metric_positions:
+                source = aggregates.sums if column.endswith("_quantity") else aggregates.averages
+                frame[column] = source[position, rows, aggregates.metric_positions[column]]
+            else:
+                derived = self._region_derived()
+                frame[column] = derived.values[rows, position, derived.column_positions[column]]
+        return pd.DataFrame(frame)
+
+    def _region_derived(self) -> DerivedMetrics:
+        """
+        Returns the derived metrics of the regions, with the CAGR window `self.cagr_window`,
+        derived from their sums of the '_quantity' columns and their weighted averages of the
+        others, and cached with the aggregates of `get_rollup`.
+        """
+        aggregates = self.get_rollup()
+        key = ("derived", self.cagr_window)
+        if key not in self._rollups:
+            quantities = np.array([metric.endswith("_quantity") for metric in aggregates.metrics])
+            values = np.where(quantities, aggregates.sums, aggregates.averages)
+            self._rollups[key] = derive(
+                values.transpose(1, 0, 2),
+                aggregates.years,
+                aggregates.regions,
+                aggregates.metrics,
+                self.cagr_window,
+            )
+        return self._rollups[key]
+
+    @profiled
+    def get_derived(self, window: Optional[int] = None) -> DerivedMetrics:
+        """
+        Returns the derived metrics of every entity and year: the growth over the previous year
+        and the compound annual growth rate over `window` years of every metric, and the
+        decomposition of the tfp growth into the contributions of output and of the land,
+        labor, capital and materials inputs (see the `derived` module). They are computed for
+        the whole cube at once and cached until the data changes.
+
+        The derived metrics with the window `self.cagr_window` can be used like columns of the
+        data by the plotting methods, e.g. `plot_country_chart(["Germany"], column="tfp_growth")`
+        or `choropleth(2000, column="tfp_cagr")`.
+
+        Parameters:
+            window: int, optional, the number of years of the compound annual growth rates,
+                `self.cagr_window` if None.
+
+        Raises:
+            ValueError: In streaming mode, or if `window` is not a positive integer
+
+        Returns:
+            DerivedMetrics: The derived metrics, see `derived.DerivedMetrics`.
+
+        Example usage:
+            my_object = Group01("my_object")
+            derived = my_object.get_derived(window=5)
+            derived.values[:, derived.entity_positions["Germany"], derived.column_positions["tfp_cagr"]]
+        """
+        if self.streaming:
+            raise ValueError("get_derived needs the data in memory, it is not available in streaming mode")
+        window = self.cagr_window if window is None else window
+        cube = self.get_cube()
+        self.profiler.phase("compute")
+        if self._derived_cube is not cube:
+            self._derived = {}
+            self._derived_cube = cube
+        if window not in self._derived:
+            self._derived[window] = derive(cube.values, cube.years, cube.entities, cube.metrics, window)
+        return self._derived[window]
+
+    def derived_frame(self, window: Optional[int] = None) -> pd.DataFrame:
+        """
+        Returns the derived metrics of `get_derived` as extra columns of the rows of `self.df`.
+
+        Parameters:
+            window: int, optional, the number of years of the compound annual growth rates,
+                `self.cagr_window` if None.
+
+        Raises:
+            ValueError: In streaming mode, or if `window` is not a positive integer
+
+        Returns:
+            pandas.DataFrame: The Entity, the Year and the derived metrics of every row of
+            `self.df`, with the same index.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.df.join(my_object.derived_frame().drop(columns=["Entity", "Year"]))
+        """
+        derived = self.get_derived(window)
+        frame = pd.DataFrame(
+            self._derived_values(
+                self.df["Year"].to_numpy(), self.df["Entity"].to_numpy(), derived.columns, derived
+            ),
+            index=self.df.index,
+            columns=derived.columns,
+        )
+        frame.insert(0, "Year", self.df["Year"].to_numpy())
+        frame.insert(0, "Entity", self.df["Entity"].to_numpy())
+        return frame
+
+    def _derived_columns(self) -> frozenset:
+        """
+        Returns the names of the derived metrics that can be read like columns, none in
+        streaming mode. A column of the data has precedence over a derived metric of the same
+        name.
+        """
+        if self.streaming or self.df is None:
+            return frozenset()
+        if self._derived_names[0] is not self.df:
+            metrics = [
+                column
+                for column in self._columns()
+                if column not in ("Entity", "Year") and pd.api.types.is_numeric_dtype(self.df[column])
+            ]
+            names = frozenset(derived_columns(metrics)) - set(self.df.columns)
+            self._derived_names = (self.df, names)
+        return self._derived_names[1]
+
+    def _derived_values(
+        self, years, entities, columns, derived: Optional[DerivedMetrics] = None
+    ) -> np.ndarray:
+        """
+        Returns the derived metrics of the given (year, entity) pairs.
+
+        Parameters:
+            years: the years, an array or a single year.
+            entities: the entities, an array or a single entity.
+            columns: a derived metric, or a list of derived metrics.
+            derived: DerivedMetrics, optional, the derived metrics to read, those of
+                `get_derived()` if None.
+
+        Returns:
+            numpy.ndarray: The values, with one more axis of the columns if `columns` is a list.
+        """
+        if derived is None:
+            derived = self.get_derived()
+        year_axis = np.searchsorted(derived.years, years)
+        if isinstance(entities, str):
+            entity_axis = derived.entity_positions[entities]
+        else:
+            entity_axis = np.array([derived.entity_positions[entity] for entity in entities], dtype=int)
+        if isinstance(columns, str):
+            return derived.values[year_axis, entity_axis, derived.column_positions[columns]]
+        positions = [derived.column_positions[column] for column in columns]
+        return derived.values[year_axis, entity_axis][..., positions]
+
+    def _entity_frame(self, country: str, columns: list) -> pd.DataFrame:
+        """
+        Returns the given columns of the rows of a country, read from the cube if `use_cube` is
+        set and through the Entity index otherwise.
+
+        Parameters:
+            country: str, a country in the dataset.
+            columns: list, the columns to return, "Year", numeric columns and derived metrics
+                (see `get_derived`).
+
+        Returns:
+            pandas.DataFrame: The rows of the country, in increasing Year order.
+        """
+        if self.panel is not None:
+            return self.panel.entity_rows(country, columns)
+        derived = [column for column in columns if column in self._derived_columns()]
+        if derived:
+            base = [column for column in columns if column not in derived]
+            frame = self._entity_frame(country, base if "Year" in base else base + ["Year"])
+            years = frame["Year"].to_numpy()
+            frame = frame.assign(
+                **{column: self._derived_values(years, country, column) for column in derived}
+            )
+            return frame[columns]
+        if not self.use_cube:
+            return self._entity_rows(country)[columns]
+        cube = self.get_cube()
+        position = cube.entity_positions[country]
+        rows = cube.present[:, position]
+        return pd.DataFrame(
+            {
+                column: cube.years[rows]
+                if column == "Year"
+                else cube.values[rows, position, cube.metric_positions[column]]
+                for column in columns
+            }
+        )
+
+    def _year_frame(self, year: int, columns: list) -> pd.DataFrame:
+        """
+        Returns the given columns of the rows of a year, read from the cube if `use_cube` is
+        set and through the Year index otherwise.
+
+        Parameters:
+            year: int, a year in the dataset.
+            columns: list, the columns to return, "Entity", numeric columns and derived metrics
+                (see `get_derived`).
+
+        Returns:
+            pandas.DataFrame: The rows of the year.
+        """
+        if self.panel is not None:
+            return self.panel.year_rows(year, columns)
+        derived = [column for column in columns if column in self._derived_columns()]
+        if derived:
+            base = [column for column in columns if column not in derived]
+            frame = self._year_frame(year, base if "Entity" in base else base + ["Entity"])
+            entities = frame["Entity"].to_numpy()
+            frame = frame.assign(
+                **{column: self._derived_values(year, entities, column) for column in derived}
+            )
+            return frame[columns]
+        if not self.use_cube:
+            return self._year_rows(year)[columns]
+        cube = self.get_cube()
+        position = cube.year_positions[year]
+        rows = cube.present[position]
+        return pd.DataFrame(
+            {
+                column: np.asarray(cube.entities, dtype=object)[rows]
+                if column == "Entity"
+                else cube.values[position, rows, cube.metric_positions[column]]
+                for column in columns
+            }
+        )
+
+    def _available_years(self):
+        """
+        Returns the years in the dataset, for fast membership checks.
+
+        Parameters:
+            None
+
+        Returns:
+            The years, a frozenset in streaming mode and the keys of the Year index otherwise.
+        """
+        if self.panel is not None:
+            return self.panel.year_set
+        if self._indexed_df is not self.df:
+            self._build_index()
+        return self._year_index.keys()
+
+    def _columns(self) -> list:
+        """
+        Returns the columns of the dataset, from `self.panel` in streaming mode, in the order of
+        the data file in shared mode as well.
+
+        Parameters:
+            None
+
+        Returns:
+            list: The column names.
+        """
+        if self.panel is not None:
+            return list(self.panel.columns)
+        columns = self.df.columns.tolist()
+        if self._column_order is not None and set(self._column_order) == set(columns):
+            # The shared data groups its columns by dtype, see `shared.SharedDataset.frame`
+            return list(self._column_order)
+        return columns
+
+    def _check_column(self, column: str) -> None:
+        """
+        Checks that `column` is a numeric column of the dataset or a derived metric of
+        `get_derived`.
+
+        Parameters:
+            column: str, the name of the column.
+
+        Raises:
+            ValueError: If it is neither
+
+        Returns:
+            None
+        """
+        if self.panel is not None:
+            metrics = self.panel.metrics
+        else:
+            metrics = [
+                name
+                for name in self._columns()
+                if name not in ("Entity", "Year") and pd.api.types.is_numeric_dtype(self.df[name])
+            ]
+        if column not in metrics and column not in self._derived_columns():
+            raise ValueError(f"{column!r} is not a numeric column or a derived metric")
+
+    def _source(self):
+        """
+        Returns the object holding the data, `self.panel` in streaming mode and `self.df`
+        otherwise. The cached results are keyed by its identity, so they are computed again
+        when the data is reloaded.
+        """
+        return self.panel if self.streaming else self.df
+
+    def _available_countries(self) -> frozenset:
+        """
+        Returns the cached set of available countries, for fast membership checks.
+
+        Parameters:
+            None
+
+        Returns:
+            frozenset: The countries in the dataset.
+        """
+        if self._indexed_df is not self.df:
+            self._build_index()
+        return self._country_set
+
+    @profiled
+    def get_countries(self) -> list:
+        """
+        Returns a list of available countries in the dataset.
+
+        If the dataframe is not available, the method will first call the `get_data` method to
+        download and read the dataset into the `df` attribute. Then it returns a list of unique
+        countries in the 'Entity' column.
+
+        Parameters:
+            None
+
+        Raises:
+            None
+
+        Returns:
+            list: A list of unique countries in the dataset.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.get_countries() # Output: ['Afghanistan', 'Albania', 'Algeria'...]
+
+        """
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(geographical=False)  # check if df is available
+        self.profiler.phase("compute")
+        if self._indexed_df is not self.df:
+            self._build_index()
+        # return all countries in a list
+        return list(self._countries)
+
+    @profiled
+    def memory_report(self) -> pd.DataFrame:
+        """
+        Returns the memory used by every column of `self.df` with the default dtypes of
+        `pandas.read_csv` and in compact mode (see `get_data`), whichever mode the object is in.
+
+        Parameters:
+            None
+
+        Raises:
+            ValueError: In streaming mode, where the data is not in memory
+
+        Returns:
+            pandas.DataFrame: The "dtype", "bytes", "compact_dtype" and "compact_bytes" of every
+            column, and of the index, with a last "Total" row.
+
+        Example usage:
+            my_object = Group01("my_object", compact=True)
+            my_object.memory_report()
+        """
+        if self.streaming:
+            raise ValueError("memory_report needs the data in memory, it cannot be used in streaming mode")
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(geographical=False)
+        self.profiler.phase("compute")
+
+        default = _expand_frame(self.df) if self.compact or self.shared else self.df
+        compact = self.df if self.compact else _compact_frame(self.df)
+        report = pd.DataFrame(
+            {
+                "dtype": default.dtypes.astype(str),
+                "bytes": default.memory_usage(deep=True).drop("Index"),
+                "compact_dtype": compact.dtypes.astype(str),
+                "compact_bytes": compact.memory_usage(deep=True).drop("Index"),
+            }
+        )
+        report.loc["Index"] = [str(default.index.dtype), default.index.memory_usage(deep=True),
+                               str(compact.index.dtype), compact.index.memory_usage(deep=True)]
+        report.loc["Total"] = ["", report["bytes"].sum(), "", report["compact_bytes"].sum()]
+        return report
+
+    def _new_figure(self, output: Optional[str] = None, **kwargs) -> "Figure":
+        """
+        Creates the figure of a plotting method.
+
+        When the plot is shown (no `output` and not `headless`), the figure is a pyplot figure.
+        Otherwise it is a plain matplotlib Figure with an Agg canvas, which is not registered in
+        pyplot, so it uses no global state and is garbage collected like any other object.
+
+        Parameters:
+            output: str, optional, the `output` argument of the plotting method.
+            **kwargs: keyword arguments of the Figure, like figsize or dpi.
+
+        Returns:
+            matplotlib.figure.Figure: The new figure.
+        """
+        self.profiler.phase("render")
+        if output is None and not self.headless:
+            from matplotlib import pyplot as plt
+
+            return plt.figure(**kwargs)
+
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        fig = Figure(**kwargs)
+        FigureCanvasAgg(fig)
+        return fig
+
+    @staticmethod
+    def _check_output(output: Optional[str]) -> None:
+        """
+        Checks the `output` argument of a plotting method.
+
+        Parameters:
+            output: str, optional, None, "figure", "png", "svg" or a path ending with .png or .svg.
+
+        Raises:
+            TypeError: If `output` is not a string or None
+            ValueError: If `output` is not a supported output
+
+        Returns:
+            None
+        """
+        if output is None:
+            return
+        if not isinstance(output, str):
+            raise TypeError("output is not a string, Please pass a string")
+        if output not in ("figure", "png", "svg") and not output.endswith((".png", ".svg")):
+            raise ValueError("output must be 'figure', 'png', 'svg' or a .png/.svg path")
+
+    def _render(
+        self, fig: "Figure", output: Optional[str] = None
+    ) -> Union[None, "Figure", bytes, str]:
+        """
+        Finishes a plotting method: shows the figure, returns it or writes it as an image.
+
+        Parameters:
+            fig: matplotlib.figure.Figure, a figure created by `_new_figure`.
+            output: str, optional
+                None: show the figure with pyplot and return None, or return the figure if the
+                object is `headless`.
+                "figure": return the figure.
+                "png" or "svg": return the image as bytes.
+                a path ending with .png or .svg: write the image into the file and return the path.
+
+        Returns:
+            None, matplotlib.figure.Figure, bytes or str, see `output`.
+        """
+        if output is None and not self.headless:
+            from matplotlib import pyplot as plt
+
+            plt.show()
+            return None
+        if output in (None, "figure"):
+            return fig
+        # The sources are written below the axes, tight bounding boxes keep them in the image
+        if output in ("png", "svg"):
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=output, bbox_inches="tight")
+            return buffer.getvalue()
+        fig.savefig(output, bbox_inches="tight")
+        return output
+
+    @profiled
+    def correlation(
+        self,
+        years: Optional[tuple] = None,
+        countries: Optional[list] = None,
+        window: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the correlation matrix of the columns that end with '_quantity', over all rows
+        of the panel or over a subset of years and/or countries. Results are cached until the
+        data changes, so repeated calls (and `plot_quantity`) do not compute them again.
+
+        With `window`, one matrix is returned for every year whose `window` years ending in it
+        are within the selected years. All of them are computed in one vectorized pass: the
+        sums, cross-products and pairwise counts of every year are accumulated once and every
+        window is the difference of two cumulative sums. Like `pandas.DataFrame.corr`, each
+        coefficient uses the rows where both columns are present. In streaming mode, the
+        statistics of all countries are accumulated reading one year of rows at a time.
+
+        Parameters:
+        years : tuple, optional
+            (first year, last year), both included. All years if None.
+        countries : list, optional
+            The countries to include. All countries if None.
+        window : int, optional
+            Length in years of the rolling windows.
+
+        Raises:
+            TypeError: If `years` is not a tuple of two integers, `countries` not a list of
+            strings or `window` not an integer
+            ValueError: If a country is not in the dataset or `window` is not positive
+
+        Returns:
+            pandas.DataFrame: The correlation matrix. With `window`, the matrices of all
+            windows, indexed by (last year of the window, column).
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.correlation(years=(1990, 2019), countries=["Germany", "France"])
+            my_object.correlation(window=10)
+        """
+        if years is not None and (
+            not isinstance(years, tuple)
+            or len(years) != 2
+            or not all(isinstance(year, int) for year in years)
+        ):
+            raise TypeError("years is not a tuple of two integers, Please pass (first, last)")
+        if countries is not None and (
+            not isinstance(countries, list)
+            or not all(isinstance(country, str) for country in countries)
+        ):
+            raise TypeError("countries is not a list of strings, Please pass a list")
+        if window is not None:
+            if not isinstance(window, int):
+                raise TypeError("window is not an integer, Please pass an integer")
+            if window < 1:
+                raise ValueError("window must be positive")
+
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(geographical=False)  # check if df is available
+        self.profiler.phase("compute")
+
+        if self._correlations_df is not self._source():
+            self._correlations = {}
+            self._correlations_df = self._source()
+        key = (years, tuple(countries) if countries is not None else None, window)
+        # The cached results are returned as copies, so that callers cannot change them
+        if key in self._correlations:
+            return self._correlations[key].copy()
+
+        columns = [column for column in self._columns() if column.endswith("_quantity")]
+        if countries is None and self.panel is not None:
+            result = self._streaming_correlation(columns, years, window)
+            self._correlations[key] = result
+            return result.copy()
+        if countries is None:
+            frame = self.df[["Year"] + columns]
+        else:
+            available_countries = self._available_countries()
+            for country in countries:
+                if country not in available_countries:
+                    raise ValueError(f"{country} does not exist")
+            frame = pd.concat(
+                [self._entity_rows(country)[["Year"] + columns] for country in countries]
+            )
+        if years is not None:
+            frame = frame[frame["Year"].between(*years)]
+
+        if window is None:
+            result = frame[columns].corr()
+        else:
+            result = self._rolling_correlation(frame, columns, window)
+        self._correlations[key] = result
+        return result.copy()
+
+    @staticmethod
+    def _correlation_statistics(values: np.ndarray) -> np.ndarray:
+        """
+        Returns the pairwise sums of a block of rows that the correlations are computed from:
+        counts[i, j] counts the rows where both columns are present, sums[i, j] and
+        squares[i, j] sum column i and its square over these rows, and products[i, j] sums the
+        product of the columns. Summing them over blocks gives the sums of all their rows.
+
+        Parameters:
+            values: numpy.ndarray, the rows, NaN where missing.
+
+        Returns:
+            numpy.ndarray: (counts, sums, squares, products), shape (4, columns, columns).
+        """
+        present = ~np.isnan(values)
+        mask = present.astype(float)
+        values = np.where(present, values, 0.0)
+        return np.array([mask.T @ mask, values.T @ mask, (values * values).T @ mask, values.T @ values])
+
+    @staticmethod
+    def _windowed_correlation(
+        years: np.ndarray, statistics: np.ndarray, columns: list, window: int
+    ) -> pd.DataFrame:
+        """
+        Computes the correlation matrices of every rolling window of `window` years from the
+        statistics of every year, see `_correlation_statistics`. Every window is the difference
+        of two cumulative sums, so all of them are computed at once.
+
+        Parameters:
+            years: numpy.ndarray, the sorted years.
+            statistics: numpy.ndarray, the statistics of every year, shape (years, 4, k, k).
+            columns: list, the correlated columns.
+            window: int, length of the windows in years.
+
+        Returns:
+            pandas.DataFrame: The matrices, indexed by (last year of the window, column).
+        """
+        k = len(columns)
+        if len(years) == 0:
+            index = pd.MultiIndex.from_arrays([[], []], names=["Year", None])
+            return pd.DataFrame(np.empty((0, k)), index=index, columns=columns)
+        cumulative = np.concatenate([np.zeros((1, 4, k, k)), np.cumsum(statistics, axis=0)])
+
+        ends = np.flatnonzero(years - window + 1 >= years[0])
+        starts = np.searchsorted(years, years[ends] - window + 1)
+        n, s, q, p = np.moveaxis(cumulative[ends + 1] - cumulative[starts], 1, 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = s / n
+            covariance = p / n - mean * np.swapaxes(mean, 1, 2)
+            variance = q / n - mean**2
+            correlation = covariance / np.sqrt(variance * np.swapaxes(variance, 1, 2))
+        correlation[n < 2] = np.nan
+        diagonal = np.arange(k)
+        correlation[:, diagonal, diagonal] = np.where(
+            np.isnan(correlation[:, diagonal, diagonal]), np.nan, 1.0
+        )
+
+        index = pd.MultiIndex.from_product([years[ends], columns], names=["Year", None])
+        return pd.DataFrame(correlation.reshape(-1, k), index=index, columns=columns)
+
+    @staticmethod
+    def _rolling_correlation(frame: pd.DataFrame, columns: list, window: int) -> pd.DataFrame:
+        """
+        Computes the correlation matrices of `columns` over every rolling window of `window`
+        years, see `correlation`.
+
+        Parameters:
+            frame: pandas.DataFrame, the rows with a "Year" column and the columns.
+            columns: list, the correlated columns.
+            window: int, length of the windows in years.
+
+        Returns:
+            pandas.DataFrame: The matrices, indexed by (last year of the window, column).
+        """
+        values = frame[columns].to_numpy(dtype=float)
+        # Correlations do not change with shifts and scales, standardizing keeps the sums small
+        values = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0)
+
+        year_values = frame["Year"].to_numpy()
+        years, year_positions = np.unique(year_values, return_inverse=True)
+        order = np.argsort(year_positions, kind="stable")
+        starts = np.searchsorted(year_positions[order], np.arange(len(years) + 1))
+        statistics = np.array(
+            [
+                Group01._correlation_statistics(values[order[starts[i] : starts[i + 1]]])
+                for i in range(len(years))
+            ]
+        ).reshape(len(years), 4, len(columns), len(columns))
+        return Group01._windowed_correlation(years, statistics, columns, window)
+
+    def _streaming_correlation(
+        self, columns: list, years: Optional[tuple], window: Optional[int]
+    ) -> pd.DataFrame:
+        """
+        Computes `correlation` over all countries in streaming mode, reading one year of rows
+        at a time. The columns are standardized with the per-year aggregates of the panel.
+
+        Parameters:
+            columns: list, the correlated columns.
+            years: tuple, optional, (first year, last year).
+            window: int, optional, length of the rolling windows in years.
+
+        Returns:
+            pandas.DataFrame: The correlation matrix, or the matrices of all windows.
+        """
+        counts = self.panel.counts[columns].sum().to_numpy()
+        mean = self.panel.world[columns].sum().to_numpy() / counts
+        std = np.sqrt(np.maximum(self.panel.squares[columns].sum().to_numpy() / counts - mean**2, 0.0))
+        std[std == 0] = 1.0
+
+        year_list, statistics = [], []
+        for year, rows in self.panel.year_frames(years, columns):
+            year_list.append(year)
+            statistics.append(self._correlation_statistics((rows.to_numpy(dtype=float) - mean) / std))
+        year_list = np.array(year_list, dtype=np.int64)
+        statistics = np.array(statistics).reshape(len(year_list), 4, len(columns), len(columns))
+
+        if window is not None:
+            return self._windowed_correlation(year_list, statistics, columns, window)
+        if len(year_list) == 0:
+            return pd.DataFrame(np.nan, index=columns, columns=columns)
+        span = int(year_list[-1] - year_list[0] + 1)
+        result = self._windowed_correlation(year_list, statistics, columns, span)
+        return result.loc[year_list[-1]]
+
+    @profiled
+    def plot_quantity(
+        self,
+        output: Optional[str] = None,
+        years: Optional[tuple] = None,
+        countries: Optional[list] = None,
+    ) -> Union[None, "Figure", bytes, str]:
+        """
+        Plots a heatmap of the correlation between all the columns in the Pandas DataFrame that end
+        with the string '_quantity'.
+
+        If the DataFrame does not exist as an attribute of the class instance, the method calls the
+        'get_data()' method to obtain the data.
+
+        The correlation matrix is computed (once, then cached) by the `correlation` method, over
+        all rows or the given years and countries.
+
+        Finally, the method calls the 'heatmap()' function from the seaborn library on the
+        correlation matrix, and displays the lower triangle heatmap plot using 'plt.show()', or
+        returns it according to `output`.
+
+        Parameters:
+            output : str, optional
+                None to show the plot, "figure", "png", "svg" or a .png/.svg path (see `_render`).
+            years : tuple, optional
+                (first year, last year) of the correlated rows, see `correlation`.
+            countries : list, optional
+                The countries of the correlated rows, see `correlation`.
+
+        Raises:
+            TypeError: If `output` is not a string, or `years`/`countries` are invalid
+            ValueError: If `output` is not a supported output or a country does not exist
+
+        Returns:
+            None, or the figure, image bytes or path according to `output`
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.plot_quantity()
+        """
+        import seaborn as sns
+
+        self._check_output(output)
+
+        # Correlation between all the columns ending with '_quantity'
+        self.profiler.phase("compute")
+        correlation = self.correlation(years=years, countries=countries)
+
+        # Set the plot size and, for this plot only, the font scale
+        fig = self._new_figure(output, figsize=(10, 8))
+        with sns.plotting_context("notebook", font_scale=1.2):
+            ax = fig.add_subplot()
+
+            # Getting the lower Triangle of the correlation matrix
+            matrix = np.triu(correlation)
+
+            # Create a correlation heatmap with all the '_quantity' columns
+            sns.heatmap(
+                correlation,
+                annot=True,
+                cmap="crest",
+                cbar_kws={"label": "Correlation Coefficient"},
+                mask=matrix,
+                ax=ax,
+            )
+
+            # Set the plot title
+            ax.set_title("Correlation between Quantity Columns")
+            # Add the source of the data as a subtitle
+            fig.suptitle(
+                "Source: Agricultural total factor productivity (USDA), OWID",
+                fontsize=10,
+                y=-0.2,
+            )
+        # Show the plot
+        return self._render(fig, output)
+
+    @profiled
+    def plot_area_chart(
+        self,
+        country: Optional[str] = None,
+        normalize: bool = False,
+        optional: Optional[str] = None,
+        output: Optional[str] = None,
+    ) -> Union[None, "Figure", bytes, str]:
+        """
+        Plots an area chart of the distinct "_output_" columns for the given country or all
+        countries if `country` is set to "World" or None. The columns are normalized by the total
+        output if the `normalize` parameter is set to True.
+
+        If the dataframe is not available, the method will first call the `get_data` method to
+        download and read the dataset into the `df` attribute.
+
+        Parameters:
+        country (str, optional):
+            The country to plot the data for. If set to "World" or None,
+            the data for all countries will be plotted. A region of `get_regions` plots
+            the sums of its countries.
+
+        normalize : bool
+            If set to True, the data will be normalized by the total output.
+
+        output : str, optional
+            None to show the plot, "figure", "png", "svg" or a .png/.svg path (see `_render`).
+
+        Raises:
+            TypeError: If the `country` parameter is not a string or the `normalize`
+            parameter is not a bool
+
+            Exception: If one or less columns with the "_output_" suffix are available or if the
+            given country does not exist
+
+        Returns:
+            None, or the figure, image bytes or path according to `output`
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.plot_area_chart("World", True)
+        """
+        if country is not None and not isinstance(country, str):
+            raise TypeError("country is not a string, Please pass a string")
+
+        if not isinstance(normalize, bool):
+            raise TypeError("normalize is not a bool, Please pass a bool")
+
+        self._check_output(output)
+
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(geographical=False)
+        self.profiler.phase("compute")
+
+        # Get all columns with "_quantity" suffix and check if there are enough columns
+        column_names = self._columns()
+        df_subset = [c for c in column_names if "_output_" in c]
+        df_subset.append("Year")
+        if len(df_subset) < 2:
+            raise Exception("Not enough columns with '_output' suffix")
+
+        # Plotting function
+        def country_plot(df_temp):
+            norm = ""
+            if normalize:
+                df_temp["Total"] = (df_temp.iloc[:, :-1]).sum(axis=1)
+                df_temp.iloc[:, :-2] = (
+                    df_temp.iloc[:, :-2].div(df_temp.Total, axis=0) * 100
+                )
+                norm = "% (Normalized)"
+            list_outputs = []
+            list_labels = []
+            for each in df_subset[:-1]:
+                list_outputs.append(df_temp[each])
                 list_labels.append(each)
-            plt.stackplot(df_temp.Year, list_outputs, labels=list_labels)
-            plt.set_cmap("Pastel1")
-            plt.legend(loc="upper left", bbox_to_anchor=(1, 1))
-            plt.tick_params(labelsize=12)
-            plt.title("Consumption of agricultural products by country over time, O")
+            fig = self._new_figure(output)
+            ax = fig.add_subplot()
+            ax.stackplot(df_temp.Year, list_outputs, labels=list_labels)
+            ax.legend(loc="upper left", bbox_to_anchor=(1, 1))
+            ax.tick_params(labelsize=12)
+            ax.set_title("Consumption of agricultural products by country over time, O")
             # Add the source of the data as a subtitle
-            fig = plt.gcf()
             fig.suptitle(
                 "Source: Agricultural total factor productivity (USDA), OWID",
                 fontsize=10,
                 y=-0.05,
             )
-            plt.xlabel("Year", size=12)
-            plt.ylabel(("Counsumption" + norm), size=12)
-            plt.ylim(bottom=0)
+            ax.set_xlabel("Year", size=12)
+            ax.set_ylabel(("Counsumption" + norm), size=12)
+            ax.set_ylim(bottom=0)
             # Show the plot
-            plt.show()
+            return self._render(fig, output)
 
         # Plotting for all countries or a specific country
         if country in (None, "World"):
-            df_temp = self.df[df_subset].groupby("Year").sum().reset_index()
-            df_temp = df_temp.reindex(
-                columns=list(df_temp.columns[1:]) + [df_temp.columns[0]]
+            df_temp = self._world_frame(df_subset[:-1])
+            return country_plot(df_temp)
+        elif country in self._available_countries():
+            df_temp = self._entity_frame(country, df_subset)
+            return country_plot(df_temp)
+        elif self._is_region(country):
+            df_temp = self._region_frame(country, df_subset)
+            return country_plot(df_temp)
+        else:
+            raise TypeError("Country does not exist")
+
+    def _world_frame(self, columns: list) -> pd.DataFrame:
+        """
+        Returns the sums of the given columns over all entities by year, read from the world
+        totals of the cube with `use_cube` and from the per-year sums of `self.panel` in
+        streaming mode, and summed from `self.df` otherwise.
+
+        Parameters:
+            columns: list, the numeric columns to sum.
+
+        Returns:
+            pandas.DataFrame: The sums, one row per year, with a last "Year" column.
+        """
+        if self.use_cube:
+            # The world totals are precomputed in the cube
+            cube = self.get_cube()
+            df_temp = pd.DataFrame(
+                {column: cube.world[:, cube.metric_positions[column]] for column in columns}
             )
-            country_plot(df_temp)
-        elif country in self.get_countries():
-            df_temp = self.df[self.df["Entity"] == country]
-            df_temp = df_temp[df_subset]
-            country_plot(df_temp)
+            df_temp["Year"] = cube.years
+            return df_temp
+        if self.panel is not None:
+            # The per-year sums are aggregated while the panel is read
+            df_temp = self.panel.world[columns].reset_index()
         else:
-            raise TypeError("Country does not exist")
+            df_temp = self.df[columns + ["Year"]].groupby("Year").sum().reset_index()
+        return df_temp.reindex(columns=columns + ["Year"])
 
-    def plot_country_chart(self, args: Union[list[str], str]) -> None:
+    @profiled
+    def plot_country_chart(
+        self,
+        args: Union[list[str], str],
+        output: Optional[str] = None,
+        column: Optional[str] = None,
+    ) -> Union[None, "Figure", bytes, str]:
         """
         Plots the total of the _output_ values of each selected country given by `country`,
         on the same chart with the X-axis being the Year.
 
         Parameters:
         args : list
-            A list of countries to plot
+            A list of countries to plot, or regions of `get_regions`
+
+        output : str, optional
+            None to show the plot, "figure", "png", "svg" or a .png/.svg path (see `_render`).
+
+        column : str, optional
+            A column or a derived metric of `get_derived` (like "tfp_growth") to plot instead
+            of the total output.
 
         Raises:
             TypeError: If the input is not a string or a list of strings
+            ValueError: If `column` is not a numeric column or a derived metric
 
         Returns:
-            None
+            None, or the figure, image bytes or path according to `output`
 
         Example usage:
             my_object = Group01("my_object")
             my_object.plot_country_chart("World", True)
         """
-        title = "Plot of total _output_ values of "
+        title = "Plot of total _output_ values of " if column is None else f"Plot of {column} of "
 
         if (not isinstance(args, list)) and (not isinstance(args, str)):
             raise TypeError(
                 "args is not a list or a string. Please pass a list or a string."
             )
 
-        if self.df is None:
-            self.get_data()  # check if df is available
+        self._check_output(output)
+
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(geographical=False)  # check if df is available
+        self.profiler.phase("compute")
         # Get all columns with "_output"
-        column_names = self.df.columns.tolist()
+        column_names = self._columns()
         df_subset = [c for c in column_names if "_output_" in c]
         df_subset.append("Year")
+        if column is not None:
+            self._check_column(column)
+            df_subset = ["Year", column]
 
-        def country_plot(country):
-            df_temp = self.df[self.df["Entity"] == country]
-            df_temp = df_temp[df_subset]
-            df_temp["Total"] = (df_temp[:-1]).sum(axis=1)
-            plt.plot(df_temp["Year"], df_temp["Total"], label=country)
-            plt.legend()
+        available_countries = self._available_countries()
 
+        # Check all countries before creating the figure
         if isinstance(args, str):  # pass a string
-            if args in self.get_countries():
-                country_plot(args)
-                title += args
-            else:
+            if args not in available_countries and not self._is_region(args):
                 raise ValueError("Country does not exist")
+            title += args
+            countries = [args]
         elif all(isinstance(each, str) for each in args):  # list
             for each in args:
-                if each in self.get_countries():
-                    country_plot(each)
-                    title += each + ", "
-                else:
+                if each not in available_countries and not self._is_region(each):
                     raise TypeError("Country does not exist")
+                title += each + ", "
+            countries = args
         else:
             raise TypeError("Please pass a country string or countries list")
 
-        plt.title(title)
+        fig = self._new_figure(output)
+        ax = fig.add_subplot()
+        for country in countries:
+            if country in available_countries:
+                df_temp = self._entity_frame(country, df_subset)
+            else:
+                df_temp = self._region_frame(country, df_subset)
+            if column is None:
+                df_temp["Total"] = (df_temp[:-1]).sum(axis=1)
+                ax.plot(df_temp["Year"], df_temp["Total"], label=country)
+            else:
+                ax.plot(df_temp["Year"], df_temp[column], label=country)
+            ax.legend()
+
+        ax.set_title(title)
         # Add the source of the data as a subtitle
-        fig = plt.gcf()
         fig.suptitle(
             "Source: Agricultural total factor productivity (USDA), OWID",
             fontsize=10,
             y=-0.05,
         )
-        plt.xlabel("Year")
-        plt.ylabel("Total _output")
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Total _output" if column is None else column)
         # Show the plot
-        plt.show()
+        return self._render(fig, output)
 
-    def gapminder(self, year: int, log_scale: bool = False) -> None:
+    @profiled
+    def gapminder(
+        self, year: int, log_scale: bool = False, output: Optional[str] = None
+    ) -> Union[None, "Figure", bytes, str]:
         """
         Visualize Gapminder data for a specific year.
 
@@ -523,6 +2775,8 @@ class Group01:
             The year for which to visualize the data.
         log_scale : bool, optional (default=False)
             If True, the x and y axis will be displayed in logarithmic scale.
+        output : str, optional
+            None to show the plot, "figure", "png", "svg" or a .png/.svg path (see `_render`).
         Raises:
         TypeError
             If the received argument is not an int or if it's negative.
@@ -530,31 +2784,42 @@ class Group01:
             If the year is not present in the dataset.
 
         Returns:
-            None
+            None, or the figure, image bytes or path according to `output`
 
         Example usage:
             my_object = Group01("my_object")
             my_object.gapminder_plot(2000, True)
         """
+        import seaborn as sns
+
         if not isinstance(year, int) or year < 0:
             raise TypeError("Please pass a positive integer for year")
 
-        if self.df is None:
-            self.get_data()  # check if df is available
+        self._check_output(output)
 
-        if year not in self.df["Year"].unique():
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(geographical=False)  # check if df is available
+        self.profiler.phase("compute")
+
+        if year not in self._available_years():
             raise ValueError(f"{year} is not present in the dataset")
 
         # Increase the graph size
-        plt.figure(dpi=150)
+        fig = self._new_figure(output, dpi=150)
+        ax = fig.add_subplot()
 
         # Filter data by year
-        year_data = self.df[self.df["Year"] == year]
+        year_data = self._year_frame(
+            year, ["fertilizer_quantity", "output_quantity", "animal_output_quantity"]
+        )
 
         # Store animal_output_quantity as a numpy array: np_pop
         # Exploratory analysis showed that animal_output_quantity is the most relevant variable
         # regarding their correlation with fertilizer_quantity and output_quantity
         np_pop = np.array(year_data["animal_output_quantity"])
+        # Doubled in 64 bits, the compact mode may store the column in a smaller type
+        np_pop = np_pop.astype(np.result_type(np_pop, np.int64))
         np_pop2 = np_pop * 2
 
         # Create a scatter plot
@@ -566,15 +2831,15 @@ class Group01:
             size=np_pop2,
             sizes=(20, 400),
             alpha=0.5,
+            ax=ax,
         )
 
         # Use seaborn scatterplot for better customization
-        plt.grid(True)
-        plt.xlabel("fertilizer_quantity", fontsize=14)
-        plt.ylabel("output_quantity", fontsize=14)
-        plt.title(f"Gapminder agriculture - Year {year}", fontsize=20)
+        ax.grid(True)
+        ax.set_xlabel("fertilizer_quantity", fontsize=14)
+        ax.set_ylabel("output_quantity", fontsize=14)
+        ax.set_title(f"Gapminder agriculture - Year {year}", fontsize=20)
         # Add the source of the data as a subtitle
-        fig = plt.gcf()
         fig.suptitle(
             "Source: Agricultural total factor productivity (USDA), OWID",
             fontsize=10,
@@ -582,28 +2847,37 @@ class Group01:
         )
 
         if log_scale:
-            plt.xscale("log")
-            plt.yscale("log")
-            plt.xlabel("fertilizer_quantity_log", fontsize=14)
-            plt.ylabel("output_quantity_log", fontsize=14)
+            ax.set_xscale("log")
+            ax.set_yscale("log")
+            ax.set_xlabel("fertilizer_quantity_log", fontsize=14)
+            ax.set_ylabel("output_quantity_log", fontsize=14)
 
-        plt.show()
+        return self._render(fig, output)
 
-    def choropleth(self, year: int) -> None:
+    @profiled
+    def choropleth(
+        self, year: int, output: Optional[str] = None, column: str = "tfp"
+    ) -> Union[None, "Figure", bytes, str]:
         """
         Plots a choropleth map of the total factor productivity (tfp) for the given year
 
         Parameters:
         year : int
             The year for which to plot the tfp
+        output : str, optional
+            None to show the plot, "figure", "png", "svg" or a .png/.svg path (see `_render`).
+        column : str
+            The column or derived metric of `get_derived` (like "tfp_growth") to map, tfp by
+            default.
 
         Raises:
             TypeError: If the input year is not an integer
             ValueError: If the self.df or self.df_geographical attributes are None
-            ValueError: If year is not in the dataset
+            ValueError: If year is not in the dataset, `column` is not a numeric column or a
+            derived metric, or it has no data in that year
 
         Returns:
-            None
+            None, or the figure, image bytes or path according to `output`
 
         Example usage:
             my_object.choropleth(2000)
@@ -612,124 +2886,864 @@ class Group01:
         if not isinstance(year, int):
             raise TypeError("Year must be an integer")
 
+        self._check_output(output)
+
         # Check if self.df or self.df_geographical attributes are None and call
         # self.get_data() if necessary
-        if (self.df is None) or (self.df_geographical is None):
+        self.profiler.phase("load")
+        if self._needs_data(geographical=True):
             self.get_data()
+        self.profiler.phase("compute")
 
         # Check if year is in the dataset
-        if year not in self.df["Year"].values:
+        if year not in self._available_years():
             raise ValueError("Year is not in the dataset")
+        self._check_column(column)
+
+        # Join the tfp of the selected year onto the geometries, without changing self.df
+        tfp = self._geo_year_values(year, column)
+        if np.isnan(tfp).all():
+            # The colour scale needs a value, like tfp_growth in the first year
+            raise ValueError(f"There is no data for {column} in {year}")
+
+        # Plot choropleth map of tfp, countries without data are left blank
+        fig = self._new_figure(output, figsize=(20, 10))
+        ax = fig.add_subplot()
+        collection = self._choropleth_collection(tfp, np.nanmin(tfp), np.nanmax(tfp))
+        ax.add_collection(collection)
+        ax.autoscale_view()
+        ax.set_aspect("equal")
+        label = "total factor productivity" if column == "tfp" else column
+        fig.colorbar(collection, ax=ax, label=label)
+        ax.set_title(f"{label[0].upper()}{label[1:]} in {year}")
+        ax.set_xlabel("Longitude", fontsize=14)
+        ax.set_ylabel("Latitude", fontsize=14)
+        # Add the source of the data as a subtitle
+        fig.suptitle(
+            "Sources: Natural Earth powered by WordPress and Agricultural total factor productivity (USDA), OWID",
+            fontsize=10,
+            y=-0.05,
+        )
+        # Show the plot
+        return self._render(fig, output)
+
+    def _geo_join_index(self) -> tuple:
+        """
+        Returns the join of the geometries in `self.df_geographical` with the entities of
+        `self.df`, built once per pair of DataFrames. Entities are matched to the "name" of the
+        geometries after renaming them according to `merge_dict`.
+
+        Parameters:
+            None
 
-        # Rename country in self.df according to merge_dict
-        self.df = self.df.replace({"Entity": Group01.merge_dict})
+        Returns:
+            tuple: (positions, entities), two aligned numpy arrays with the row position of each
+            joined geometry in `self.df_geographical` and the matching entity of `self.df`,
+            in the order of the geometries.
+        """
+        if (
+            self._geo_join_df is not self._source()
+            or self._geo_join_geographical is not self.df_geographical
+        ):
+            countries = pd.Series(sorted(self._available_countries()))
+            join = pd.DataFrame(
+                {
+                    "name": self.df_geographical["name"].to_numpy(),
+                    "position": np.arange(len(self.df_geographical)),
+                }
+            ).merge(
+                pd.DataFrame(
+                    {"name": countries.replace(Group01.merge_dict), "Entity": countries}
+                ),
+                on="name",
+                how="inner",
+            )
+            self._geo_join = (join["position"].to_numpy(), join["Entity"].to_numpy())
+            self._geo_join_df = self._source()
+            self._geo_join_geographical = self.df_geographical
+        return self._geo_join
+
+    def _geo_year_values(self, year: int, column: str = "tfp") -> np.ndarray:
+        """
+        Returns the values of `column` in the given year for every geometry of the join
+        returned by `_geo_join_index`, NaN where the entity has no data in that year.
+
+        Parameters:
+            year: int, a year in the dataset.
+            column: str, the column of `self.df` or the derived metric to join.
+
+        Returns:
+            numpy.ndarray: The values, aligned with the join.
+        """
+        _, entities = self._geo_join_index()
+        if column in self._derived_columns():
+            return self._derived_values(year, entities, column)
+        if self.use_cube:
+            cube = self.get_cube()
+            position = cube.year_positions[year]
+            entity_positions = [cube.entity_positions[entity] for entity in entities]
+            return np.where(
+                cube.present[position, entity_positions],
+                cube.values[position, entity_positions, cube.metric_positions[column]],
+                np.nan,
+            )
+        values = self._year_rows(year).set_index("Entity")[column]
+        return values.reindex(entities).to_numpy(dtype=float)
+
+    def _choropleth_collection(self, values: np.ndarray, vmin: float, vmax: float):
+        """
+        Returns a PatchCollection of the joined geometries coloured by `values`.
+
+        The matplotlib paths of the geometries (one per polygon part) are built once per join
+        and reused by every map. Geometries whose value is NaN are transparent.
+
+        Parameters:
+            values: numpy.ndarray, one value per geometry of the join (see `_geo_year_values`).
+            vmin: float, value at the bottom of the colour scale.
+            vmax: float, value at the top of the colour scale.
 
-        # Merge geographical and agricultural dataframe and filter by selected year
-        merged_df = self.df_geographical.merge(
-            self.df, left_on="name", right_on="Entity", how="left"
+        Returns:
+            matplotlib.collections.PatchCollection: The collection. Its `owners` attribute maps
+            every path to its geometry, to colour it with other values:
+            collection.set_array(np.ma.masked_invalid(other_values[collection.owners])).
+        """
+        import matplotlib
+        from matplotlib.collections import PatchCollection
+        from matplotlib.colors import Normalize
+        from matplotlib.patches import PathPatch
+        from matplotlib.path import Path
+
+        geo_join = self._geo_join_index()
+        if self._geo_paths_join is not geo_join:
+            paths, owners = [], []
+            geometries = np.asarray(self.df_geographical.geometry)[geo_join[0]]
+            for owner, geometry in enumerate(geometries):
+                for polygon in getattr(geometry, "geoms", [geometry]):
+                    rings = [polygon.exterior, *polygon.interiors]
+                    vertices = np.concatenate(
+                        [np.asarray(ring.coords)[:, :2] for ring in rings]
+                    )
+                    codes = np.concatenate(
+                        [
+                            [Path.MOVETO]
+                            + [Path.LINETO] * (len(ring.coords) - 2)
+                            + [Path.CLOSEPOLY]
+                            for ring in rings
+                        ]
+                    )
+                    paths.append(Path(vertices, codes))
+                    owners.append(owner)
+            self._geo_paths = (paths, np.array(owners))
+            self._geo_paths_join = geo_join
+
+        paths, owners = self._geo_paths
+        cmap = matplotlib.colormaps[matplotlib.rcParams["image.cmap"]].copy()
+        cmap.set_bad((0, 0, 0, 0))  # geometries without data are left blank
+        collection = PatchCollection(
+            [PathPatch(path) for path in paths], cmap=cmap, norm=Normalize(vmin, vmax)
         )
-        merged_df = merged_df[merged_df["Year"] == year]
+        collection.owners = owners
+        collection.set_array(np.ma.masked_invalid(values[owners]))
+        return collection
 
-        # Plot choropleth map of tfp
-        ax = merged_df.plot(
-            column="tfp",
-            legend=True,
-            figsize=[20, 10],
-            legend_kwds={"label": "total factor productivity"},
+    @profiled
+    def choropleth_series(
+        self,
+        years: Optional[list] = None,
+        out_dir: Optional[str] = None,
+        animation: Optional[str] = None,
+        fps: int = 4,
+        column: str = "tfp",
+    ) -> list:
+        """
+        Renders the choropleth map of the total factor productivity (tfp) for several years,
+        as one PNG file per year and/or as an animation (GIF or MP4).
+
+        The figure is drawn only once. Each frame only updates the colour array of the polygons
+        and the title, which are blitted onto the static background, and all frames share one
+        colour scale, from the lowest to the highest tfp over the selected years. Countries
+        without data in a year are left blank. The figure does not use pyplot, so no figure is
+        left open.
+
+        Parameters:
+        years : list, optional
+            The years to render, in order. If None, every year in the dataset is rendered.
+        out_dir : str, optional
+            Directory in which the choropleth_<year>.png files are written.
+        animation : str, optional
+            Path of the animation to write, ending with .gif or .mp4 (MP4 requires ffmpeg).
+        fps : int
+            Frames per second of the animation.
+        column : str
+            The column or derived metric of `get_derived` to map, tfp by default.
+
+        Raises:
+            TypeError: If a year is not an integer
+            ValueError: If a year is not in the dataset, if neither `out_dir` nor `animation`
+            is given, if the animation format is not supported, if `column` is not a numeric
+            column or a derived metric or if it has no data in any of the years
+
+        Returns:
+            list: The paths of the written files.
+
+        Example usage:
+            my_object.choropleth_series(range(1961, 2020), animation="tfp.gif")
+        """
+        import subprocess
+        import matplotlib
+        from PIL import Image
+
+        if out_dir is None and animation is None:
+            raise ValueError("Please pass an out_dir and/or an animation path")
+        if animation is not None and not animation.endswith((".gif", ".mp4")):
+            raise ValueError("animation must be a .gif or .mp4 path")
+
+        self.profiler.phase("load")
+        if self._needs_data(geographical=True):
+            self.get_data()
+        self.profiler.phase("compute")
+
+        if years is None:
+            years = sorted(self._available_years())
+        years = list(years)
+        for year in years:
+            if not isinstance(year, (int, np.integer)):
+                raise TypeError("Year must be an integer")
+            if year not in self._available_years():
+                raise ValueError(f"{year} is not in the dataset")
+        self._check_column(column)
+
+        values = np.array([self._geo_year_values(year, column) for year in years])
+        if np.isnan(values).all():
+            # The shared colour scale needs a value, the years without data are left blank
+            raise ValueError(f"There is no data for {column} in the years {years}")
+        collection = self._choropleth_collection(
+            values[0], np.nanmin(values), np.nanmax(values)
         )
-        ax.set_title(f"Total factor productivity in {year}")
-        plt.xlabel("Longitude", fontsize=14)
-        plt.ylabel("Latitude", fontsize=14)
-        # Add the source of the data as a subtitle
-        fig = plt.gcf()
+        owners = collection.owners
+
+        # A figure outside of pyplot, so that no figure is left open
+        fig = self._new_figure("figure", figsize=(20, 10))
+        canvas = fig.canvas
+        ax = fig.add_subplot()
+        ax.add_collection(collection)
+        ax.autoscale_view()
+        ax.set_aspect("equal")
+        label = "total factor productivity" if column == "tfp" else column
+        fig.colorbar(collection, ax=ax, label=label, shrink=0.6)
+        ax.set_xlabel("Longitude", fontsize=14)
+        ax.set_ylabel("Latitude", fontsize=14)
         fig.suptitle(
             "Sources: Natural Earth powered by WordPress and Agricultural total factor productivity (USDA), OWID",
             fontsize=10,
-            y=-0.05,
+            y=0.05,
         )
-        # Show the plot
-        plt.show()
 
-    def predictor(self, countries: list) -> None:
+        # Draw everything but the polygons and the title once, and blit them on top per frame
+        collection.set_animated(True)
+        ax.title.set_animated(True)
+        canvas.draw()
+        background = canvas.copy_from_bbox(fig.bbox)
+
+        def render(frame):
+            canvas.restore_region(background)
+            collection.set_array(np.ma.masked_invalid(values[frame][owners]))
+            ax.set_title(f"{label[0].upper()}{label[1:]} in {years[frame]}")
+            ax.draw_artist(collection)
+            ax.draw_artist(ax.title)
+            return Image.fromarray(np.asarray(canvas.buffer_rgba()))
+
+        written = []
+        gif_frames = []
+        ffmpeg = None
+        if animation is not None and animation.endswith(".mp4"):
+            width, height = canvas.get_width_height()
+            ffmpeg = subprocess.Popen(
+                [
+                    matplotlib.rcParams["animation.ffmpeg_path"], "-y", "-loglevel", "error",
+                    "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}",
+                    "-r", str(fps), "-i", "-", "-vcodec", "libx264", "-pix_fmt", "yuv420p",
+                    animation,
+                ],
+                stdin=subprocess.PIPE,
+            )
+        if out_dir is not None:
+            os.makedirs(out_dir, exist_ok=True)
+
+        try:
+            for frame, year in enumerate(years):
+                image = render(frame)
+                if out_dir is not None:
+                    path = os.path.join(out_dir, f"choropleth_{year}.png")
+                    image.save(path, compress_level=1)
+                    written.append(path)
+                if ffmpeg is not None:
+                    ffmpeg.stdin.write(image.tobytes())
+                elif animation is not None:
+                    gif_frames.append(
+                        image.convert("RGB").quantize(method=Image.Quantize.FASTOCTREE)
+                    )
+        finally:
+            if ffmpeg is not None:
+                ffmpeg.stdin.close()
+                ffmpeg.wait()
+
+        if gif_frames:
+            gif_frames[0].save(
+                animation,
+                save_all=True,
+                append_images=gif_frames[1:],
+                duration=int(1000 / fps),
+                loop=0,
+            )
+        if animation is not None:
+            written.append(animation)
+        return written
+
+    @profiled
+    def get_adjacency(self, distance: float = 0.0, use_cache: bool = True) -> tuple:
         """
-        Plots the Total Factor Productivity (TFP) of the given countries
-        and predicts TFP up to 2050 using ARIMA. Arima is used instead of
-        SARIMAX because it was no seasonality in the data. It was checked by
-        plotting ACF and PACF plots and by checking the seasonal decomposition
-        plot. It is oserved by the autocorrelation that the time series of the
-        data does show a long-term trend or systematic patterns that could affect
-        its statistical properties. Thats why we have to use the differencing
-        parameter 'd' to remove the trend and make the data stationary and smooth
-        the variance and mean. It is important becasue an accurate prediction can
-        only be made for stationary series, since the data are otherwise randomly
-        distributed and randomness cannot be forecasted.
+        Returns the adjacency of the countries that are joined with a geometry of the map (see
+        `_geo_join_index`): two countries are neighbours if their geometries share a border, or
+        lie within `distance` degrees of each other. The adjacency of all geometries is built
+        with an STRtree, cached on disk in downloads/spatial_cache under a hash of the
+        geometries, and kept in memory for the joined countries.
 
-        The order of the autoregressive (AR) component parameter 'p' is set to 20.
-        The degree of differencing (I) parameter 'd' is set to 2.
-        The order of the moving average (MA) component parameter 'q' is set to 2.
+        Parameters:
+            distance: float, the largest distance between neighbours, in degrees. Islands have
+                no neighbours with 0.
+            use_cache: bool, if True the adjacency is read from and written to the disk cache.
+
+        Raises:
+            ValueError: If `distance` is negative
+
+        Returns:
+            tuple: (matrix, entities), the symmetric scipy.sparse.csr_matrix of ones and the
+            country of each of its rows and columns.
+
+        Example usage:
+            my_object = Group01("my_object")
+            matrix, entities = my_object.get_adjacency()
+        """
+        if isinstance(distance, bool) or not isinstance(distance, (int, float)) or distance < 0:
+            raise ValueError("distance must be a non-negative number")
+
+        self.profiler.phase("load")
+        if self._needs_data(geographical=True):
+            self.get_data()
+        self.profiler.phase("compute")
+
+        positions, entities = self._geo_join_index()
+        if self._adjacency_join is not self._geo_join:
+            self._adjacency = {}
+            self._adjacency_join = self._geo_join
+        if float(distance) not in self._adjacency:
+            matrix = cached_adjacency(
+                np.asarray(self.df_geographical.geometry),
+                float(distance),
+                SPATIAL_CACHE_DIR if use_cache else None,
+            )
+            self._adjacency[float(distance)] = matrix[positions][:, positions]
+        return self._adjacency[float(distance)], entities
+
+    def _spatial_values(self, column: str, years: Optional[list], distance: float) -> tuple:
+        """
+        Returns the inputs of the spatial statistics: the adjacency of the joined countries
+        (see `get_adjacency`), the countries, the years and the values of `column` as a
+        countries x years array.
 
         Parameters:
-            countries (list): A list of up to three country names to plot.
+            column: str, a numeric column or a derived metric.
+            years: list, optional, the years, all years of the dataset if None.
+            distance: float, the largest distance between neighbours.
 
         Raises:
-            TypeError: If the received argument is not a list.
-            ValueError: If the agricultural data has not been loaded yet.
-            ValueError: If no valid countries are provided.
-            ValueError: If more than three countries are provided.
+            TypeError: If a year is not an integer
+            ValueError: If a year is not in the dataset, or `column` is not a numeric column or
+            a derived metric
 
         Returns:
-            None
+            tuple: (matrix, entities, years, values).
+        """
+        matrix, entities = self.get_adjacency(distance)
+        if years is None:
+            years = sorted(self._available_years())
+        years = list(years)
+        for year in years:
+            if not isinstance(year, (int, np.integer)):
+                raise TypeError("Year must be an integer")
+            if year not in self._available_years():
+                raise ValueError(f"{year} is not in the dataset")
+        self._check_column(column)
+        if self.streaming:
+            values = np.column_stack(
+                [self._geo_year_values(year, column) for year in years]
+            ).reshape(len(entities), len(years))
+        else:
+            # All years at once from the cube, or from the derived metrics
+            cube = self.get_cube()
+            source, positions = cube.values, cube.metric_positions
+            if column in self._derived_columns():
+                derived = self.get_derived()
+                source, positions = derived.values, derived.column_positions
+            year_axis = np.array([cube.year_positions[int(year)] for year in years], dtype=int)
+            entity_axis = np.array([cube.entity_positions[entity] for entity in entities], dtype=int)
+            values = source[year_axis][:, entity_axis, positions[column]].T
+        return matrix, entities, np.array(years), values
+
+    @staticmethod
+    def _spatial_frame(entities: np.ndarray, years: np.ndarray, values: np.ndarray, **columns) -> pd.DataFrame:
+        """
+        Returns a tidy DataFrame of countries x years arrays, with one row per country and year
+        in which the country has a value.
+        """
+        frame = pd.DataFrame(
+            {
+                "Entity": np.repeat(entities, len(years)),
+                "Year": np.tile(years, len(entities)),
+                **{name: array.ravel() for name, array in columns.items()},
+            }
+        )
+        return frame[~np.isnan(values.ravel())].reset_index(drop=True)
+
+    @profiled
+    def spatial_lag(
+        self, column: str = "tfp", years: Optional[list] = None, distance: float = 0.0
+    ) -> pd.DataFrame:
+        """
+        Returns the spatial lag of `column`, the average value of the neighbours of every country
+        (see `get_adjacency`) in every year, computed for all years by one sparse product.
+
+        Parameters:
+            column: str, a numeric column or a derived metric, tfp by default.
+            years: list, optional, the years, all years of the dataset if None.
+            distance: float, the largest distance between neighbours, in degrees.
+
+        Raises:
+            TypeError: If a year is not an integer
+            ValueError: If a year is not in the dataset, or `column` is not a numeric column or
+            a derived metric
+
+        Returns:
+            pandas.DataFrame: The columns "Entity", "Year", `column` and "<column>_lag" (NaN if
+            no neighbour has a value), for the countries with a value.
 
         Example usage:
             my_object = Group01("my_object")
-            my_object.predictor(['United States', 'China', 'India'])
+            my_object.spatial_lag("tfp", years=[2000])
+        """
+        matrix, entities, years, values = self._spatial_values(column, years, distance)
+        lag = spatial_lag(matrix, values)
+        return self._spatial_frame(entities, years, values, **{column: values, f"{column}_lag": lag})
+
+    @profiled
+    def morans_i(
+        self, column: str = "tfp", years: Optional[list] = None, distance: float = 0.0
+    ) -> pd.DataFrame:
+        """
+        Returns the global Moran's I of `column` in every year, which measures whether
+        neighbouring countries (see `get_adjacency`) have similar values, with its z-score and
+        two-sided p-value under the normality assumption.
+
+        Parameters:
+            column: str, a numeric column or a derived metric, tfp by default.
+            years: list, optional, the years, all years of the dataset if None.
+            distance: float, the largest distance between neighbours, in degrees.
+
+        Raises:
+            TypeError: If a year is not an integer
+            ValueError: If a year is not in the dataset, or `column` is not a numeric column or
+            a derived metric
+
+        Returns:
+            pandas.DataFrame: The columns "Year", "I", "expected", "z", "p" and "n", the number
+            of countries with a value.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.morans_i("tfp_growth")
+        """
+        from scipy import stats
+
+        matrix, _, years, values = self._spatial_values(column, years, distance)
+        statistics = morans_i(matrix, values)
+        return pd.DataFrame(
+            {
+                "Year": years,
+                "I": statistics["I"],
+                "expected": statistics["expected"],
+                "z": statistics["z"],
+                "p": 2 * stats.norm.sf(np.abs(statistics["z"])),
+                "n": statistics["n"],
+            }
+        )
+
+    @profiled
+    def hot_spots(
+        self,
+        column: str = "tfp",
+        years: Optional[list] = None,
+        distance: float = 0.0,
+        threshold: float = 1.96,
+    ) -> pd.DataFrame:
+        """
+        Returns the hot and cold spots of `column`: the countries whose values and those of
+        their neighbours (see `get_adjacency`) are together significantly higher or lower than
+        the average of the year, by the Getis-Ord Gi* z-score.
+
+        Parameters:
+            column: str, a numeric column or a derived metric, tfp by default.
+            years: list, optional, the years, all years of the dataset if None.
+            distance: float, the largest distance between neighbours, in degrees.
+            threshold: float, the z-score above which a country is a hot spot, and below the
+                opposite of which it is a cold spot, 1.96 for a 5% two-sided level.
+
+        Raises:
+            TypeError: If a year is not an integer
+            ValueError: If a year is not in the dataset, or `column` is not a numeric column or
+            a derived metric
 
+        Returns:
+            pandas.DataFrame: The columns "Entity", "Year", `column`, "z" (NaN if no neighbour
+            has a value) and "spot" ("hot", "cold" or ""), for the countries with a value.
+
+        Example usage:
+            my_object = Group01("my_object")
+            spots = my_object.hot_spots(years=[2019])
+            spots[spots["spot"] == "hot"]
         """
-        warnings.filterwarnings("ignore")
+        matrix, entities, years, values = self._spatial_values(column, years, distance)
+        scores = getis_ord(matrix, values)
+        spots = np.where(scores > threshold, "hot", np.where(scores < -threshold, "cold", ""))
+        return self._spatial_frame(entities, years, values, **{column: values, "z": scores, "spot": spots})
+
+    def _select_countries(self, countries: list) -> list:
+        """
+        Returns the countries of the given list that are in the dataset, and the regions of
+        `get_regions`, in the given order.
+
+        Parameters:
+            countries (list): A list of country or region names.
 
+        Raises:
+            TypeError: If the received argument is not a list.
+            ValueError: If no valid countries are provided, or a region is requested in
+                streaming mode.
+
+        Returns:
+            list: The valid countries.
+        """
         if not isinstance(countries, list):
             raise TypeError(
                 "No valid type as an argument. Please insert the names of countries as a list into the method."
             )
 
-        if self.df is None:
-            self.get_data()  # check if df is available
-
-        available_countries = set(self.df["Entity"].unique())
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(geographical=False)  # check if df is available
+        self.profiler.phase("compute")
+
+        available_countries = self._available_countries()
+        if self.streaming:
+            regions = [
+                country
+                for country in countries
+                if country in self.regions and country not in available_countries
+            ]
+            if regions:
+                raise ValueError(
+                    f"The regions {', '.join(regions)} need the data in memory, they are not "
+                    "available in streaming mode"
+                )
 
-        # Select the countries that are in the available countries
+        # Select the countries that are in the available countries, and the regions
         countries_to_use = [
-            country for country in countries if country in available_countries
+            country
+            for country in countries
+            if country in available_countries or self._is_region(country)
         ]
         if not countries_to_use:
             # Raise an error if no valid countries are provided
             raise ValueError(
-                f"No valid countries provided. Available countries are: {', '.join(available_countries)}"
+                f"No valid countries provided. Available countries are: {', '.join(self._countries)}"
             )
+        return countries_to_use
 
-        if len(countries) > 3:
-            # Raise an error if more than three countries are provided
-            raise ValueError("Maximum of three countries can be provided.")
+    def _tfp_series(self, countries: Optional[list]) -> dict:
+        """
+        Returns the TFP series of the given countries that are in the dataset, or of all
+        countries. The TFP of a region is the average of its countries weighted by their output
+        quantity (see `get_rollup`).
+
+        Parameters:
+            countries (list, optional): The countries, all countries of the dataset if None.
 
-        fig, ax = plt.subplots(figsize=(12, 8))
+        Raises:
+            TypeError: If `countries` is not a list or None.
+            ValueError: If no valid countries are provided, or a region is requested in
+                streaming mode.
 
+        Returns:
+            dict: Maps each country to a (years, tfp) tuple of numpy arrays.
+        """
+        if countries is None:
+            self.profiler.phase("load")
+            if self._needs_data():
+                self.get_data(geographical=False)  # check if df is available
+            self.profiler.phase("compute")
+            countries = self.get_countries()
+        countries_to_use = self._select_countries(countries)
+
+        series = {}
         for country in countries_to_use:
-            # Select the data for the current country
-            data = self.df[self.df["Entity"] == country]
-            # Extract the TFP and years values
-            tfp = data["tfp"].values
-            years = data["Year"].values
-            # Plot the TFP for the current country
-            ax.plot(years, tfp, label=country)
-            # Fit an ARIMA model to the TFP data for the current country
-            model = ARIMA(tfp, order=(20, 2, 2))
-            model_fit = model.fit()
-            # Generate predictions for TFP up to 2050
-            predictions = model_fit.forecast(steps=31)
+            if self._is_region(country):
+                # The tfp of the countries averaged by their output
+                data = self._region_frame(country, ["Year", "tfp"]).dropna()
+            else:
+                data = self._entity_frame(country, ["Year", "tfp"])
+            series[country] = (data["Year"].values, data["tfp"].values)
+        return series
+
+    @profiled
+    def select_orders(
+        self,
+        countries: Optional[list] = None,
+        grid: Optional[list] = None,
+        criterion: str = "aic",
+        max_workers: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Selects the (p, d, q) order of the ARIMA model of the TFP of the given countries, as the
+        order of the grid with the lowest information criterion, and stores it in `self.orders`.
+
+        The candidates are fitted in a process pool. The orders with the same d and q are
+        searched by increasing p, every fit starting from the parameters of the previous order,
+        and the search stops early in the lines of orders whose criterion does not improve or
+        starts far above the best one (see `forecasting.select_orders`). The selected orders are
+        cached in `self.forecast_cache` with the TFP series, so `forecast(order="auto")` only
+        searches the countries whose series changed.
+
+        Parameters:
+            countries (list, optional): The countries, all countries of the dataset if None.
+            grid (list, optional): The (p, d, q) orders to search, `self.order_grid` if None.
+            criterion (str): "aic", "bic" or "hqic".
+            max_workers (int, optional): The number of worker processes, defaults to the number
+                of cores.
+            use_cache (bool): If True, cached orders are reused and new ones are cached.
+
+        Raises:
+            TypeError: If `countries` is not a list or None.
+            ValueError: If no valid countries are provided, the grid is empty or the criterion
+                is unknown.
+
+        Returns:
+            pandas.DataFrame: The columns "Entity", "p", "d", "q" and the criterion (NaN for
+            cached orders), one row per country.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.select_orders(['Germany', 'France'], criterion="bic")
+        """
+        series = self._tfp_series(countries)
+        self.profiler.phase("fit")
+        selected = select_orders(
+            series,
+            grid=self.order_grid if grid is None else grid,
+            criterion=criterion,
+            max_workers=max_workers,
+            cache=self.forecast_cache if use_cache else None,
+        )
+        self.orders.update({country: order for country, (_, order) in selected.items()})
+        return pd.DataFrame(
+            [
+                (country, *order, np.nan if value is None else value)
+                for country, (value, order) in selected.items()
+            ],
+            columns=["Entity", "p", "d", "q", criterion],
+        )
+
+    @profiled
+    def forecast(
+        self,
+        countries: Optional[list] = None,
+        order: Union[tuple, str] = (20, 2, 2),
+        end_year: int = 2050,
+        max_workers: Optional[int] = None,
+        use_cache: bool = True,
+        engine: str = "arima",
+    ) -> pd.DataFrame:
+        """
+        Forecasts the Total Factor Productivity (TFP) of the given countries up to `end_year`
+        with one ARIMA model per country (see `predictor` for the choice of the model). The
+        models are fitted in a process pool that uses all cores by default.
+
+        Countries that are not in the dataset are ignored. Forecasts are memoized in
+        `self.forecast_cache`, keyed by the country, the order, the horizon and the TFP series of
+        the country, so they are only fitted again when one of them changes.
+
+        With `order="auto"`, the order of every country is selected from `self.order_grid` by
+        `select_orders`, whose result is cached, so only the first forecast of a series pays for
+        the search.
+
+        With `engine="fast"`, the statsmodels ARIMA models are replaced by AR models of order p on
+        the d times differenced series, fitted for all countries at once by batched least squares
+        (see `forecasting.fast_batch_forecast`). It is meant for screening and interactive use.
+
+        Parameters:
+            countries (list, optional): The countries to forecast. If None, all countries in the
+                dataset are forecast.
+            order (tuple or str): The (p, d, q) order of the ARIMA models, or "auto" to select
+                the order of every country (see `select_orders`).
+            end_year (int): The last year to forecast.
+            max_workers (int, optional): The number of worker processes, defaults to the number
+                of cores.
+            use_cache (bool): If True, cached forecasts are reused and new ones are cached.
+            engine (str): "arima" for statsmodels ARIMA models, "fast" for the vectorized
+                AR approximation.
+
+        Raises:
+            TypeError: If `countries` is not a list or None.
+            ValueError: If no valid countries are provided, a region is requested in streaming
+                mode, the engine is unknown or the order is "auto" with the "fast" engine.
+
+        Returns:
+            pandas.DataFrame: A tidy DataFrame with the columns "Entity", "Year" and "tfp",
+            one row per country and forecast year.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.forecast(['United States', 'China', 'India'])
+        """
+        if engine not in ("arima", "fast"):
+            raise ValueError("engine must be 'arima' or 'fast'")
+        if isinstance(order, str) and (order != "auto" or engine == "fast"):
+            raise ValueError("order must be a (p, d, q) tuple, or 'auto' with the 'arima' engine")
+
+        series = self._tfp_series(countries)
+        self.profiler.phase("fit")
+        if order == "auto":
+            selected = select_orders(
+                series,
+                grid=self.order_grid,
+                max_workers=max_workers,
+                cache=self.forecast_cache if use_cache else None,
+            )
+            order = {country: country_order for country, (_, country_order) in selected.items()}
+            self.orders.update(order)
+        if engine == "fast":
+            return fast_batch_forecast(series, order=order, end_year=end_year)
+        return batch_forecast(
+            series,
+            order=order,
+            end_year=end_year,
+            max_workers=max_workers,
+            cache=self.forecast_cache if use_cache else None,
+        )
+
+    @profiled
+    def backtest(
+        self,
+        countries: Optional[list] = None,
+        order: Union[tuple, str] = (20, 2, 2),
+        cutoffs: Optional[list] = None,
+        horizon: int = 10,
+        max_workers: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Measures the out-of-sample errors of the TFP forecasts of `forecast` by rolling-origin
+        backtesting: for every cutoff year, the ARIMA model of each country is fitted on the
+        years up to the cutoff, and its forecasts of the next `horizon` years are compared with
+        the observed TFP.
+
+        The (country, cutoff) fits run in a process pool that uses all cores by default, and the
+        fits of consecutive cutoffs start from each other's parameters (see
+        `forecasting.backtest`).
+
+        Parameters:
+            countries (list, optional): The countries to backtest. If None, all countries in the
+                dataset are backtested.
+            order (tuple or str): The (p, d, q) order of the ARIMA models, or "auto" for the
+                orders selected by `select_orders`. The orders are selected on the whole series,
+                so "auto" measures the errors of the selected models rather than of the search.
+            cutoffs (list, optional): The last years of the training data, by default the
+                `horizon` years before the last year of every country.
+            horizon (int): The number of years forecast after every cutoff.
+            max_workers (int, optional): The number of worker processes, defaults to the number
+                of cores.
+
+        Raises:
+            TypeError: If `countries` is not a list or None.
+            ValueError: If no valid countries are provided, the order is an unknown string or
+                the horizon is not positive.
+
+        Returns:
+            pandas.DataFrame: The columns "Entity", "horizon", "MAE", "MAPE" (in percent) and
+            "count" (the number of scored forecasts), one row per country and horizon.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.backtest(['Germany', 'France'], order=(2, 1, 0), cutoffs=range(2000, 2015))
+        """
+        if isinstance(order, str) and order != "auto":
+            raise ValueError("order must be a (p, d, q) tuple or 'auto'")
+
+        series = self._tfp_series(countries)
+        self.profiler.phase("fit")
+        if order == "auto":
+            selected = select_orders(series, grid=self.order_grid, max_workers=max_workers,
+                                     cache=self.forecast_cache)
+            order = {country: country_order for country, (_, country_order) in selected.items()}
+            self.orders.update(order)
+        return backtest(series, order=order, cutoffs=cutoffs, horizon=horizon, max_workers=max_workers)
+
+    @profiled
+    def plot_forecast(
+        self, forecasts: pd.DataFrame, output: Optional[str] = None
+    ) -> Union[None, "Figure", bytes, str]:
+        """
+        Plots the observed Total Factor Productivity (TFP) of every country in `forecasts`
+        together with its forecast, as returned by the `forecast` method.
+
+        Parameters:
+            forecasts (pandas.DataFrame): Forecasts with the columns "Entity", "Year" and "tfp".
+            output (str, optional): None to show the plot, "figure", "png", "svg" or a .png/.svg
+                path (see `_render`).
+
+        Raises:
+            TypeError: If `forecasts` is not a pandas DataFrame.
+
+        Returns:
+            None, or the figure, image bytes or path according to `output`.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.plot_forecast(my_object.forecast(['Germany']))
+        """
+        if not isinstance(forecasts, pd.DataFrame):
+            raise TypeError("forecasts is not a DataFrame, Please pass the result of forecast")
+
+        self._check_output(output)
+
+        self.profiler.phase("load")
+        if self._needs_data():
+            self.get_data(geographical=False)  # check if df is available
+        self.profiler.phase("compute")
+
+        fig = self._new_figure(output, figsize=(12, 8))
+        ax = fig.add_subplot()
+
+        for country, predictions in forecasts.groupby("Entity", sort=False):
+            # Plot the TFP for the current country, or the weighted TFP of a region
+            if self._is_region(country):
+                data = self._region_frame(country, ["Year", "tfp"]).dropna()
+            else:
+                data = self._entity_frame(country, ["Year", "tfp"])
+            ax.plot(data["Year"].values, data["tfp"].values, label=country)
             # Plot the predicted TFP using a different line style
             ax.plot(
-                np.arange(years[-1], years[-1] + 31),
-                predictions,
+                predictions["Year"].values,
+                predictions["tfp"].values,
                 linestyle="--",
                 color=ax.get_lines()[-1].get_color(),
                 label=f"{country} (forecast)",
@@ -737,15 +3751,72 @@ class Group01:
 
         # Set the title and legend for the plot
         ax.set_title("Total Factor Productivity (TFP) by Year")
-        plt.xlabel("Year", fontsize=14)
-        plt.ylabel("Total Factor Productivity", fontsize=14)
+        ax.set_xlabel("Year", fontsize=14)
+        ax.set_ylabel("Total Factor Productivity", fontsize=14)
         ax.legend()
         # Add the source of the data as a subtitle
-        fig = plt.gcf()
         fig.suptitle(
             "Source: Agricultural total factor productivity (USDA), OWID",
             fontsize=10,
             y=-0.05,
         )
         # Show the plot
-        plt.show()
+        return self._render(fig, output)
+
+    @profiled
+    def predictor(
+        self,
+        countries: list,
+        max_workers: Optional[int] = None,
+        engine: str = "arima",
+        output: Optional[str] = None,
+        order: Union[tuple, str] = (20, 2, 2),
+    ) -> Union[None, "Figure", bytes, str]:
+        """
+        Plots the Total Factor Productivity (TFP) of the given countries
+        and predicts TFP up to 2050 using ARIMA. Arima is used instead of
+        SARIMAX because it was no seasonality in the data. It was checked by
+        plotting ACF and PACF plots and by checking the seasonal decomposition
+        plot. It is oserved by the autocorrelation that the time series of the
+        data does show a long-term trend or systematic patterns that could affect
+        its statistical properties. Thats why we have to use the differencing
+        parameter 'd' to remove the trend and make the data stationary and smooth
+        the variance and mean. It is important becasue an accurate prediction can
+        only be made for stationary series, since the data are otherwise randomly
+        distributed and randomness cannot be forecasted.
+
+        The order of the autoregressive (AR) component parameter 'p' is set to 20.
+        The degree of differencing (I) parameter 'd' is set to 2.
+        The order of the moving average (MA) component parameter 'q' is set to 2.
+        With `order="auto"`, the order of every country is selected by information criterion
+        instead (see `select_orders`).
+
+        The models are fitted with the `forecast` method and the result is plotted with the
+        `plot_forecast` method.
+
+        Parameters:
+            countries (list): A list of country names to plot, or regions of `get_regions`.
+            max_workers (int, optional): The number of worker processes used to fit the models.
+            engine (str): "arima", or "fast" for the vectorized AR approximation of `forecast`.
+            output (str, optional): None to show the plot, "figure", "png", "svg" or a .png/.svg
+                path (see `_render`).
+            order (tuple or str): The (p, d, q) order of the models, or "auto".
+
+        Raises:
+            TypeError: If the received argument is not a list.
+            ValueError: If no valid countries are provided or the engine is unknown.
+
+        Returns:
+            None, or the figure, image bytes or path according to `output`.
+
+        Example usage:
+            my_object = Group01("my_object")
+            my_object.predictor(['United States', 'China', 'India'])
+            my_object.predictor(['United States'], order="auto")
+
+        """
+        self._check_output(output)
+        forecasts = self.forecast(
+            countries, order=order, max_workers=max_workers, engine=engine
+        )
+        return self.plot_forecast(forecasts, output=output)
@@ -0,0 +1,301 @@
+"""
+This module contains the profiler of the `Group01` class, which times the phases of its methods
+(load, index, compute, fit, render) to find where the time of a slow call goes.
+
+A method decorated with `profiled` is timed as a whole, and calls `Profiler.phase` to mark where
+each of its phases starts; a phase lasts until the next one starts or the method returns, so the
+phases of a call do not overlap and add up to its total. The time before the first phase (checks
+of the arguments and lazy imports) is the "setup" phase. Calls of other profiled methods inside
+a phase are timed as their own calls. When the profiler is disabled, both only check a flag.
+
+The profiler keeps aggregate statistics per method and phase, and the latest events, which can
+be exported as JSON or in the Chrome trace event format (chrome://tracing, Perfetto).
+
+Functions:
+---------
+profiled(method):
+    Decorates a method of a class with a `profiler` attribute.
+
+Classes:
+-------
+Profiler(enabled, max_events):
+    Records the calls and phases of profiled methods.
+
+
+Example usage:
+--------------
+    my_object = Group01("my_object", profile=True)
+    my_object.predictor(["Germany"])
+    my_object.profiler.stats()
+    my_object.profiler.to_chrome_trace("trace.json")
+"""
+
+import os
+import json
+import time
+import functools
+import threading
+from collections import deque
+from typing import Optional
+import pandas as pd
+
+
+class Profiler:
+    """
+    Records the calls of profiled methods and of their phases.
+
+    Attributes:
+    ----------
+    enabled : bool
+        whether calls and phases are recorded, can be switched at any time
+
+    max_events : int
+        number of latest events kept for the exports, the statistics cover all events
+
+    Methods:
+    -------
+    call(method):
+        Context manager that times one call of a method.
+
+    phase(name):
+        Starts a phase of the current call.
+
+    stats():
+        Returns the aggregate statistics per method and phase.
+
+    to_json(path), to_chrome_trace(path):
+        Export the events.
+
+    reset():
+        Forgets all events and statistics.
+    """
+
+    def __init__(self, enabled: bool = False, max_events: int = 100_000):
+        """
+        Initializes a profiler.
+
+        Parameters:
+            enabled: bool, whether calls and phases are recorded.
+            max_events: int, number of latest events kept for the exports.
+        """
+        self.enabled = enabled
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter_ns()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forgets all events and statistics.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._events = deque(maxlen=self.max_events)
+            # (method, phase) -> [count, total, min, max] in nanoseconds
+            self._stats = {}
+
+    def _record(self, method: str, phase: str, start: int, end: int, depth: int) -> None:
+        """
+        Records one event, times in nanoseconds of `time.perf_counter_ns`.
+        """
+        duration = end - start
+        with self._lock:
+            self._events.append(
+                (method, phase, start - self._origin, duration, depth, os.getpid(), threading.get_ident())
+            )
+            stats = self._stats.get((method, phase))
+            if stats is None:
+                self._stats[(method, phase)] = [1, duration, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = min(stats[2], duration)
+                stats[3] = max(stats[3], duration)
+
+    def _stack(self) -> list:
+        """
+        Returns the stack of the current calls of this thread, one [method, phase, start, call
+        start] frame per call.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _close_phase(self, frame: list, now: int, depth: int) -> None:
+        """
+        Records the current phase of a frame, unless it is empty.
+        """
+        if now > frame[2]:
+            self._record(frame[0], frame[1], frame[2], now, depth + 1)
+
+    def call(self, method: str) -> "_Call":
+        """
+        Returns a context manager that times one call of `method` as its "total" phase, see
+        `profiled`.
+
+        Parameters:
+            method: str, name of the method.
+
+        Returns:
+            A context manager.
+        """
+        return _Call(self, method)
+
+    def phase(self, name: str) -> None:
+        """
+        Starts the phase `name` of the current profiled call, which ends the previous phase. Does
+        nothing if the profiler is disabled or there is no profiled call.
+
+        Parameters:
+            name: str, name of the phase, like "load", "index", "compute", "fit" or "render".
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        stack = self._stack()
+        if not stack:
+            return
+        now = time.perf_counter_ns()
+        frame = stack[-1]
+        self._close_phase(frame, now, len(stack) - 1)
+        frame[1] = name
+        frame[2] = now
+
+    def stats(self) -> pd.DataFrame:
+        """
+        Returns the aggregate statistics of every method and phase, "total" being the whole call.
+
+        Returns:
+            pandas.DataFrame: The columns "method", "phase", "count", "total", "mean", "min" and
+            "max", times in seconds.
+        """
+        with self._lock:
+            rows = [
+                (method, phase, count, total / 1e9, total / count / 1e9, low / 1e9, high / 1e9)
+                for (method, phase), (count, total, low, high) in sorted(self._stats.items())
+            ]
+        return pd.DataFrame(rows, columns=["method", "phase", "count", "total", "mean", "min", "max"])
+
+    def _events_list(self) -> list:
+        """
+        Returns a copy of the kept events.
+        """
+        with self._lock:
+            return list(self._events)
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """
+        Exports the statistics and the kept events as JSON.
+
+        Parameters:
+            path: str, optional, a file to write the JSON into.
+
+        Returns:
+            str: The JSON document, with "stats" (see `stats`) and "events" (method, phase, start
+            and duration in seconds, depth, pid and thread id).
+        """
+        document = {
+            "stats": self.stats().to_dict(orient="records"),
+            "events": [
+                {
+                    "method": method,
+                    "phase": phase,
+                    "start": start / 1e9,
+                    "duration": duration / 1e9,
+                    "depth": depth,
+                    "pid": pid,
+                    "tid": tid,
+                }
+                for method, phase, start, duration, depth, pid, tid in self._events_list()
+            ],
+        }
+        text = json.dumps(document)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def to_chrome_trace(self, path: Optional[str] = None) -> str:
+        """
+        Exports the kept events in the Chrome trace event format, for chrome://tracing or
+        Perfetto. Every call is a complete event named after the method, with its phases as
+        nested events.
+
+        Parameters:
+            path: str, optional, a file to write the trace into.
+
+        Returns:
+            str: The JSON trace.
+        """
+        events = [
+            {
+                "name": method if phase == "total" else phase,
+                "cat": method,
+                "ph": "X",
+                "ts": start / 1e3,
+                "dur": duration / 1e3,
+                "pid": pid,
+                "tid": tid,
+            }
+            for method, phase, start, duration, _, pid, tid in self._events_list()
+        ]
+        text = json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+
+class _Call:
+    """
+    Context manager of `Profiler.call`.
+    """
+
+    __slots__ = ("profiler", "method")
+
+    def __init__(self, profiler: Profiler, method: str):
+        self.profiler = profiler
+        self.method = method
+
+    def __enter__(self):
+        now = time.perf_counter_ns()
+        self.profiler._stack().append([self.method, "setup", now, now])
+        return self
+
+    def __exit__(self, *exc_info):
+        now = time.perf_counter_ns()
+        stack = self.profiler._stack()
+        frame = stack.pop()
+        self.profiler._close_phase(frame, now, len(stack))
+        self.profiler._record(frame[0], "total", frame[3], now, len(stack))
+        return False
+
+
+def profiled(method):
+    """
+    Decorates a method of a class whose instances have a `profiler` attribute (a `Profiler`),
+    so that every call is timed when the profiler is enabled.
+
+    Parameters:
+        method: the method to decorate.
+
+    Returns:
+        The decorated method.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = self.profiler
+        if not profiler.enabled:
+            return method(self, *args, **kwargs)
+        with profiler.call(name):
+            return method(self, *args, **kwargs)
+
+    return wrapper
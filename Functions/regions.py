@@ -0,0 +1,509 @@
+"""
+This module contains the regions of the `Group01` class, which rebuild the aggregates of
+several countries that are dropped from the data (see `group01.AGGREGATED_ENTITIES`).
+
+A `RegionHierarchy` maps every region to its members, which are countries or other regions, and
+resolves every region to the countries it covers. Its membership matrix is a sparse
+region x entity matrix of ones, so the sums of every region, year and metric are one sparse
+matrix product with the dense Year x Entity x metric cube of the data. The same product also
+returns the weighted sums and the weights needed for weighted averages, and the number of
+member countries with a value.
+
+The default hierarchy follows the regions of the USDA source. The memberships of its smaller
+regions were checked against the aggregate rows of the source; the income and development
+groups are left out, as the countries they cover change over the years. "World" covers every
+country-level entity of the data, either as a member or through the entity of `COUNTED_IN`
+that includes its values.
+
+Classes:
+-------
+RegionHierarchy(regions):
+    Resolves regions to countries and builds their membership matrix.
+
+RegionRollup:
+    The sums and weighted averages of every region, year and metric.
+
+Functions:
+---------
+rollup(hierarchy, values, entities, years, metrics, weight):
+    Aggregates a Year x Entity x metric array over the regions of a hierarchy.
+
+
+Example usage:
+--------------
+    hierarchy = RegionHierarchy()
+    hierarchy.countries("North Africa")  # ['Algeria', 'Egypt', 'Libya', 'Morocco', 'Tunisia']
+    hierarchy.add_region("Benelux", ["Belgium", "Netherlands", "Luxembourg"])
+"""
+
+from typing import NamedTuple, Optional
+import numpy as np
+
+# Members of every region, countries or other regions
+REGIONS = {
+    "World": ["Africa", "Americas", "Asia", "Europe", "Oceania"],
+    # Africa
+    "Africa": ["North Africa", "Sub-Saharan Africa"],
+    "North Africa": ["Algeria", "Egypt", "Libya", "Morocco", "Tunisia"],
+    "Sub-Saharan Africa": [
+        "Central Africa",
+        "East Africa",
+        "Horn of Africa",
+        "Sahel",
+        "Southern Africa",
+        "Southern African Customs Union",
+        "West Africa",
+    ],
+    "Central Africa": [
+        "Cameroon",
+        "Central African Republic",
+        "Congo",
+        "Democratic Republic of Congo",
+        "Equatorial Guinea",
+        "Gabon",
+        "Sao Tome and Principe",
+    ],
+    "East Africa": ["Burundi", "Kenya", "Rwanda", "Tanzania", "Uganda"],
+    "Horn of Africa": ["Djibouti", "Eritrea", "Ethiopia", "Somalia", "South Sudan", "Sudan"],
+    "Sahel": [
+        "Burkina Faso",
+        "Cape Verde",
+        "Chad",
+        "Gambia",
+        "Mali",
+        "Mauritania",
+        "Niger",
+        "Senegal",
+    ],
+    "Southern Africa": [
+        "Angola",
+        "Comoros",
+        "Madagascar",
+        "Malawi",
+        "Mauritius",
+        "Mozambique",
+        "Zambia",
+        "Zimbabwe",
+    ],
+    "Southern African Customs Union": ["Botswana", "Eswatini", "Lesotho", "Namibia", "South Africa"],
+    "West Africa": [
+        "Benin",
+        "Cote d'Ivoire",
+        "Ghana",
+        "Guinea",
+        "Guinea-Bissau",
+        "Liberia",
+        "Nigeria",
+        "Sierra Leone",
+        "Togo",
+    ],
+    # Americas
+    "Americas": ["North America", "Latin America and the Caribbean"],
+    "North America": ["Canada", "United States"],
+    "Latin America and the Caribbean": ["Caribbean", "Central America", "South America"],
+    "Caribbean": [
+        "Bahamas",
+        "Cuba",
+        "Dominican Republic",
+        "Haiti",
+        "Jamaica",
+        "Puerto Rico",
+        "Trinidad and Tobago",
+    ],
+    "Central America": [
+        "Belize",
+        "Costa Rica",
+        "El Salvador",
+        "Guatemala",
+        "Honduras",
+        "Mexico",
+        "Nicaragua",
+        "Panama",
+    ],
+    "South America": [
+        "Argentina",
+        "Bolivia",
+        "Brazil",
+        "Chile",
+        "Colombia",
+        "Ecuador",
+        "French Guiana",
+        "Guyana",
+        "Paraguay",
+        "Peru",
+        "Suriname",
+        "Uruguay",
+        "Venezuela",
+    ],
+    # Asia
+    "Asia": [
+        "Central Asia",
+        "Developed Asia",
+        "Northeast Asia",
+        "South Asia",
+        "Southeast Asia",
+        "West Asia",
+    ],
+    "Central Asia": ["Afghanistan", "Kyrgyzstan", "Tajikistan", "Turkmenistan", "Uzbekistan"],
+    "Developed Asia": ["Japan", "South Korea", "Taiwan"],
+    "Northeast Asia": ["China", "Mongolia", "North Korea"],
+    "South Asia": ["Bangladesh", "Bhutan", "India", "Nepal", "Pakistan", "Sri Lanka"],
+    "Southeast Asia": [
+        "Brunei",
+        "Cambodia",
+        "Indonesia",
+        "Laos",
+        "Malaysia",
+        "Myanmar",
+        "Philippines",
+        "Thailand",
+        "Timor",
+        "Vietnam",
+    ],
+    "West Asia": [
+        "Armenia",
+        "Azerbaijan",
+        "Bahrain",
+        "Cyprus",
+        "Georgia",
+        "Iran",
+        "Iraq",
+        "Israel",
+        "Jordan",
+        "Kuwait",
+        "Lebanon",
+        "Oman",
+        "Palestine",
+        "Qatar",
+        "Saudi Arabia",
+        "Syria",
+        "Turkey",
+        "United Arab Emirates",
+        "Yemen",
+    ],
+    # Europe
+    "Europe": [
+        "Central Europe",
+        "Eastern Europe",
+        "Northern Europe",
+        "Southern Europe",
+        "Western Europe",
+    ],
+    # Serbia and Montenegro only, its rows are the sum of both after their separation
+    "Central Europe": [
+        "Albania",
+        "Bosnia and Herzegovina",
+        "Bulgaria",
+        "Croatia",
+        "Czechia",
+        "Hungary",
+        "North Macedonia",
+        "Poland",
+        "Romania",
+        "Serbia and Montenegro",
+        "Slovakia",
+        "Slovenia",
+    ],
+    "Eastern Europe": ["Belarus", "Kazakhstan", "Moldova", "Russia", "Ukraine"],
+    "Northern Europe": [
+        "Estonia",
+        "Finland",
+        "Iceland",
+        "Latvia",
+        "Lithuania",
+        "Norway",
+        "Sweden",
+    ],
+    "Southern Europe": ["Greece", "Italy", "Malta", "Portugal", "Spain"],
+    "Western Europe": [
+        "Austria",
+        "Belgium",
+        "Denmark",
+        "France",
+        "Germany",
+        "Ireland",
+        "Luxembourg",
+        "Netherlands",
+        "Switzerland",
+        "United Kingdom",
+    ],
+    # Oceania
+    "Oceania": ["Australia", "New Zealand", "Pacific"],
+    "Pacific": [
+        "Fiji",
+        "Micronesia",
+        "New Caledonia",
+        "Papua New Guinea",
+        "Polynesia",
+        "Solomon Islands",
+        "Vanuatu",
+    ],
+    # Groups across the regions
+    "Former Soviet Union": [
+        "Armenia",
+        "Azerbaijan",
+        "Belarus",
+        "Estonia",
+        "Georgia",
+        "Kazakhstan",
+        "Kyrgyzstan",
+        "Latvia",
+        "Lithuania",
+        "Moldova",
+        "Russia",
+        "Tajikistan",
+        "Turkmenistan",
+        "Ukraine",
+        "Uzbekistan",
+    ],
+}
+
+# Entities of the data whose values are already in the rows of another entity of `REGIONS`, and
+# are left out of the regions so that they are not counted twice
+COUNTED_IN = {
+    "Montenegro": "Serbia and Montenegro",
+    "Serbia": "Serbia and Montenegro",
+}
+
+
+class RegionRollup(NamedTuple):
+    """
+    The aggregates of every region, year and metric, returned by `rollup` and
+    `Group01.get_rollup`.
+
+    Attributes:
+    ----------
+    sums : numpy.ndarray
+        float array of shape (regions, years, metrics), the sum of every metric over the member
+        countries, NaN where no member has a value
+
+    averages : numpy.ndarray
+        float array of shape (regions, years, metrics), the average of every metric over the
+        member countries weighted by the `weight` metric, NaN where no member has both values
+
+    counts : numpy.ndarray
+        int array of shape (regions, years, metrics), the number of members with a value
+
+    regions : list
+        the regions of the first axis
+
+    years : numpy.ndarray
+        the years of the second axis, in increasing order
+
+    metrics : list
+        the columns of the third axis
+
+    weight : str
+        the metric the averages are weighted by
+
+    region_positions, year_positions, metric_positions : dict
+        the position of every region, year and metric on its axis
+    """
+
+    sums: np.ndarray
+    averages: np.ndarray
+    counts: np.ndarray
+    regions: list
+    years: np.ndarray
+    metrics: list
+    weight: str
+    region_positions: dict
+    year_positions: dict
+    metric_positions: dict
+
+
+class RegionHierarchy:
+    """
+    A hierarchy of regions, whose members are countries or other regions.
+
+    Attributes:
+    ----------
+    regions : dict
+        the members of every region, in their order
+
+    version : int
+        incremented by every change of the regions, to invalidate results derived from them
+
+    Methods:
+    -------
+    add_region(name, members):
+        Adds or replaces a region.
+
+    countries(region):
+        Returns the countries covered by a region.
+
+    membership(entities):
+        Returns the sparse region x entity membership matrix.
+    """
+
+    def __init__(self, regions: Optional[dict] = None):
+        """
+        Initializes a hierarchy.
+
+        Parameters:
+            regions: dict, optional, the members of every region, `REGIONS` if None.
+
+        Raises:
+            ValueError: If a region contains itself
+        """
+        self.regions = {}
+        self.version = 0
+        for name, members in (REGIONS if regions is None else regions).items():
+            self.regions[name] = list(members)
+        self._resolved = {}
+        for name in self.regions:
+            self.countries(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.regions
+
+    def add_region(self, name: str, members: list) -> None:
+        """
+        Adds a region, or replaces the members of an existing one.
+
+        Parameters:
+            name: str, the name of the region.
+            members: list, its countries and regions.
+
+        Raises:
+            TypeError: If `members` is not a list of strings
+            ValueError: If the region would contain itself
+
+        Returns:
+            None
+        """
+        if not isinstance(members, list) or not all(isinstance(member, str) for member in members):
+            raise TypeError("members is not a list of strings, Please pass a list of names")
+        previous = self.regions.get(name)
+        self.regions[name] = list(members)
+        self._resolved = {}
+        try:
+            for region in self.regions:
+                self.countries(region)
+        except ValueError:
+            if previous is None:
+                del self.regions[name]
+            else:
+                self.regions[name] = previous
+            self._resolved = {}
+            raise
+        self.version += 1
+
+    def countries(self, region: str, _path: tuple = ()) -> list:
+        """
+        Returns the countries covered by a region, resolving its member regions.
+
+        Parameters:
+            region: str, a region of the hierarchy.
+
+        Raises:
+            KeyError: If the region is not in the hierarchy
+            ValueError: If the region contains itself
+
+        Returns:
+            list: The countries, in the order of the members, each once.
+        """
+        if region in self._resolved:
+            return list(self._resolved[region])
+        if region in _path:
+            raise ValueError(f"Region {region!r} contains itself")
+        countries = {}
+        for member in self.regions[region]:
+            if member in self.regions:
+                countries.update(dict.fromkeys(self.countries(member, _path + (region,))))
+            else:
+                countries[member] = None
+        self._resolved[region] = list(countries)
+        return list(countries)
+
+    def membership(self, entities: list):
+        """
+        Returns the membership matrix of the regions over the given entities: the entry of a
+        region and an entity is 1 if the region covers the entity and 0 otherwise. The
+        countries of a region that are not among the entities are ignored.
+
+        Parameters:
+            entities: list, the entities of the columns.
+
+        Returns:
+            scipy.sparse.csr_matrix: The matrix of shape (regions, entities), with the regions in
+            the order of `regions`.
+        """
+        from scipy import sparse
+
+        positions = {entity: i for i, entity in enumerate(entities)}
+        rows, columns = [], []
+        for row, region in enumerate(self.regions):
+            for country in self.countries(region):
+                if country in positions:
+                    rows.append(row)
+                    columns.append(positions[country])
+        return sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)), shape=(len(self.regions), len(entities))
+        )
+
+
+def rollup(
+    hierarchy: RegionHierarchy,
+    values: np.ndarray,
+    entities: list,
+    years: np.ndarray,
+    metrics: list,
+    weight: str,
+) -> RegionRollup:
+    """
+    Aggregates a Year x Entity x metric array over the regions of a hierarchy. The sums, the
+    weighted sums, the sums of the weights and the counts of every region, year and metric are
+    computed by one product of the membership matrix with the four arrays stacked side by side.
+
+    Parameters:
+        hierarchy: RegionHierarchy, the regions.
+        values: numpy.ndarray, float array of shape (years, entities, metrics), NaN where there
+            is no value.
+        entities, years, metrics: the labels of the axes of `values`.
+        weight: str, the metric the averages are weighted by.
+
+    Raises:
+        ValueError: If `weight` is not one of the metrics
+
+    Returns:
+        RegionRollup: The aggregates.
+    """
+    if weight not in metrics:
+        raise ValueError(f"Weight {weight!r} is not a metric of the data")
+    n_years, n_entities, n_metrics = values.shape
+
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    weights = filled[:, :, metrics.index(weight)][:, :, None]
+    # A value only counts in an average where its weight is known
+    weighted = present & present[:, :, [metrics.index(weight)]]
+    stacked = np.stack(
+        [filled, np.where(weighted, filled * weights, 0.0), weighted * weights, present],
+        axis=0,
+    )
+    # (4, years, entities, metrics) -> (entities, 4 * years * metrics)
+    stacked = stacked.transpose(2, 0, 1, 3).reshape(n_entities, -1)
+
+    matrix = hierarchy.membership(entities)
+    product = np.asarray(matrix @ stacked).reshape(len(hierarchy.regions), 4, n_years, n_metrics)
+    sums, weighted_sums, weight_sums, counts = (product[:, i] for i in range(4))
+
+    counts = np.rint(counts).astype(np.int64)
+    sums = np.where(counts > 0, sums, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = np.where(weight_sums > 0, weighted_sums / weight_sums, np.nan)
+
+    regions = list(hierarchy.regions)
+    return RegionRollup(
+        sums=sums,
+        averages=averages,
+        counts=counts,
+        regions=regions,
+        years=years,
+        metrics=list(metrics),
+        weight=weight,
+        region_positions={region: i for i, region in enumerate(regions)},
+        year_positions={int(year): i for i, year in enumerate(years)},
+        metric_positions={metric: i for i, metric in enumerate(metrics)},
+    )
@@ -0,0 +1,317 @@
+"""
+This module contains the shared datasets of the `Group01` class, which let many objects and
+worker processes use one copy of the data instead of one copy each.
+
+A dataset is published once into a directory of .npy files: the Entity column as categorical
+codes, and the columns of every dtype as one two-dimensional array in column-major order, the
+block pandas consolidates them into. Every process opens the files as read-only memory maps, so
+their pages are shared through the page cache of the operating system, and
+`SharedDataset.frame` wraps them in a DataFrame without copying them. As its blocks are already
+consolidated, pandas never copies them into the object either, for example when columns are
+selected. Writing into that DataFrame raises a ValueError, the shared data cannot be changed.
+
+Every publication writes a new version directory inside the dataset directory, and then switches
+the pointer file "current.json" to it with one atomic rename: a process always opens a complete
+version, and a failed publication leaves the previous one in place.
+
+The datasets and other read-only objects (like the geometries of the map, which cannot be
+memory-mapped) are kept in a registry, so the objects of one process open each of them only
+once.
+
+Classes:
+-------
+SharedDataset(store_dir):
+    Opens a dataset written by `SharedDataset.publish`.
+
+Functions:
+---------
+shared_dataset(store_dir, checksum, df):
+    Returns the dataset of the registry, opening or publishing it if needed.
+
+shared_object(key, factory):
+    Returns a read-only object of the registry, creating it if needed.
+
+
+Example usage:
+--------------
+    df = shared_dataset("downloads/shared/data", checksum, df=df).frame()
+    # in other objects and processes, without reading the data again
+    df = shared_dataset("downloads/shared/data", checksum).frame()
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+from typing import Callable, Optional
+import numpy as np
+import pandas as pd
+
+# Objects of the registry by key, see shared_dataset and shared_object
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+# The file of a dataset directory naming its current version
+POINTER = "current.json"
+# Version of the layout of the files, the datasets of other layouts are published again
+FORMAT = 2
+
+
+def _current_version(store_dir: str) -> Optional[str]:
+    """
+    Returns the name of the current version directory of a dataset, None if it has none.
+    """
+    try:
+        with open(os.path.join(store_dir, POINTER), "r", encoding="utf-8") as f:
+            return json.load(f)["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class SharedDataset:
+    """
+    A DataFrame stored as read-only memory-mapped arrays, shared by every object and process
+    that opens it.
+
+    Attributes:
+    ----------
+    store_dir : str
+        the directory of the dataset
+
+    version_dir : str
+        the directory of the version of the dataset that was opened
+
+    checksum : str
+        checksum of the source the dataset was published from
+
+    columns : list
+        the columns of the published DataFrame, in its order (the frames group them by dtype)
+
+    nbytes : int
+        the bytes of the arrays, which are mapped once whatever the number of frames
+
+    Methods:
+    -------
+    publish(df, store_dir, checksum):
+        Writes a DataFrame into a new dataset.
+
+    open(store_dir, checksum):
+        Opens a dataset, if it was published from the same source.
+
+    frame():
+        Returns a read-only DataFrame of the dataset, without copying it.
+    """
+
+    def __init__(self, store_dir: str):
+        """
+        Opens the current version of the dataset written by `publish` in `store_dir`.
+
+        Parameters:
+            store_dir: str, the directory of the dataset.
+
+        Raises:
+            FileNotFoundError: If `store_dir` has no published version
+            ValueError: If the version has another layout than `FORMAT`
+        """
+        version = _current_version(store_dir)
+        if version is None:
+            raise FileNotFoundError(f"{store_dir} has no published dataset")
+        self.store_dir = store_dir
+        self.version_dir = os.path.join(store_dir, version)
+        with open(os.path.join(self.version_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT:
+            raise ValueError(f"{self.version_dir} has another layout")
+        self.checksum = manifest["checksum"]
+        self.columns = manifest["columns"]
+
+        def load(name):
+            return np.load(os.path.join(self.version_dir, name), mmap_mode="r")
+
+        self._index = load("index.npy")
+        self._codes = load("entity_codes.npy")
+        categories = np.load(os.path.join(self.version_dir, "entity_categories.npy"))
+        self._categories = pd.CategoricalDtype(categories.astype(object))
+        self._blocks = [(block["columns"], load(block["file"])) for block in manifest["blocks"]]
+        self.nbytes = self._index.nbytes + self._codes.nbytes
+        self.nbytes += sum(values.nbytes for _, values in self._blocks)
+
+    @classmethod
+    def open(cls, store_dir: str, checksum: Optional[str]) -> Optional["SharedDataset"]:
+        """
+        Opens the dataset in `store_dir` if it was published from a source with the given
+        checksum.
+
+        Parameters:
+            store_dir: str, the directory of the dataset.
+            checksum: str, checksum of the current source, None to open any version.
+
+        Returns:
+            SharedDataset or None: The dataset, or None if there is none or it is outdated.
+        """
+        try:
+            dataset = cls(store_dir)
+            if checksum is not None and dataset.checksum != checksum:
+                return None
+            return dataset
+        except (OSError, ValueError, KeyError):
+            # A missing or truncated file invalidates the whole dataset
+            return None
+
+    @classmethod
+    def publish(cls, df: pd.DataFrame, store_dir: str, checksum: str) -> "SharedDataset":
+        """
+        Writes a DataFrame into a new version of the dataset in `store_dir`, which replaces the
+        current one. The files are written into a new version directory, and the pointer file
+        is switched to it by an atomic rename once they are complete, so a process never opens
+        a partly written version, and if writing fails the current version stays in place. The
+        version it replaces is kept for the processes that are opening it; the older ones are
+        removed. If other processes publish the same dataset at the same time, each opens its
+        own complete version and the last one switched stays current.
+
+        Parameters:
+            df: pandas.DataFrame, the data, with an "Entity" column and numeric other columns.
+            store_dir: str, the directory of the dataset.
+            checksum: str, checksum of the source of the data, see `open`.
+
+        Raises:
+            ValueError: If a column other than "Entity" is not numeric
+
+        Returns:
+            SharedDataset: The new dataset.
+        """
+        columns = [column for column in df.columns if column != "Entity"]
+        for column in columns:
+            if not pd.api.types.is_numeric_dtype(df[column]):
+                raise ValueError(f"Column {column!r} is not numeric and cannot be shared")
+
+        # Versions are named in the order of publication
+        version = f"v{time.time_ns():020d}-{os.getpid()}"
+        version_dir = os.path.join(store_dir, version)
+        # The pointer is written under another name and moved into place
+        pointer = os.path.join(store_dir, f"{POINTER}.{version}")
+        os.makedirs(version_dir)
+        try:
+            cls._write(df, columns, version_dir, checksum)
+            previous = _current_version(store_dir)
+            with open(pointer, "w", encoding="utf-8") as f:
+                json.dump({"version": version}, f)
+            os.replace(pointer, os.path.join(store_dir, POINTER))
+        except BaseException:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            if os.path.exists(pointer):
+                os.remove(pointer)
+            raise
+
+        # Remove the versions older than the one replaced, which no process opens any more
+        for name in os.listdir(store_dir):
+            if name.startswith("v") and previous is not None and name < previous:
+                shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+        return cls(store_dir)
+
+    @staticmethod
+    def _write(df: pd.DataFrame, columns: list, version_dir: str, checksum: str) -> None:
+        """
+        Writes the files of a version of the dataset, see `publish`. The manifest is written
+        last.
+        """
+        entities = pd.Categorical(df["Entity"])
+        np.save(os.path.join(version_dir, "index.npy"), df.index.to_numpy())
+        np.save(os.path.join(version_dir, "entity_codes.npy"), entities.codes)
+        np.save(
+            os.path.join(version_dir, "entity_categories.npy"),
+            entities.categories.to_numpy(dtype=str),
+        )
+
+        # The columns of every dtype, in the order of their first column, one array each
+        blocks = {}
+        for column in columns:
+            blocks.setdefault(str(df[column].dtype), []).append(column)
+        blocks = [
+            {"file": f"block_{i}.npy", "columns": block} for i, block in enumerate(blocks.values())
+        ]
+        for block in blocks:
+            values = np.asfortranarray(df[block["columns"]].to_numpy())
+            np.save(os.path.join(version_dir, block["file"]), values)
+
+        manifest = {
+            "format": FORMAT,
+            "checksum": checksum,
+            "columns": list(df.columns),
+            "blocks": blocks,
+        }
+        with open(os.path.join(version_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def frame(self) -> pd.DataFrame:
+        """
+        Returns the dataset as a new DataFrame whose blocks are the memory-mapped arrays. Only
+        the DataFrame object is new: the data is not copied, and writing into it raises a
+        ValueError. The "Entity" column is categorical.
+
+        Returns:
+            pandas.DataFrame: The data, with "Entity" first and the other columns grouped by
+            dtype, see `columns` for their published order.
+        """
+        parts = [
+            pd.DataFrame(values, columns=columns, copy=False) for columns, values in self._blocks
+        ]
+        # The blocks have different dtypes, so concat does not copy them into a new one
+        if parts:
+            df = pd.concat(parts, axis=1, copy=False)
+        else:
+            df = pd.DataFrame(index=range(len(self._codes)))
+        df.insert(0, "Entity", pd.Categorical.from_codes(self._codes, dtype=self._categories))
+        df.index = pd.Index(self._index, copy=False)
+        return df
+
+
+def shared_dataset(
+    store_dir: str, checksum: Optional[str], df: Optional[pd.DataFrame] = None
+) -> Optional[SharedDataset]:
+    """
+    Returns the dataset in `store_dir` from the registry of this process, and opens it into the
+    registry if it is not there or is outdated (see `SharedDataset.open`). If there is no up to
+    date dataset and `df` is given, `df` is published into `store_dir` first.
+
+    Parameters:
+        store_dir: str, the directory of the dataset.
+        checksum: str, checksum of the current source, None to accept any version.
+        df: pandas.DataFrame, optional, the data to publish if there is no dataset.
+
+    Raises:
+        ValueError: If a column of `df` other than "Entity" is not numeric
+
+    Returns:
+        SharedDataset or None: The dataset, or None if there is none or it is outdated.
+    """
+    key = ("dataset", os.path.abspath(store_dir))
+    with _REGISTRY_LOCK:
+        dataset = _REGISTRY.get(key)
+        if dataset is None or (checksum is not None and dataset.checksum != checksum):
+            dataset = SharedDataset.open(store_dir, checksum)
+            if dataset is None and df is not None:
+                dataset = SharedDataset.publish(df, store_dir, checksum)
+            if dataset is None:
+                return None
+            _REGISTRY[key] = dataset
+        return dataset
+
+
+def shared_object(key, factory: Callable):
+    """
+    Returns the object of the registry of this process with the given key, created by calling
+    `factory` if it is not there. The objects are shared by every caller and must not be
+    modified.
+
+    Parameters:
+        key: a hashable key, like the checksum of the file the object is read from.
+        factory: callable without arguments that creates the object.
+
+    Returns:
+        The object.
+    """
+    with _REGISTRY_LOCK:
+        if ("object", key) not in _REGISTRY:
+            _REGISTRY[("object", key)] = factory()
+        return _REGISTRY[("object", key)]
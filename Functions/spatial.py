@@ -0,0 +1,232 @@
+"""
+This module contains the spatial statistics of the `Group01` class: the adjacency of the
+geometries of the choropleth map, and the neighbour averages, Moran's I and hot spots of a
+metric computed with it.
+
+The adjacency is built with a `shapely.STRtree` of the geometries: one bulk query returns the
+pairs of geometries that touch (or lie within a distance of each other), without comparing
+every pair of polygons. It is stored as a sparse symmetric matrix of ones and cached on disk
+under a hash of the geometries, so it is only built once per version of the map.
+
+The statistics of all years are computed at once, the values of an entity in every year being a
+row of an entities x years array: the neighbour sums of all years are one product of the sparse
+matrix with that array. Missing values are left out of every year.
+
+Functions:
+---------
+geometry_key(geometries, distance):
+    Returns the hash identifying the adjacency of the geometries in the cache.
+
+adjacency(geometries, distance):
+    Returns the sparse adjacency matrix of the geometries.
+
+cached_adjacency(geometries, distance, cache_dir):
+    Returns the adjacency matrix from the disk cache, building and caching it if needed.
+
+spatial_lag(weights, values):
+    Returns the average of the neighbours of every entity.
+
+morans_i(weights, values):
+    Returns the global Moran's I of every year, with its z-score.
+
+getis_ord(weights, values):
+    Returns the Getis-Ord Gi* z-score of every entity and year, to find hot and cold spots.
+
+
+Example usage:
+--------------
+    weights = adjacency(np.asarray(my_object.df_geographical.geometry))
+    morans_i(weights, values)["I"]
+"""
+
+import os
+import hashlib
+from typing import Optional
+import numpy as np
+
+
+def geometry_key(geometries: np.ndarray, distance: float = 0.0) -> str:
+    """
+    Returns a key identifying an adjacency, the SHA-256 hash of the WKB of the geometries and
+    of the distance.
+
+    Parameters:
+        geometries: numpy.ndarray, the shapely geometries.
+        distance: float, the distance of the adjacency.
+
+    Returns:
+        str: The hexadecimal key.
+    """
+    import shapely
+
+    sha = hashlib.sha256(repr(float(distance)).encode())
+    for wkb in shapely.to_wkb(geometries):
+        sha.update(wkb)
+    return sha.hexdigest()
+
+
+def adjacency(geometries: np.ndarray, distance: float = 0.0):
+    """
+    Returns the adjacency matrix of the geometries: the entry of two different geometries is 1
+    if they intersect, or lie within `distance` of each other, and 0 otherwise. The pairs are
+    found by a bulk query of an STRtree of the geometries.
+
+    Parameters:
+        geometries: numpy.ndarray, the shapely geometries.
+        distance: float, the largest distance between neighbours, in the units of the
+            coordinates. With 0, only geometries sharing a border are neighbours.
+
+    Raises:
+        ValueError: If `distance` is negative
+
+    Returns:
+        scipy.sparse.csr_matrix: The symmetric matrix of shape (geometries, geometries).
+    """
+    from scipy import sparse
+    from shapely import STRtree
+
+    if distance < 0:
+        raise ValueError("distance must not be negative")
+    geometries = np.asarray(geometries)
+    tree = STRtree(geometries)
+    if distance > 0:
+        pairs = tree.query(geometries, predicate="dwithin", distance=distance)
+    else:
+        pairs = tree.query(geometries, predicate="intersects")
+    pairs = pairs[:, pairs[0] != pairs[1]]
+    matrix = sparse.csr_matrix(
+        (np.ones(pairs.shape[1]), (pairs[0], pairs[1])),
+        shape=(len(geometries), len(geometries)),
+    )
+    # The predicates are symmetric, this only guards against duplicated pairs
+    matrix = ((matrix + matrix.T) > 0).astype(float)
+    return matrix.tocsr()
+
+
+def cached_adjacency(geometries: np.ndarray, distance: float = 0.0, cache_dir: Optional[str] = None):
+    """
+    Returns the adjacency matrix of the geometries (see `adjacency`), read from `cache_dir` if
+    it was built for the same geometries and distance before, and written there otherwise.
+
+    Parameters:
+        geometries: numpy.ndarray, the shapely geometries.
+        distance: float, the largest distance between neighbours.
+        cache_dir: str, optional, the cache directory, no cache if None.
+
+    Returns:
+        scipy.sparse.csr_matrix: The symmetric matrix of shape (geometries, geometries).
+    """
+    from scipy import sparse
+
+    if cache_dir is None:
+        return adjacency(geometries, distance)
+    path = os.path.join(cache_dir, f"adjacency_{geometry_key(geometries, distance)}.npz")
+    try:
+        matrix = sparse.load_npz(path).tocsr()
+        if matrix.shape == (len(geometries), len(geometries)):
+            return matrix
+    except (OSError, ValueError):
+        pass
+    matrix = adjacency(geometries, distance)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written under another name and moved into place, so a reader never sees half a file
+    sparse.save_npz(f"{path}.tmp.npz", matrix)
+    os.replace(f"{path}.tmp.npz", path)
+    return matrix
+
+
+def _present(values: np.ndarray) -> tuple:
+    """
+    Returns the values with 0 instead of NaN, and the float mask of the values that are present.
+    """
+    present = ~np.isnan(values)
+    return np.where(present, values, 0.0), present.astype(float)
+
+
+def spatial_lag(weights, values: np.ndarray) -> np.ndarray:
+    """
+    Returns the spatial lag of every entity and year, the average value of its neighbours that
+    have a value in that year.
+
+    Parameters:
+        weights: scipy.sparse matrix, the adjacency of the entities.
+        values: numpy.ndarray, float array of shape (entities, years), NaN where there is no
+            value.
+
+    Returns:
+        numpy.ndarray: The lags, of shape (entities, years), NaN where no neighbour has a value.
+    """
+    filled, present = _present(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(
+            weights @ present > 0, (weights @ filled) / (weights @ present), np.nan
+        )
+
+
+def morans_i(weights, values: np.ndarray) -> dict:
+    """
+    Returns the global Moran's I of every year, over the entities with a value in that year,
+    with its expected value and z-score under the normality assumption.
+
+    Parameters:
+        weights: scipy.sparse matrix, the symmetric binary adjacency of the entities.
+        values: numpy.ndarray, float array of shape (entities, years), NaN where there is no
+            value.
+
+    Returns:
+        dict: Arrays of one value per year, "I", "expected", "z" and "n" (the number of
+        entities with a value), NaN where the statistic is not defined.
+    """
+    filled, present = _present(values)
+    n = present.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deviations = (filled - filled.sum(axis=0) / n) * present
+        # Only the pairs of entities with a value add to both sums, as the others are 0
+        cross = (deviations * (weights @ deviations)).sum(axis=0)
+        degrees = (weights @ present) * present
+        s0 = degrees.sum(axis=0)
+        i = n / s0 * cross / (deviations**2).sum(axis=0)
+        expected = -1 / (n - 1)
+        s1, s2 = 2 * s0, 4 * (degrees**2).sum(axis=0)
+        variance = (n**2 * s1 - n * s2 + 3 * s0**2) / ((n**2 - 1) * s0**2) - expected**2
+        z = (i - expected) / np.sqrt(variance)
+    defined = (s0 > 0) & (n > 2)
+    return {
+        "I": np.where(defined, i, np.nan),
+        "expected": np.where(n > 1, expected, np.nan),
+        "z": np.where(defined, z, np.nan),
+        "n": n.astype(int),
+    }
+
+
+def getis_ord(weights, values: np.ndarray) -> np.ndarray:
+    """
+    Returns the Getis-Ord Gi* statistic of every entity and year: the z-score of the sum of
+    the values of the entity and its neighbours against the values of all entities in that year.
+    Large positive scores are hot spots, clusters of high values, and large negative scores cold
+    spots.
+
+    Parameters:
+        weights: scipy.sparse matrix, the binary adjacency of the entities.
+        values: numpy.ndarray, float array of shape (entities, years), NaN where there is no
+            value.
+
+    Returns:
+        numpy.ndarray: The z-scores, of shape (entities, years), NaN where the entity or all of
+        its neighbours have no value.
+    """
+    from scipy import sparse
+
+    filled, present = _present(values)
+    n = present.sum(axis=0)
+    # Gi* counts the entity itself among its neighbours
+    star = weights + sparse.identity(weights.shape[0], format="csr")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=0) / n
+        deviation = np.sqrt((filled**2).sum(axis=0) / n - mean**2)
+        sums = star @ filled
+        counts = star @ present
+        scores = (sums - mean * counts) / (
+            deviation * np.sqrt((n * counts - counts**2) / (n - 1))
+        )
+    return np.where((present > 0) & (weights @ present > 0), scores, np.nan)
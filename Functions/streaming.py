@@ -0,0 +1,335 @@
+"""
+This module contains the out-of-core panel used by the `Group01` class in streaming mode, for
+datasets that do not fit in memory.
+
+The source CSV file is read in chunks. Every chunk is filtered and appended to one raw binary
+file per column, while the per-year aggregates (sums, sums of squares and counts of every
+numeric column), the row ranges of every entity and the row positions of every year are
+updated. Only one chunk is in memory at a time. The columns are memory-mapped afterwards, so
+reading the rows of one entity or one year only touches those rows. Numeric columns are
+stored as float64 and string columns as integer codes.
+
+Classes:
+-------
+StreamingPanel(store_dir):
+    Opens a panel written by `StreamingPanel.build`.
+
+
+Example usage:
+--------------
+    panel = StreamingPanel.build("downloads/data.csv", "downloads/stream", checksum)
+    panel.world                       # per-year sums of every numeric column
+    panel.entity_rows("Germany", ["Year", "tfp"])
+    panel.year_rows(2000)
+"""
+
+import os
+import json
+import shutil
+from typing import Iterator, Optional
+import numpy as np
+import pandas as pd
+
+
+class StreamingPanel:
+    """
+    An Entity x Year panel stored on disk, one raw binary file per column, with its per-year
+    aggregates and its Entity and Year indices.
+
+    Attributes:
+    ----------
+    columns : list
+        the columns of the source, in their order
+
+    metrics : list
+        the numeric columns, aggregated per year
+
+    entities : list
+        the entities, in the order of their first row
+
+    years : numpy.ndarray
+        the sorted years
+
+    world : pandas.DataFrame
+        the sum of every metric per year, indexed by Year
+
+    squares : pandas.DataFrame
+        the sum of squares of every metric per year, indexed by Year
+
+    counts : pandas.DataFrame
+        the number of non-missing values of every metric per year, indexed by Year
+
+    Methods:
+    -------
+    build(source, store_dir, checksum, exclude, chunksize):
+        Reads a CSV file in chunks into a new panel.
+
+    open(store_dir, checksum):
+        Opens a panel, if it was built from the same source.
+
+    entity_rows(entity, columns):
+        Returns the rows of one entity.
+
+    year_rows(year, columns):
+        Returns the rows of one year.
+    """
+
+    def __init__(self, store_dir: str):
+        """
+        Opens the panel written by `build` in `store_dir`.
+
+        Parameters:
+            store_dir: str, the directory of the panel.
+        """
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.checksum = manifest["checksum"]
+        self.n_rows = manifest["n_rows"]
+        self.columns = manifest["columns"]
+        self.metrics = manifest["metrics"]
+        self._files = manifest["files"]
+        self._categories = {
+            column: np.array(categories, dtype=object)
+            for column, categories in manifest["categories"].items()
+        }
+        self.entities = manifest["categories"]["Entity"]
+        self.entity_set = frozenset(self.entities)
+
+        aggregates = np.load(os.path.join(store_dir, "aggregates.npz"))
+        self.years = aggregates["years"]
+        self.year_set = frozenset(self.years.tolist())
+        index = pd.Index(self.years, name="Year")
+        self.world = pd.DataFrame(aggregates["sums"], index=index, columns=self.metrics)
+        self.squares = pd.DataFrame(aggregates["squares"], index=index, columns=self.metrics)
+        self.counts = pd.DataFrame(aggregates["counts"], index=index, columns=self.metrics)
+
+        # Row ranges of every entity, in row order
+        ranges = aggregates["ranges"]
+        self._entity_ranges = {}
+        for code, start, stop in ranges:
+            self._entity_ranges.setdefault(self.entities[code], []).append((start, stop))
+
+        self._arrays = {}
+        for column in self.columns:
+            dtype = np.float64 if column in self.metrics else np.int64
+            if column in self._categories:
+                dtype = np.int32
+            path = os.path.join(store_dir, self._files[column])
+            self._arrays[column] = (
+                np.memmap(path, dtype=dtype, mode="r", shape=(self.n_rows,))
+                if self.n_rows
+                else np.empty(0, dtype=dtype)
+            )
+
+    @classmethod
+    def open(cls, store_dir: str, checksum: str) -> Optional["StreamingPanel"]:
+        """
+        Opens the panel in `store_dir` if it was built from a source with the given checksum.
+
+        Parameters:
+            store_dir: str, the directory of the panel.
+            checksum: str, checksum of the current source file.
+
+        Returns:
+            StreamingPanel or None: The panel, or None if there is none or it is outdated.
+        """
+        manifest_path = os.path.join(store_dir, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            if json.load(f).get("checksum") != checksum:
+                return None
+        try:
+            return cls(store_dir)
+        except (OSError, ValueError, KeyError):
+            # A missing or truncated file invalidates the whole panel
+            return None
+
+    @classmethod
+    def build(
+        cls,
+        source: str,
+        store_dir: str,
+        checksum: str,
+        exclude: tuple = (),
+        chunksize: int = 100_000,
+    ) -> "StreamingPanel":
+        """
+        Reads a CSV file in chunks of `chunksize` rows into a new panel in `store_dir`. The
+        rows whose Entity is in `exclude` are dropped from every chunk. The manifest is written
+        last, so an interrupted build is never opened.
+
+        Parameters:
+            source: str, the CSV file, with "Entity" and "Year" columns.
+            store_dir: str, the directory of the panel, replaced if it exists.
+            checksum: str, checksum of the source file, see `open`.
+            exclude: tuple, the entities to drop, like aggregates of several countries.
+            chunksize: int, number of rows read at a time.
+
+        Returns:
+            StreamingPanel: The new panel.
+        """
+        if os.path.exists(store_dir):
+            shutil.rmtree(store_dir)
+        os.makedirs(os.path.join(store_dir, "years"))
+
+        files, categories, handles = {}, {}, {}
+        columns, metrics = None, None
+        sums, squares, counts = {}, {}, {}
+        ranges = []
+        n_rows = 0
+        try:
+            for chunk in pd.read_csv(source, chunksize=chunksize):
+                if columns is None:
+                    columns = list(chunk.columns)
+                    metrics = [
+                        column
+                        for column in columns
+                        if column not in ("Entity", "Year")
+                        and pd.api.types.is_numeric_dtype(chunk[column])
+                    ]
+                    for i, column in enumerate(columns):
+                        files[column] = f"col_{i}.bin"
+                        handles[column] = open(os.path.join(store_dir, files[column]), "wb")
+                        if column != "Year" and column not in metrics:
+                            categories[column] = {}
+                chunk = chunk[~chunk["Entity"].isin(exclude)]
+                if chunk.empty:
+                    continue
+
+                for column in columns:
+                    if column in categories:
+                        codes = categories[column]
+                        for value in pd.unique(chunk[column]):
+                            codes.setdefault(value, len(codes))
+                        values = chunk[column].map(codes).to_numpy(dtype=np.int32)
+                    elif column == "Year":
+                        values = chunk[column].to_numpy(dtype=np.int64)
+                    else:
+                        values = chunk[column].to_numpy(dtype=np.float64)
+                    handles[column].write(values.tobytes())
+
+                # Entity index: runs of equal entities, merged across chunks
+                entities = chunk["Entity"].map(categories["Entity"]).to_numpy()
+                starts = np.flatnonzero(np.diff(entities, prepend=-1))
+                stops = np.append(starts[1:], len(entities))
+                for start, stop in zip(starts, stops):
+                    code = int(entities[start])
+                    if ranges and ranges[-1][0] == code and ranges[-1][2] == n_rows + start:
+                        ranges[-1][2] = n_rows + stop
+                    else:
+                        ranges.append([code, n_rows + start, n_rows + stop])
+
+                # Year index and aggregates
+                years = chunk["Year"].to_numpy(dtype=np.int64)
+                values = chunk[metrics].to_numpy(dtype=np.float64)
+                present = ~np.isnan(values)
+                values = np.where(present, values, 0.0)
+                order = np.argsort(years, kind="stable")
+                unique_years, firsts = np.unique(years[order], return_index=True)
+                bounds = np.append(firsts, len(order))
+                for i, year in enumerate(unique_years.tolist()):
+                    rows = order[bounds[i] : bounds[i + 1]]
+                    with open(os.path.join(store_dir, "years", f"{year}.bin"), "ab") as f:
+                        f.write((rows + n_rows).astype(np.int64).tobytes())
+                    if year not in sums:
+                        sums[year] = np.zeros(len(metrics))
+                        squares[year] = np.zeros(len(metrics))
+                        counts[year] = np.zeros(len(metrics), dtype=np.int64)
+                    sums[year] += values[rows].sum(axis=0)
+                    squares[year] += (values[rows] ** 2).sum(axis=0)
+                    counts[year] += present[rows].sum(axis=0)
+                n_rows += len(chunk)
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+        years = np.array(sorted(sums), dtype=np.int64)
+        np.savez(
+            os.path.join(store_dir, "aggregates.npz"),
+            years=years,
+            sums=np.array([sums[year] for year in years]).reshape(len(years), len(metrics)),
+            squares=np.array([squares[year] for year in years]).reshape(len(years), len(metrics)),
+            counts=np.array([counts[year] for year in years]).reshape(len(years), len(metrics)),
+            ranges=np.array(ranges, dtype=np.int64).reshape(-1, 3),
+        )
+        with open(os.path.join(store_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "checksum": checksum,
+                    "n_rows": n_rows,
+                    "columns": columns,
+                    "metrics": metrics,
+                    "files": files,
+                    "categories": {column: list(codes) for column, codes in categories.items()},
+                },
+                f,
+            )
+        return cls(store_dir)
+
+    def _rows(self, positions: np.ndarray, columns: Optional[list]) -> pd.DataFrame:
+        """
+        Returns the given columns of the rows at `positions`, decoding the string columns.
+
+        Parameters:
+            positions: numpy.ndarray, the row positions.
+            columns: list, optional, the columns to read, all columns if None.
+
+        Returns:
+            pandas.DataFrame: The rows, indexed by their positions.
+        """
+        data = {}
+        for column in self.columns if columns is None else columns:
+            values = self._arrays[column][positions]
+            if column in self._categories:
+                values = self._categories[column][values]
+            data[column] = values
+        return pd.DataFrame(data, index=positions)
+
+    def entity_rows(self, entity: str, columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Returns the rows of an entity, in the order of the source.
+
+        Parameters:
+            entity: str, an entity of the panel.
+            columns: list, optional, the columns to read, all columns if None.
+
+        Returns:
+            pandas.DataFrame: The rows of the entity.
+        """
+        positions = np.concatenate(
+            [np.arange(start, stop) for start, stop in self._entity_ranges[entity]]
+        )
+        return self._rows(positions, columns)
+
+    def year_rows(self, year: int, columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Returns the rows of a year, in the order of the source.
+
+        Parameters:
+            year: int, a year of the panel.
+            columns: list, optional, the columns to read, all columns if None.
+
+        Returns:
+            pandas.DataFrame: The rows of the year.
+        """
+        positions = np.fromfile(
+            os.path.join(self.store_dir, "years", f"{int(year)}.bin"), dtype=np.int64
+        )
+        return self._rows(positions, columns)
+
+    def year_frames(self, years: Optional[tuple] = None, columns: Optional[list] = None) -> Iterator[tuple]:
+        """
+        Yields the rows of every year, one year at a time.
+
+        Parameters:
+            years: tuple, optional, (first year, last year), all years if None.
+            columns: list, optional, the columns to read, all columns if None.
+
+        Returns:
+            Iterator[tuple]: (year, rows) for every year, in increasing order.
+        """
+        for year in self.years.tolist():
+            if years is None or years[0] <= year <= years[1]:
+                yield year, self.year_rows(year, columns)
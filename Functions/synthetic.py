@@ -0,0 +1,350 @@
+"""
+This module generates synthetic panels with the schema of the agricultural total factor
+productivity (USDA) dataset, to load-test the `Group01` class at scales the real dataset does
+not reach: thousands of entities and monthly or daily periods.
+
+Every entity follows its own random walks. The four input indices share a common factor, the
+inputs index is their cost-share weighted geometric mean, tfp has an entity-specific drift and
+output = tfp * inputs / 100, as in the source. The quantities are an entity size times the
+matching index, split by entity-specific shares, so they are correlated across entities like
+the real quantities. The indices are 100 in the base year (2015 if it is generated).
+
+The panels are generated a chunk of entities at a time and written as a CSV file, or as a
+columnar directory in the layout of the column cache of `Group01.get_data`, without ever
+holding the whole panel in memory. Both can be loaded with `Group01.get_data(data_file=path)`.
+
+Functions:
+---------
+generate_panel(n_entities, start_year, n_years, frequency, chunk_rows, seed):
+    Yields the synthetic panel as DataFrames of whole entities.
+
+write_panel(path, n_entities, start_year, n_years, frequency, file_format, chunk_rows, seed):
+    Writes the synthetic panel into a CSV file or a columnar directory, chunk by chunk.
+
+
+Example usage:
+--------------
+    write_panel("downloads/synthetic.csv", n_entities=5000, frequency="month")
+    my_object = Group01("my_object")
+    my_object.get_data(data_file="downloads/synthetic.csv")
+"""
+
+import os
+import json
+import hashlib
+from typing import Iterator
+import numpy as np
+import pandas as pd
+
+# The columns of the USDA dataset, in the order of the source file
+INDEX_COLUMNS = ["ag_land_index", "labor_index", "capital_index", "materials_index"]
+QUANTITY_COLUMNS = [
+    "output_quantity",
+    "crop_output_quantity",
+    "animal_output_quantity",
+    "fish_output_quantity",
+    "ag_land_quantity",
+    "labor_quantity",
+    "capital_quantity",
+    "machinery_quantity",
+    "livestock_quantity",
+    "fertilizer_quantity",
+    "animal_feed_quantity",
+    "cropland_quantity",
+    "pasture_quantity",
+    "irrigation_quantity",
+]
+VALUE_COLUMNS = ["tfp", "output", "inputs"] + INDEX_COLUMNS + QUANTITY_COLUMNS
+
+FREQUENCIES = {"year": "datetime64[Y]", "month": "datetime64[M]", "day": "datetime64[D]"}
+BASE_YEAR = 2015
+
+# Yearly drift and volatility of the log indices, and the cost shares of the inputs index
+INPUT_DRIFTS = np.array([0.0, -0.005, 0.01, 0.02])
+INPUT_VOLATILITY = 0.02
+COMMON_VOLATILITY = 0.015
+COST_SHARES = np.array([0.2, 0.35, 0.2, 0.25])
+TFP_DRIFT = (0.012, 0.008)
+TFP_VOLATILITY = 0.03
+
+
+def _periods(start_year: int, n_years: int, frequency: str) -> np.ndarray:
+    """
+    Returns the periods of the panel as a datetime64 array.
+
+    Parameters:
+        start_year: int, first year of the panel.
+        n_years: int, number of years of the panel.
+        frequency: str, "year", "month" or "day".
+
+    Raises:
+        ValueError: If the frequency is unknown
+
+    Returns:
+        numpy.ndarray: The first day, month or year of every period.
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"frequency must be one of {sorted(FREQUENCIES)}")
+    unit = FREQUENCIES[frequency]
+    start = np.datetime64(str(start_year), "Y").astype(unit)
+    end = np.datetime64(str(start_year + n_years), "Y").astype(unit)
+    return np.arange(start, end, dtype=unit)
+
+
+def _random_walks(rng: np.random.Generator, drift: np.ndarray, volatility: float, dt: np.ndarray) -> np.ndarray:
+    """
+    Returns log random walks with the given yearly drift and volatility.
+
+    Parameters:
+        rng: numpy.random.Generator, the random generator.
+        drift: numpy.ndarray, yearly drift of every walk, broadcast against the first axes.
+        volatility: float, yearly volatility of the walks.
+        dt: numpy.ndarray, length in years of every period, the last axis.
+
+    Returns:
+        numpy.ndarray: The walks, shape drift.shape + dt.shape, starting at 0.
+    """
+    shape = np.shape(drift) + dt.shape
+    steps = np.asarray(drift)[..., None] * dt + volatility * np.sqrt(dt) * rng.standard_normal(shape)
+    steps[..., 0] = 0.0
+    return np.cumsum(steps, axis=-1)
+
+
+def _entity_chunk(rng: np.random.Generator, n: int, dt: np.ndarray, base: int) -> dict:
+    """
+    Generates the value columns of `n` entities.
+
+    Parameters:
+        rng: numpy.random.Generator, the random generator of the chunk.
+        n: int, number of entities.
+        dt: numpy.ndarray, length in years of every period.
+        base: int, position of the base period, where the indices are 100.
+
+    Returns:
+        dict: The value columns, arrays of shape (n, periods).
+    """
+    # Inputs: a common factor plus one walk per input index
+    common = _random_walks(rng, np.zeros(n), COMMON_VOLATILITY, dt)
+    drifts = INPUT_DRIFTS + rng.normal(0.0, 0.005, (n, 4))
+    log_inputs = common[:, None, :] + _random_walks(rng, drifts, INPUT_VOLATILITY, dt)
+    log_inputs -= log_inputs[:, :, base : base + 1]
+    log_tfp = _random_walks(rng, rng.normal(*TFP_DRIFT, n), TFP_VOLATILITY, dt)
+    log_tfp -= log_tfp[:, base : base + 1]
+
+    indices = 100.0 * np.exp(log_inputs)
+    inputs = 100.0 * np.exp(np.einsum("k,nkt->nt", COST_SHARES, log_inputs))
+    tfp = 100.0 * np.exp(log_tfp)
+    output = tfp * inputs / 100.0
+
+    # Quantities: an entity size times the matching index, split by entity shares
+    size = rng.lognormal(np.log(5e6), 1.5, n)[:, None]
+    scales = size[:, :, None] * rng.lognormal(0.0, 0.4, (n, 5, 1))
+    output_shares = rng.dirichlet([6.0, 3.0, 1.0], n)
+    capital_shares = rng.beta(3.0, 2.0, n)[:, None]
+    cropland_shares = rng.beta(2.0, 2.0, n)[:, None]
+    irrigated_shares = rng.beta(1.0, 5.0, n)[:, None]
+    feed_shares = rng.beta(2.0, 5.0, n)[:, None]
+
+    output_quantity = size * output / 100.0
+    ag_land_quantity = scales[:, 0] * 0.5 * indices[:, 0] / 100.0
+    capital_quantity = scales[:, 2] * indices[:, 2] / 100.0
+    materials_quantity = scales[:, 3] * 0.1 * indices[:, 3] / 100.0
+    columns = {
+        "tfp": tfp,
+        "output": output,
+        "inputs": inputs,
+        "ag_land_index": indices[:, 0],
+        "labor_index": indices[:, 1],
+        "capital_index": indices[:, 2],
+        "materials_index": indices[:, 3],
+        "output_quantity": output_quantity,
+        "crop_output_quantity": output_shares[:, 0:1] * output_quantity,
+        "animal_output_quantity": output_shares[:, 1:2] * output_quantity,
+        "fish_output_quantity": output_shares[:, 2:3] * output_quantity,
+        "ag_land_quantity": ag_land_quantity,
+        "labor_quantity": scales[:, 1] * 1e-3 * indices[:, 1] / 100.0,
+        "capital_quantity": capital_quantity,
+        "machinery_quantity": capital_shares * capital_quantity,
+        "livestock_quantity": (1.0 - capital_shares) * capital_quantity,
+        "fertilizer_quantity": (1.0 - feed_shares) * materials_quantity,
+        "animal_feed_quantity": feed_shares * materials_quantity,
+        "cropland_quantity": cropland_shares * ag_land_quantity,
+        "pasture_quantity": (1.0 - cropland_shares) * ag_land_quantity,
+        "irrigation_quantity": irrigated_shares * cropland_shares * ag_land_quantity,
+    }
+    return columns
+
+
+def generate_panel(
+    n_entities: int,
+    start_year: int = 1961,
+    n_years: int = 59,
+    frequency: str = "year",
+    chunk_rows: int = 1_000_000,
+    seed: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields a synthetic panel with the columns of the USDA dataset, as DataFrames of whole
+    entities of about `chunk_rows` rows, sorted by entity and period. The entities are named
+    "Region 0001", "Region 0002", ... For monthly and daily periods, a "Date" column
+    (YYYY-MM-DD) follows the "Year" column, which holds the year of the period.
+
+    The panel only depends on `seed` and the number of entities per chunk, so the same call
+    always yields the same panel.
+
+    Parameters:
+        n_entities: int, number of entities.
+        start_year: int, first year of the panel.
+        n_years: int, number of years of the panel.
+        frequency: str, "year", "month" or "day".
+        chunk_rows: int, number of rows per chunk, at least one entity.
+        seed: int, seed of the random generator.
+
+    Raises:
+        ValueError: If the frequency is unknown, or a size is not positive
+
+    Returns:
+        Iterator[pandas.DataFrame]: The chunks of the panel.
+
+    Example usage:
+        for chunk in generate_panel(1000, frequency="month"):
+            ...
+    """
+    if n_entities < 1 or n_years < 1 or chunk_rows < 1:
+        raise ValueError("n_entities, n_years and chunk_rows must be positive")
+    periods = _periods(start_year, n_years, frequency)
+    years = periods.astype("datetime64[Y]").astype(np.int64) + 1970
+    # Length of every period in years, the last period as long as the previous one
+    days = np.diff(periods.astype("datetime64[D]").astype(np.int64), append=0)
+    days[-1] = days[-2] if len(days) > 1 else 365
+    dt = days / 365.25
+    base = int(np.searchsorted(years, BASE_YEAR)) if BASE_YEAR in years else 0
+    dates = None if frequency == "year" else np.datetime_as_string(periods, unit="D")
+
+    width = len(str(n_entities))
+    per_chunk = max(1, chunk_rows // len(periods))
+    for first in range(0, n_entities, per_chunk):
+        n = min(per_chunk, n_entities - first)
+        rng = np.random.default_rng([seed, first])
+        columns = _entity_chunk(rng, n, dt, base)
+
+        chunk = {
+            "Entity": np.repeat(
+                np.array([f"Region {i:0{width}d}" for i in range(first + 1, first + n + 1)], dtype=object),
+                len(periods),
+            ),
+            "Year": np.tile(years, n),
+        }
+        if dates is not None:
+            chunk["Date"] = np.tile(dates.astype(object), n)
+        for column in VALUE_COLUMNS:
+            chunk[column] = columns[column].ravel()
+        yield pd.DataFrame(chunk)
+
+
+def write_panel(
+    path: str,
+    n_entities: int,
+    start_year: int = 1961,
+    n_years: int = 59,
+    frequency: str = "year",
+    file_format: str = "csv",
+    chunk_rows: int = 1_000_000,
+    seed: int = 0,
+) -> str:
+    """
+    Writes the panel of `generate_panel` chunk by chunk, so only one chunk is in memory.
+
+    With `file_format="csv"`, the chunks are appended to one CSV file. With
+    `file_format="columnar"`, `path` is a directory of one .npy file per column in the layout of
+    the column cache of `Group01.get_data` (string columns as codes plus categories, and a
+    manifest.json written last), which is memory-mapped when it is loaded.
+
+    Parameters:
+        path: str, the CSV file or the columnar directory to write.
+        n_entities: int, number of entities.
+        start_year: int, first year of the panel.
+        n_years: int, number of years of the panel.
+        frequency: str, "year", "month" or "day".
+        file_format: str, "csv" or "columnar".
+        chunk_rows: int, number of rows per chunk.
+        seed: int, seed of the random generator.
+
+    Raises:
+        ValueError: If the file format or the frequency is unknown
+
+    Returns:
+        str: The written path.
+
+    Example usage:
+        write_panel("downloads/synthetic", n_entities=5000, frequency="day", file_format="columnar")
+    """
+    if file_format not in ("csv", "columnar"):
+        raise ValueError("file_format must be 'csv' or 'columnar'")
+    chunks = generate_panel(n_entities, start_year, n_years, frequency, chunk_rows, seed)
+
+    if file_format == "csv":
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=i == 0, index=False, float_format="%.4f")
+        return path
+
+    os.makedirs(path, exist_ok=True)
+    # Remove a previous manifest first, the directory is not valid until the new one is written
+    manifest_path = os.path.join(path, "manifest.json")
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    periods = _periods(start_year, n_years, frequency)
+    n_rows = n_entities * len(periods)
+    width = len(str(n_entities))
+    names = ["Entity", "Year"] + ([] if frequency == "year" else ["Date"]) + VALUE_COLUMNS
+    dtypes = {"Entity": np.int32, "Year": np.int64, "Date": np.int32}
+    columns, arrays = [], {}
+    for i, name in enumerate(names):
+        entry = {"name": name, "file": f"col_{i}.npy"}
+        arrays[name] = np.lib.format.open_memmap(
+            os.path.join(path, entry["file"]), mode="w+", dtype=dtypes.get(name, np.float64), shape=(n_rows,)
+        )
+        columns.append(entry)
+
+    start = 0
+    for chunk in chunks:
+        stop = start + len(chunk)
+        n = len(chunk) // len(periods)
+        first = start // len(periods)
+        # Entities and dates are generated in order, so their codes are their positions
+        arrays["Entity"][start:stop] = np.repeat(np.arange(first, first + n, dtype=np.int32), len(periods))
+        if "Date" in arrays:
+            arrays["Date"][start:stop] = np.tile(np.arange(len(periods), dtype=np.int32), n)
+        for name in names:
+            if name not in ("Entity", "Date"):
+                arrays[name][start:stop] = chunk[name].to_numpy()
+        start = stop
+    for array in arrays.values():
+        array.flush()
+    del arrays
+
+    categories = {
+        "Entity": np.array([f"Region {i:0{width}d}" for i in range(1, n_entities + 1)]),
+        "Date": np.datetime_as_string(periods, unit="D"),
+    }
+    for entry in columns:
+        if entry["name"] in categories:
+            entry["categories"] = entry["file"].replace(".npy", "_categories.npy")
+            np.save(os.path.join(path, entry["categories"]), categories[entry["name"]])
+    index = np.lib.format.open_memmap(
+        os.path.join(path, "index.npy"), mode="w+", dtype=np.int64, shape=(n_rows,)
+    )
+    index[:] = np.arange(n_rows)
+    index.flush()
+    del index
+
+    parameters = [n_entities, start_year, n_years, frequency, chunk_rows, seed]
+    checksum = hashlib.sha256(json.dumps(parameters).encode("utf-8")).hexdigest()
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"checksum": checksum, "columns": columns}, f)
+    return path
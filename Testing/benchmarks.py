@@ -0,0 +1,407 @@
+"""
+This module contains benchmarks for the `Group01` class.
+
+Run it from the Testing directory, like the tests:
+    python benchmarks.py                         # scales 1 and 10
+    python benchmarks.py --scales 1 10 100 1000  # the large panels as well
+
+The scaled suite (`bench_methods`) runs offline: it reads the CSV file bundled in Data/ and
+writes it, or a synthetic panel scaled up from it, into a temporary working directory that
+`Group01` loads from. Every method is timed in its compute phase (the data preparation it
+does before plotting) and in total (compute and render to PNG bytes), the render phase is
+the difference.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('../Functions/')
+
+BUNDLED_DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "Data", "Agricultural total factor productivity (USDA).csv",
+)
+# Scale factor of the synthetic panels: (factor on entities, factor on years)
+SCALES = {1: (1, 1), 10: (10, 1), 100: (10, 10), 1000: (100, 10)}
+# The scales run on every change; 100 and 1000 need several GB and are run on request
+DEFAULT_SCALES = [1, 10]
+
+from group01 import Group01
+from forecasting import batch_forecast, fast_batch_forecast
+
+
+def bench_get_data(repeat: int = 5) -> dict:
+    """
+    Compares loading the data by parsing the CSV file with loading it from the column cache.
+    The time includes the checksum of the CSV file, which is computed on every cached load.
+
+    Parameters:
+        repeat: int, number of timed loads per path.
+
+    Returns:
+        dict: The best time in seconds of each path and the speedup of the cache.
+    """
+    warm_up = Group01("warm_up")
+    warm_up.get_data()  # make sure the data file and the cache exist
+
+    def load(use_cache):
+        my_object = Group01("benchmark")
+        # Only time the tabular data, the geographical data is read the same way on both paths
+        my_object.df_geographical = warm_up.df_geographical
+        my_object.get_data(use_cache=use_cache)
+
+    csv_time = min(timeit.repeat(lambda: load(False), number=1, repeat=repeat))
+    cache_time = min(timeit.repeat(lambda: load(True), number=1, repeat=repeat))
+    return {"csv": csv_time, "cache": cache_time, "speedup": csv_time / cache_time}
+
+
+def bench_import_time(module: str = "group01", repeat: int = 5) -> float:
+    """
+    Measures the cumulative import time of a module with `python -X importtime`, in a fresh
+    interpreter each time.
+
+    Parameters:
+        module: str, the module to import from the Functions directory.
+        repeat: int, number of measured imports.
+
+    Returns:
+        float: The best cumulative import time in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c",
+             f"import sys; sys.path.append('../Functions/'); import {module}"],
+            capture_output=True, text=True, check=True,
+        ).stderr
+        for line in stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                times.append(int(fields[1]) / 1e6)
+    return min(times)
+
+
+def bench_choropleth_series(years: range = range(1961, 2020)) -> dict:
+    """
+    Compares rendering the choropleth of every year as PNG files with `choropleth_series` and
+    with one `choropleth` call per year.
+
+    Parameters:
+        years: range, the rendered years.
+
+    Returns:
+        dict: Time in seconds of both ways and the speedup of `choropleth_series`.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from matplotlib import pyplot as plt
+
+    my_object = Group01("benchmark")
+    my_object.get_data()
+    with tempfile.TemporaryDirectory() as out_dir:
+        start = time.perf_counter()
+        my_object.choropleth_series(list(years), out_dir=out_dir)
+        series_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for year in years:
+            my_object.choropleth(year)
+            plt.gcf().savefig(f"{out_dir}/choropleth_{year}.png")
+            plt.close("all")
+        calls_time = time.perf_counter() - start
+    return {"series": series_time, "calls": calls_time, "speedup": calls_time / series_time}
+
+
+def bench_forecast_engines(n_countries: int = 10, holdout: int = 10, order: tuple = (20, 2, 2)) -> dict:
+    """
+    Compares the statsmodels ARIMA engine with the fast AR engine of the forecasts.
+
+    Both engines are fitted on every series but its last `holdout` years and forecast these
+    years, for the first `n_countries` countries with enough data. The accuracy is the mean
+    absolute error against the held-out values.
+
+    Parameters:
+        n_countries: int, number of countries, the ARIMA engine takes seconds per country.
+        holdout: int, number of held-out years.
+        order: tuple, the (p, d, q) order of the models.
+
+    Returns:
+        dict: Time in seconds and mean absolute error of each engine, and the speedup.
+    """
+    my_object = Group01("benchmark")
+    my_object.get_data()
+    train, test = {}, {}
+    for country in my_object.get_countries():
+        data = my_object._entity_rows(country)
+        if len(data) >= 40:
+            train[country] = (data["Year"].values[:-holdout], data["tfp"].values[:-holdout])
+            test[country] = data["tfp"].values[-holdout:]
+        if len(train) == n_countries:
+            break
+    end_year = int(max(years[-1] for years, _ in train.values())) + holdout
+
+    def mean_absolute_error(forecasts):
+        errors = [np.abs(forecasts[forecasts["Entity"] == country]["tfp"].values - values)
+                  for country, values in test.items()]
+        return float(np.mean(errors))
+
+    results = {}
+    for engine, function in (("arima", batch_forecast), ("fast", fast_batch_forecast)):
+        start = time.perf_counter()
+        forecasts = function(train, order=order, end_year=end_year)
+        results[engine] = {"time": time.perf_counter() - start, "mae": mean_absolute_error(forecasts)}
+    results["speedup"] = results["arima"]["time"] / results["fast"]["time"]
+    return results
+
+
+def scaled_panel(df: pd.DataFrame, entity_factor: int, year_factor: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Scales a panel up by copying it: every entity is repeated `entity_factor` times (the first
+    copy keeps its name, the others get a " #i" suffix) and every series is repeated
+    `year_factor` times back in time, before its first year. All copies but the original are
+    multiplied by random factors around 1, so they are not identical.
+
+    Parameters:
+        df: pandas.DataFrame, the panel, with "Entity", "Year" and numeric columns.
+        entity_factor: int, number of copies of every entity.
+        year_factor: int, number of copies of every series over time.
+        seed: int, seed of the random factors.
+
+    Returns:
+        pandas.DataFrame: The scaled panel, with the columns of `df`.
+    """
+    rng = np.random.default_rng(seed)
+    numeric = [column for column in df.columns if column not in ("Entity", "Year")]
+    span = int(df["Year"].max() - df["Year"].min() + 1)
+    n = len(df)
+    copies = entity_factor * year_factor
+
+    entity_copy = np.repeat(np.arange(entity_factor), year_factor * n)
+    year_copy = np.tile(np.repeat(np.arange(year_factor), n), entity_factor)
+    entities = df["Entity"].to_numpy(dtype=object)
+    suffixes = np.array([""] + [f" #{i}" for i in range(1, entity_factor)], dtype=object)
+
+    values = np.tile(df[numeric].to_numpy(), (copies, 1))
+    noise = rng.lognormal(0.0, 0.05, size=(copies, len(numeric)))
+    noise[0] = 1.0
+    values *= np.repeat(noise, n, axis=0)
+
+    scaled = pd.DataFrame(values, columns=numeric)
+    scaled.insert(0, "Entity", np.tile(entities, copies) + suffixes[entity_copy])
+    scaled.insert(1, "Year", np.tile(df["Year"].to_numpy(), copies) - span * year_copy)
+    # Keep the rows of every entity together and in order of years, like the original file
+    return scaled.sort_values(["Entity", "Year"], kind="stable", ignore_index=True)
+
+
+@contextlib.contextmanager
+def offline_workspace(df: Optional[pd.DataFrame] = None):
+    """
+    Changes into a temporary working directory whose downloads/data.csv is the bundled CSV
+    file, or `df`, so `Group01.get_data` loads it without downloading anything.
+
+    Parameters:
+        df: pandas.DataFrame, optional, the panel to write instead of the bundled file.
+
+    Yields:
+        str: The path of the working directory.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workspace:
+        os.mkdir(os.path.join(workspace, "downloads"))
+        path = os.path.join(workspace, "downloads", "data.csv")
+        if df is None:
+            shutil.copyfile(BUNDLED_DATA, path)
+        else:
+            df.to_csv(path, index=False)
+        os.chdir(workspace)
+        try:
+            yield workspace
+        finally:
+            os.chdir(cwd)
+
+
+def _best_time(function, repeat: int) -> float:
+    """
+    Returns the best time in seconds of `repeat` calls of `function`, with its prints hidden.
+    """
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_methods(scale: int = 1, repeat: int = 3) -> dict:
+    """
+    Times every method of `Group01` on the bundled data (`scale=1`) or on a synthetic panel
+    scaled up from it, see `SCALES` and `scaled_panel`.
+
+    The compute phase of a method is the data preparation it does before plotting, timed by
+    calling the same helpers; the total is the method rendering a PNG with `output="png"`.
+    Forecasts use the fast engine on every country, and the ARIMA engine on one country.
+
+    Parameters:
+        scale: int, one of the keys of `SCALES`.
+        repeat: int, number of timed calls per phase, the best time is kept.
+
+    Returns:
+        dict: For every method, a dict with the "compute", "total" and "render" times in
+        seconds (render and total only for plotting methods), and the "rows" of the panel.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    df = None
+    if scale != 1:
+        df = pd.read_csv(BUNDLED_DATA)
+        df = scaled_panel(df, *SCALES[scale])
+
+    results = {}
+    with offline_workspace(df):
+        my_object = Group01("benchmark", headless=True)
+        # The first load parses the CSV file and writes the caches
+        results["get_data (csv)"] = {"compute": _best_time(my_object.get_data, 1)}
+
+        def load():
+            Group01("benchmark").get_data(geographical=False)
+
+        results["get_data (cache)"] = {"compute": _best_time(load, repeat)}
+        results["get_countries"] = {"compute": _best_time(my_object.get_countries, repeat)}
+
+        countries = my_object.get_countries()
+        country = "Germany" if "Germany" in countries else countries[0]
+        year = int(my_object.df["Year"].max())
+        outputs = [column for column in my_object.df.columns if "_output_" in column]
+        quantities = [column for column in my_object.df.columns if column.endswith("_quantity")]
+        chart_countries = countries[:3]
+
+        def clear_correlations():
+            my_object._correlations = {}
+
+        def clear_geo_join():
+            my_object._geo_join_df = None
+
+        def clear_forecasts():
+            shutil.rmtree(my_object.forecast_cache.cache_dir, ignore_errors=True)
+
+        phases = {
+            "plot_quantity": (
+                lambda: (clear_correlations(), my_object.correlation()),
+                lambda: (clear_correlations(), my_object.plot_quantity(output="png")),
+            ),
+            "plot_area_chart (World)": (
+                lambda: my_object._world_frame(outputs),
+                lambda: my_object.plot_area_chart("World", output="png"),
+            ),
+            "plot_area_chart (country)": (
+                lambda: my_object._entity_frame(country, outputs + ["Year"]),
+                lambda: my_object.plot_area_chart(country, output="png"),
+            ),
+            "plot_country_chart": (
+                lambda: [my_object._entity_frame(each, outputs + ["Year"]) for each in chart_countries],
+                lambda: my_object.plot_country_chart(chart_countries, output="png"),
+            ),
+            "gapminder": (
+                lambda: my_object._year_frame(year, quantities),
+                lambda: my_object.gapminder(year, output="png"),
+            ),
+            "choropleth": (
+                lambda: (clear_geo_join(), my_object._geo_year_values(year)),
+                lambda: (clear_geo_join(), my_object.choropleth(year, output="png")),
+            ),
+            "predictor (fast)": (
+                lambda: my_object.forecast(chart_countries, engine="fast"),
+                lambda: my_object.predictor(chart_countries, engine="fast", output="png"),
+            ),
+        }
+        for method, (compute, total) in phases.items():
+            compute_time = _best_time(compute, repeat)
+            total_time = _best_time(total, repeat)
+            results[method] = {
+                "compute": compute_time,
+                "total": total_time,
+                "render": max(total_time - compute_time, 0.0),
+            }
+
+        # The default ARIMA engine, fitted once with a cold forecast cache
+        compute_time = _best_time(
+            lambda: (clear_forecasts(), my_object.forecast([country], max_workers=1)), 1
+        )
+        total_time = _best_time(
+            lambda: (clear_forecasts(), my_object.predictor([country], max_workers=1, output="png")), 1
+        )
+        results["predictor (arima, 1 country)"] = {
+            "compute": compute_time,
+            "total": total_time,
+            "render": max(total_time - compute_time, 0.0),
+        }
+
+        results["forecast (fast, all countries)"] = {
+            "compute": _best_time(lambda: my_object.forecast(countries, engine="fast", use_cache=False), 1)
+        }
+        results["forecast (arima, 1 country)"] = {
+            "compute": _best_time(lambda: my_object.forecast([country], max_workers=1, use_cache=False), 1)
+        }
+        results["rows"] = len(my_object.df)
+    return results
+
+
+def print_methods(scale: int, results: dict) -> None:
+    """
+    Prints the results of `bench_methods` as a table.
+
+    Parameters:
+        scale: int, the scale of the results.
+        results: dict, the results of `bench_methods`.
+    """
+    print(f"scale {scale}x ({results['rows']} rows)")
+    print(f"    {'method':<32}{'compute':>10}{'render':>10}{'total':>10}")
+    for method, times in results.items():
+        if method == "rows":
+            continue
+        row = [f"{times[phase]:.4f}" if phase in times else "" for phase in ("compute", "render", "total")]
+        print(f"    {method:<32}{row[0]:>10}{row[1]:>10}{row[2]:>10}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", choices=sorted(SCALES), default=DEFAULT_SCALES,
+                        help="scales of the synthetic panels of the method suite, 1 and 10 by default")
+    parser.add_argument("--methods-only", action="store_true",
+                        help="only run the method suite")
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        print_methods(scale, bench_methods(scale))
+    if args.methods_only:
+        sys.exit()
+
+    results = bench_get_data()
+    print(f"get_data: csv {results['csv']:.4f}s, cache {results['cache']:.4f}s, "
+          f"speedup {results['speedup']:.1f}x")
+    print(f"import group01: {bench_import_time():.4f}s")
+    results = bench_choropleth_series()
+    print(f"choropleth: {len(range(1961, 2020))} frames with choropleth_series {results['series']:.2f}s, "
+          f"with choropleth {results['calls']:.2f}s, speedup {results['speedup']:.1f}x")
+    results = bench_forecast_engines()
+    for engine in ("arima", "fast"):
+        print(f"forecast ({engine}): {results[engine]['time']:.4f}s, "
+              f"holdout MAE {results[engine]['mae']:.2f}")
+    print(f"forecast: fast engine speedup {results['speedup']:.0f}x")
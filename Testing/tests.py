@@ -1,9 +1,41 @@
 import unittest
+import asyncio
+import json
+import os
+import shutil
+import subprocess
 import sys
+import tempfile
+import threading
+import warnings
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
 
 sys.path.append('../Functions/')
 
-from group01 import Group01
+from group01 import Group01, _read_column_cache, _write_column_cache
+from forecasting import ForecastCache, _fit_order, backtest, fast_batch_forecast, forecast_arima
+from synthetic import generate_panel, write_panel
+from streaming import StreamingPanel
+from profiling import Profiler
+from datasets import DatasetLoader
+from spatial import adjacency, cached_adjacency, morans_i
+from regions import COUNTED_IN
+from shared import SharedDataset
+
+def render_choropleth(year):
+    return Group01("worker", headless=True).choropleth(year, output="png")
+
+def shared_tfp(country):
+    worker = Group01("worker", shared=True)
+    worker.get_data(geographical=False)
+    tfp = worker.df["tfp"].to_numpy()
+    return tfp.flags.writeable, float(np.nansum(worker._entity_rows(country)["tfp"]))
+
 
 class TestGroup01(unittest.TestCase):
     
@@ -13,17 +45,541 @@ class TestGroup01(unittest.TestCase):
     def test_get_data(self):
         self.assertIsNone(self.my_object.get_data())
 
+    def test_get_data_cache(self):
+        self.my_object.get_data()
+        csv_object = Group01("csv_object")
+        csv_object.get_data(use_cache=False)
+        pd.testing.assert_frame_equal(self.my_object.df, csv_object.df)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            _write_column_cache(csv_object.df, cache_dir, "checksum")
+            pd.testing.assert_frame_equal(_read_column_cache(cache_dir, "checksum"), csv_object.df)
+            self.assertIsNone(_read_column_cache(cache_dir, "changed checksum"))
+
+            # A rewrite never touches the files of the previous version, which a reader may
+            # have mapped, and a failed one keeps it
+            old = _read_column_cache(cache_dir, "checksum")
+            first = sorted(name for name in os.listdir(cache_dir) if name.startswith("v"))
+            _write_column_cache(csv_object.df.iloc[:10], cache_dir, "new checksum")
+            pd.testing.assert_frame_equal(old, csv_object.df)
+            with mock.patch("group01.os.replace", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    _write_column_cache(csv_object.df.iloc[:5], cache_dir, "failed checksum")
+            self.assertEqual(len(_read_column_cache(cache_dir, "new checksum")), 10)
+            # The version replaced is kept, the older ones are removed
+            _write_column_cache(csv_object.df.iloc[:20], cache_dir, "last checksum")
+            self.assertEqual(len(_read_column_cache(cache_dir, "last checksum")), 20)
+            self.assertEqual(len(os.listdir(cache_dir)), 3)
+            self.assertNotIn(first[0], os.listdir(cache_dir))
+
+    def test_synthetic(self):
+        self.my_object.get_data(geographical=False)
+        with tempfile.TemporaryDirectory() as out_dir:
+            csv_file = write_panel(os.path.join(out_dir, "panel.csv"), 30, chunk_rows=500)
+            columnar = write_panel(os.path.join(out_dir, "panel"), 30, chunk_rows=500, file_format="columnar")
+            csv_object = Group01("csv_object")
+            csv_object.get_data(use_cache=False, geographical=False, data_file=csv_file)
+            columnar_object = Group01("columnar_object")
+            columnar_object.get_data(geographical=False, data_file=columnar)
+
+            # Same schema as the USDA dataset, and the same panel in both formats
+            self.assertEqual(list(csv_object.df.columns), list(self.my_object.df.columns))
+            self.assertEqual(len(csv_object.get_countries()), 30)
+            pd.testing.assert_frame_equal(csv_object.df, columnar_object.df, check_dtype=False, atol=1e-4)
+            df = columnar_object.df
+            np.testing.assert_allclose(df["output"], df["tfp"] * df["inputs"] / 100)
+            self.assertIsInstance(columnar_object.plot_country_chart("Region 01", output="png"), bytes)
+
+        monthly = pd.concat(generate_panel(5, n_years=3, frequency="month", chunk_rows=40))
+        self.assertEqual(len(monthly), 5 * 36)
+        self.assertEqual(monthly["Date"].iloc[13], "1962-02-01")
+        self.assertRaises(ValueError, next, generate_panel(5, frequency="week"))
+        self.assertRaises(FileNotFoundError, Group01("missing").get_data, True, False, "missing.csv")
+
+    def test_lazy_imports(self):
+        # Importing the module and using the tabular data must not import the heavy dependencies
+        heavy = ["geopandas", "matplotlib", "requests", "seaborn", "statsmodels"]
+        code = ("import sys; sys.path.append('../Functions/'); from group01 import Group01; "
+                "Group01('lazy').get_countries(); "
+                f"print([m for m in {heavy} if m in sys.modules])")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                check=True).stdout
+        self.assertEqual(output.strip().splitlines()[-1], "[]")
+
+    def test_get_cube(self):
+        self.my_object.get_data()
+        cube = self.my_object.get_cube()
+        df = self.my_object.df
+        self.assertEqual(cube.values.shape, (len(cube.years), len(cube.entities), len(cube.metrics)))
+        self.assertEqual(cube.present.sum(), len(df))
+        self.assertTrue(np.isnan(cube.values[~cube.present]).all())
+        self.assertIs(self.my_object.get_cube(), cube)
+
+        world = df[["Year"] + cube.metrics].groupby("Year").sum()
+        np.testing.assert_allclose(cube.world, world.to_numpy(dtype=float))
+
+        cube_object = Group01("cube_object", use_cube=True)
+        cube_object.get_data()
+        outputs = ["Year", "crop_output_quantity", "tfp"]
+        pd.testing.assert_frame_equal(
+            cube_object._entity_frame("South Sudan", outputs),
+            self.my_object._entity_frame("South Sudan", outputs).reset_index(drop=True),
+            check_dtype=False)
+        pd.testing.assert_frame_equal(
+            cube_object._year_frame(2000, ["Entity", "tfp"]),
+            self.my_object._year_frame(2000, ["Entity", "tfp"]).reset_index(drop=True),
+            check_dtype=False)
+        np.testing.assert_array_equal(cube_object._geo_year_values(1961),
+                                      self.my_object._geo_year_values(1961))
+        self.assertIsNone(cube_object.plot_area_chart("World", True))
+        self.assertIsNone(cube_object.plot_country_chart(["Germany", "France"]))
+        self.assertIsNone(cube_object.gapminder(2000))
+
+    def test_regions(self):
+        self.my_object.get_data()
+        df = self.my_object.df
+        rollup = self.my_object.get_rollup()
+        self.assertIs(self.my_object.get_rollup(), rollup)
+        self.assertIn("Sub-Saharan Africa", self.my_object.get_regions())
+
+        members = self.my_object.regions.countries("Central America")
+        rows = df[df["Entity"].isin(members)]
+        sums = rows.groupby("Year")["output_quantity"].sum()
+        region = self.my_object._region_frame("Central America", ["Year", "output_quantity", "tfp"])
+        np.testing.assert_allclose(region["output_quantity"], sums.to_numpy())
+        weighted = (rows["tfp"] * rows["output_quantity"]).groupby(rows["Year"]).sum() / sums
+        np.testing.assert_allclose(region["tfp"], weighted.to_numpy())
+        # The rows get_data drops are rebuilt from the countries
+        source = pd.read_csv(self.my_object.data_file)
+        source = source[source["Entity"] == "Central America"]
+        np.testing.assert_allclose(region["output_quantity"], source["output_quantity"], rtol=1e-6)
+        # Every country-level entity of the data is in the World, once
+        world = self.my_object.regions.countries("World")
+        for entity in self.my_object.get_countries():
+            if entity not in self.my_object.regions:
+                self.assertIn(COUNTED_IN.get(entity, entity), world, entity)
+        for entity in COUNTED_IN:
+            self.assertNotIn(entity, world)
+        pacific = self.my_object._region_frame("Pacific", ["Year", "output_quantity"])
+        source = pd.read_csv(self.my_object.data_file)
+        source = source[source["Entity"] == "Pacific"]
+        np.testing.assert_allclose(pacific["output_quantity"], source["output_quantity"], rtol=1e-6)
+
+        self.assertIsNotNone(self.my_object.plot_area_chart("Central America", output="figure"))
+        self.assertIsNotNone(self.my_object.plot_country_chart(["Germany", "Western Europe"], output="figure"))
+        forecast = self.my_object.forecast(["Central America", "Non-existent country"], engine="fast")
+        self.assertEqual(set(forecast["Entity"]), {"Central America"})
+        self.assertIsNotNone(self.my_object.plot_forecast(forecast, output="figure"))
+        headless_object = Group01("headless_object", headless=True)
+        self.assertIsNotNone(headless_object.predictor(["Central America", "Germany"], engine="fast", output="figure"))
+
+        self.my_object.regions.add_region("Benelux", ["Belgium", "Netherlands", "Luxembourg"])
+        self.assertIsNot(self.my_object.get_rollup(), rollup)
+        self.assertIn("Benelux", self.my_object.get_rollup().regions)
+        self.assertRaises(ValueError, self.my_object.regions.add_region, "Europe", ["Benelux", "Europe"])
+        self.assertIn("Western Europe", self.my_object.regions.regions["Europe"])
+        self.assertRaises(ValueError, Group01("streaming_object", streaming=True).get_rollup)
+
+    def test_derived(self):
+        self.my_object.get_data()
+        derived = self.my_object.get_derived()
+        self.assertIs(self.my_object.get_derived(), derived)
+        frame = self.my_object.derived_frame()
+        self.assertTrue(frame.index.equals(self.my_object.df.index))
+
+        germany = frame[frame["Entity"] == "Germany"].set_index("Year")
+        tfp = self.my_object.df[self.my_object.df["Entity"] == "Germany"].set_index("Year")["tfp"]
+        np.testing.assert_allclose(germany["tfp_growth"], tfp.pct_change() * 100)
+        np.testing.assert_allclose(germany["tfp_cagr"], ((tfp / tfp.shift(10)) ** 0.1 - 1) * 100)
+        # tfp = 100 * output / inputs, up to the rounding of the source
+        np.testing.assert_allclose(np.log(tfp).diff()[1:] * 100,
+                                   (germany["output_contribution"] + germany["inputs_contribution"])[1:],
+                                   atol=1e-3)
+        parts = ["ag_land_contribution", "labor_contribution", "capital_contribution",
+                 "materials_contribution", "inputs_residual"]
+        np.testing.assert_allclose(germany[parts].sum(axis=1)[1:], germany["inputs_contribution"][1:])
+
+        table = self.my_object._year_frame(2000, ["Entity", "tfp", "tfp_growth"])
+        self.assertEqual(list(table.columns), ["Entity", "tfp", "tfp_growth"])
+        self.assertIsNotNone(self.my_object.plot_country_chart(["Germany", "West Asia"], "figure", "tfp_growth"))
+        self.assertRaises(ValueError, self.my_object.plot_country_chart, "Germany", "figure", "tfp_speed")
+
+        # Derived again when the data changes
+        self.my_object.df = self.my_object.df.copy()
+        self.assertIsNot(self.my_object.get_derived(), derived)
+        self.assertEqual(self.my_object.get_derived(window=5).window, 5)
+        self.assertRaises(ValueError, self.my_object.get_derived, 0)
+
+    def test_streaming(self):
+        self.my_object.get_data()
+        df = self.my_object.df
+        streaming_object = Group01("streaming_object", streaming=True)
+        streaming_object.get_data()
+        self.assertIsNone(streaming_object.df)
+        self.assertEqual(streaming_object.get_countries(), self.my_object.get_countries())
+
+        # Chunks that split the rows of the entities
+        with tempfile.TemporaryDirectory() as store_dir:
+            panel = StreamingPanel.build("downloads/data.csv", store_dir, "checksum",
+                                         exclude=tuple(set(pd.read_csv("downloads/data.csv")["Entity"])
+                                                       - set(df["Entity"])), chunksize=997)
+            self.assertIsNone(StreamingPanel.open(store_dir, "changed checksum"))
+            pd.testing.assert_frame_equal(panel.entity_rows("Germany").reset_index(drop=True),
+                                          self.my_object._entity_rows("Germany").reset_index(drop=True),
+                                          check_dtype=False)
+            pd.testing.assert_frame_equal(panel.year_rows(2000).reset_index(drop=True),
+                                          self.my_object._year_rows(2000).reset_index(drop=True),
+                                          check_dtype=False)
+            world = df.drop(columns="Entity").groupby("Year").sum()
+            np.testing.assert_allclose(panel.world.to_numpy(), world.to_numpy())
+
+        np.testing.assert_allclose(streaming_object.correlation().to_numpy(),
+                                   self.my_object.correlation().to_numpy(), atol=1e-10)
+        np.testing.assert_allclose(streaming_object.correlation(window=5).to_numpy(),
+                                   self.my_object.correlation(window=5).to_numpy(), atol=1e-10)
+        np.testing.assert_array_equal(streaming_object._geo_year_values(1990),
+                                      self.my_object._geo_year_values(1990))
+        pd.testing.assert_frame_equal(streaming_object.forecast(["Germany"], engine="fast"),
+                                      self.my_object.forecast(["Germany"], engine="fast"))
+        # Regions are not dropped silently
+        with self.assertRaisesRegex(ValueError, "Africa.*streaming mode"):
+            streaming_object.forecast(["Germany", "France", "Africa"], engine="fast")
+        self.assertEqual(streaming_object.plot_area_chart("World", output="png"),
+                         self.my_object.plot_area_chart("World", output="png"))
+        self.assertIsNone(streaming_object.gapminder(2000))
+        self.assertRaises(ValueError, streaming_object.get_cube)
+        self.assertRaises(ValueError, Group01, "both", use_cube=True, streaming=True)
+
+    def test_refresh(self):
+        source = pd.read_csv("downloads/data.csv")
+        germany = (source["Entity"] == "Germany") & (source["Year"] == 2019)
+        changed = source.copy()
+        changed.loc[germany, "fertilizer_quantity"] += 1000
+        removed = changed[~((changed["Entity"] == "Zimbabwe") & (changed["Year"] == 2019))]
+        version = {"etag": '"v2"', "body": changed.to_csv(index=False).encode("utf-8")}
+        conditions = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                conditions.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == version["etag"]:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", version["etag"])
+                self.send_header("Content-Length", str(len(version["body"])))
+                self.end_headers()
+                self.wfile.write(version["body"])
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/data.csv"
+        try:
+            with tempfile.TemporaryDirectory() as data_dir:
+                data_file = os.path.join(data_dir, "data.csv")
+                source.to_csv(data_file, index=False)
+                my_object = Group01("refresh_object", profile=True)
+                my_object.get_data(use_cache=False, geographical=False, data_file=data_file)
+                early = my_object.correlation(years=(1961, 1990))
+                france = my_object.correlation(countries=["France"])
+                full = my_object.correlation()
+                cached = dict(my_object._correlations)
+                my_object.get_cube()
+
+                # Only a value changed: the rows, the cube and the affected correlations are updated
+                summary = my_object.refresh(url, use_cache=False)
+                self.assertEqual((summary["status"], summary["changed"], summary["countries"]),
+                                 ("updated", 1, ["Germany"]))
+                expected = Group01("expected_object")
+                expected.get_data(use_cache=False, geographical=False, data_file=data_file)
+                pd.testing.assert_frame_equal(my_object.df, expected.df, check_dtype=False)
+                for key in [((1961, 1990), None, None), (None, ("France",), None)]:
+                    self.assertIs(my_object._correlations[key], cached[key])
+                self.assertNotIn((None, None, None), my_object._correlations)
+                pd.testing.assert_frame_equal(my_object.correlation(years=(1961, 1990)), early)
+                pd.testing.assert_frame_equal(my_object.correlation(countries=["France"]), france)
+                self.assertFalse(my_object.correlation().equals(full))
+                pd.testing.assert_frame_equal(my_object.correlation(), expected.correlation())
+                cube, expected_cube = my_object.get_cube(), expected.get_cube()
+                np.testing.assert_array_equal(cube.values, expected_cube.values)
+                np.testing.assert_allclose(cube.world, expected_cube.world)
+
+                self.assertEqual(my_object.refresh(url, use_cache=False)["status"], "not modified")
+                # Only the refresh that updated the rows computed anything
+                stats = my_object.profiler.stats().set_index(["method", "phase"])
+                self.assertEqual(stats.loc[("refresh", "compute"), "count"], 1)
+                self.assertEqual(stats.loc[("refresh", "load"), "count"], 2)
+
+                # A removed row
+                version.update(etag='"v3"', body=removed.to_csv(index=False).encode("utf-8"))
+                summary = my_object.refresh(url, use_cache=False)
+                self.assertEqual((summary["removed"], summary["countries"]), (1, ["Zimbabwe"]))
+                self.assertEqual(len(my_object._entity_rows("Zimbabwe")),
+                                 len(expected._entity_rows("Zimbabwe")) - 1)
+                self.assertEqual(conditions, [None, '"v2"', '"v2"'])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_compact(self):
+        compact_object = Group01("compact_object", headless=True, compact=True)
+        report = compact_object.memory_report()
+        self.assertEqual(list(report.loc[["Entity", "Year"], "compact_dtype"]), ["category", "int16"])
+        self.assertLess(report.loc["Total", "compact_bytes"], report.loc["Total", "bytes"] / 1.5)
+        self.assertTrue((report["compact_bytes"] <= report["bytes"]).all())
+        pd.testing.assert_frame_equal(report, self.my_object.memory_report())
+        pd.testing.assert_frame_equal(compact_object.df, self.my_object.df,
+                                      check_dtype=False, check_categorical=False)
+
+        headless_object = Group01("headless_object", headless=True)
+        for method, args in [("plot_quantity", ()), ("plot_area_chart", ("World", True)),
+                             ("plot_country_chart", (["Germany", "France"],)), ("gapminder", (2000,)),
+                             ("choropleth", (2000,)), ("predictor", (["Germany"], None, "fast"))]:
+            self.assertEqual(getattr(compact_object, method)(*args, output="png"),
+                             getattr(headless_object, method)(*args, output="png"), method)
+        pd.testing.assert_frame_equal(compact_object.correlation(window=5), self.my_object.correlation(window=5))
+
+        # The column cache keeps the default dtypes
+        compact_object.get_data(compact=False)
+        self.assertEqual(compact_object.df["Year"].dtype, np.int64)
+        self.assertRaises(ValueError, Group01("streaming_object", streaming=True).memory_report)
+
+    def test_shared(self):
+        first = Group01("first_object", headless=True, shared=True)
+        second = Group01("second_object", headless=True, shared=True)
+        first.get_data()
+        second.get_data()
+        self.my_object.get_data()
+        # Two views of the same read-only pages, holding the same data as a private copy
+        self.assertIsNot(first.df, second.df)
+        for column in ["Year", "tfp", "crop_output_quantity"]:
+            self.assertTrue(np.shares_memory(first.df[column].to_numpy(), second.df[column].to_numpy()))
+        self.assertIs(first.df_geographical, second.df_geographical)
+        pd.testing.assert_frame_equal(first.df, self.my_object.df, check_like=True,
+                                      check_categorical=False, check_dtype=False)
+        with self.assertRaises(ValueError):
+            first.df.iloc[0, 2] = 0.0
+        with self.assertRaises(ValueError):
+            first.df["tfp"].to_numpy()[0] = 0.0
+
+        headless_object = Group01("headless_object", headless=True)
+        for method, args in [("plot_area_chart", ("Germany", True)), ("plot_area_chart", ("World", True)),
+                             ("plot_country_chart", (["Germany", "France"],)), ("choropleth", (2000,))]:
+            self.assertEqual(getattr(first, method)(*args, output="png"),
+                             getattr(headless_object, method)(*args, output="png"), method)
+        self.assertEqual(first.get_countries(), self.my_object.get_countries())
+        self.assertEqual(first.memory_report()["dtype"]["Entity"], "object")
+        # The metrics keep the order of the data file
+        self.assertEqual(first._columns(), list(self.my_object.df.columns))
+        self.assertEqual(first.get_cube().metrics, self.my_object.get_cube().metrics)
+        self.assertEqual(first.get_rollup().metrics, self.my_object.get_rollup().metrics)
+        self.assertEqual(list(first.derived_frame().columns), list(self.my_object.derived_frame().columns))
+        # The methods neither wrote into the shared data nor copied it
+        self.assertTrue(np.shares_memory(first.df["tfp"].to_numpy(), second.df["tfp"].to_numpy()))
+
+        # Worker processes map the published dataset instead of reading the data
+        germany = float(np.nansum(self.my_object._entity_rows("Germany")["tfp"]))
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(executor.submit(shared_tfp, "Germany").result(), (False, germany))
+        self.assertRaises(ValueError, Group01, "streaming_object", streaming=True, shared=True)
+
+        # A new version replaces the current one only once it is complete
+        with tempfile.TemporaryDirectory() as store_dir:
+            df = self.my_object.df.iloc[:100]
+            versions = [SharedDataset.publish(df, store_dir, str(i)).version_dir for i in range(3)]
+            self.assertEqual(SharedDataset.open(store_dir, None).checksum, "2")
+            # The replaced version is kept for the processes opening it, the older ones removed
+            self.assertEqual([os.path.exists(version) for version in versions], [False, True, True])
+            with mock.patch("shared.os.replace", side_effect=OSError("rename failed")):
+                self.assertRaises(OSError, SharedDataset.publish, df.iloc[:10], store_dir, "3")
+            current = SharedDataset.open(store_dir, "2")
+            self.assertEqual(current.version_dir, versions[2])
+            self.assertEqual(len(current.frame()), 100)
+            kept = ["current.json"] + [os.path.basename(version) for version in versions[1:]]
+            self.assertEqual(sorted(os.listdir(store_dir)), sorted(kept))
+
+    def test_prefetch(self):
+        release = threading.Event()
+
+        class SlowGeometry(Group01):
+            def _read_geographical(self, use_cache):
+                release.wait(30)
+                super()._read_geographical(use_cache)
+
+        my_object = SlowGeometry("prefetch_object", headless=True, prefetch=True)
+        try:
+            # The tabular methods only wait for the tabular data
+            self.assertEqual(my_object.get_countries(), self.my_object.get_countries())
+            self.assertTrue(my_object.ready("data"))
+            self.assertFalse(my_object.ready())
+            self.assertFalse(my_object.wait("geographical", timeout=0.01))
+        finally:
+            release.set()
+        self.assertTrue(asyncio.run(my_object.wait_async()))
+        self.assertTrue(my_object.wait(timeout=30))
+        self.assertEqual(my_object.choropleth(2000, output="png"),
+                         Group01("choropleth_object", headless=True).choropleth(2000, output="png"))
+        self.assertRaises(ValueError, my_object.ready, "geometry")
+        self.assertFalse(Group01("lazy_object").ready("data"))
+
+    def test_add_datasets(self):
+        source = pd.read_csv("downloads/data.csv")
+        bodies = {
+            "/population.csv": pd.DataFrame({"Entity": ["Germany", "France", "World"], "Year": [2000, 2000, 2000],
+                                             "Code": ["DEU", "FRA", None], "population": [82.2, 60.9, 6149.0]}),
+            "/fertilizer.csv": pd.DataFrame({"Entity": ["Germany"], "Year": [2000], "tfp": [1.5]}),
+            "/land.csv": source[["Entity", "Year"]].assign(land=np.arange(len(source), dtype=float)),
+        }
+        bodies = {path: frame.to_csv(index=False).encode("utf-8") for path, frame in bodies.items()}
+        # The first downloads only complete if they run concurrently
+        barrier = threading.Barrier(len(bodies), timeout=10)
+        requested = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requested.append((self.path, self.headers.get("If-None-Match")))
+                if len(requested) <= len(bodies):
+                    barrier.wait()
+                if self.headers.get("If-None-Match") == self.path:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", self.path)
+                self.send_header("Content-Length", str(len(bodies[self.path])))
+                self.end_headers()
+                self.wfile.write(bodies[self.path])
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        datasets = {"population": f"{url}/population.csv", "fertilizer": f"{url}/fertilizer.csv",
+                    "land": f"{url}/land.csv"}
+        data_dir = tempfile.mkdtemp()
+        try:
+            my_object = Group01("datasets_object")
+            my_object.loader = DatasetLoader(max_workers=3, data_dir=data_dir)
+            self.assertEqual(my_object.add_datasets(datasets), ["population", "fertilizer", "land"])
+            joined = my_object.joined()
+            self.assertIs(my_object.joined(), joined)
+            self.assertEqual(list(joined.columns[-3:]), ["population", "tfp_fertilizer", "land"])
+            germany = joined[(joined["Entity"] == "Germany") & (joined["Year"] == 2000)].iloc[0]
+            self.assertEqual((germany["population"], germany["tfp_fertilizer"]), (82.2, 1.5))
+            pd.testing.assert_frame_equal(joined[my_object.df.columns], my_object.df)
+            self.assertEqual(joined["population"].notna().sum(), 2)
+            self.assertEqual(list(my_object.joined(["fertilizer"]).columns[-1:]), ["tfp_fertilizer"])
+
+            # Cached files are not downloaded again, refreshed ones with conditional requests
+            cached_object = Group01("cached_object")
+            cached_object.loader = my_object.loader
+            cached_object.add_datasets(datasets)
+            self.assertEqual(len(requested), 3)
+            cached_object.add_datasets(datasets, refresh=True)
+            self.assertEqual(sorted(requested[3:]), sorted((path, path) for path in bodies))
+
+            self.assertRaises(ValueError, my_object.joined, ["missing"])
+            self.assertRaises(ValueError, my_object.add_datasets, {"../outside": f"{url}/land.csv"})
+        finally:
+            server.shutdown()
+            server.server_close()
+            shutil.rmtree(data_dir)
+
+    def test_profiler(self):
+        my_object = Group01("profiled_object", headless=True, profile=True)
+        my_object.predictor(["Germany"], engine="fast", output="png")
+        my_object.gapminder(2000, output="png")
+        stats = my_object.profiler.stats().set_index(["method", "phase"])
+        for method, phase in [("get_data", "load"), ("forecast", "fit"), ("plot_forecast", "render"),
+                              ("gapminder", "compute"), ("predictor", "total")]:
+            self.assertIn((method, phase), stats.index)
+        # The phases of a call add up to its total
+        gapminder = stats.loc["gapminder"]
+        self.assertAlmostEqual(gapminder.drop("total")["total"].sum(), gapminder.loc["total", "total"])
+
+        trace = json.loads(my_object.profiler.to_chrome_trace())["traceEvents"]
+        self.assertIn({"name": "gapminder", "cat": "gapminder", "ph": "X"},
+                      [{key: event[key] for key in ("name", "cat", "ph")} for event in trace])
+        document = json.loads(my_object.profiler.to_json())
+        self.assertEqual(len(document["stats"]), len(stats))
+
+        # Disabled, nothing is recorded
+        my_object.profiler.reset()
+        my_object.profiler.enabled = False
+        my_object.gapminder(2000, output="png")
+        self.assertTrue(my_object.profiler.stats().empty)
+        self.assertTrue(Group01("not_profiled").profiler.stats().empty)
+
+        profiler = Profiler(enabled=True, max_events=2)
+        for _ in range(3):
+            with profiler.call("method"):
+                profiler.phase("compute")
+        self.assertEqual(len(json.loads(profiler.to_json())["events"]), 2)
+        self.assertEqual(profiler.stats().set_index("phase").loc["total", "count"], 3)
+
     def test_get_countries(self):
         self.assertRaises(TypeError, self.my_object.get_countries, 123)
+        countries = self.my_object.get_countries()
+        self.assertEqual(countries, self.my_object.df["Entity"].unique().tolist())
+        countries.append("Not a country")
+        self.assertNotIn("Not a country", self.my_object.get_countries())
+
+    def test_index(self):
+        self.my_object.get_data()
+        df = self.my_object.df
+        for country in ["Germany", "Zimbabwe"]:
+            pd.testing.assert_frame_equal(
+                self.my_object._entity_rows(country), df[df["Entity"] == country])
+        for year in [1961, 2000]:
+            pd.testing.assert_frame_equal(
+                self.my_object._year_rows(year), df[df["Year"] == year])
         
         # Add more test cases
 
     def test_plot_quantity(self):
         self.assertIsNone(self.my_object.plot_quantity())
         self.assertRaises(TypeError, self.my_object.plot_quantity, 123)
-        
+        # The annotations use the notebook font scaled by 1.2, as `sns.set(font_scale=1.2)` did
+        figure = self.my_object.plot_quantity(output="figure")
+        self.assertAlmostEqual(figure.axes[0].texts[0].get_fontsize(), 12 * 1.2)
+
         # Add more test cases
 
+    def test_correlation(self):
+        correlation = self.my_object.correlation()
+        cached = self.my_object._correlations[(None, None, None)]
+        pd.testing.assert_frame_equal(self.my_object.correlation(), correlation)
+        self.assertIs(self.my_object._correlations[(None, None, None)], cached)
+        # The returned matrices are copies of the cached ones
+        correlation.iloc[0, 0] = 99.0
+        self.assertEqual(self.my_object.correlation().iloc[0, 0], 1.0)
+        rolling = self.my_object.correlation(window=10)
+        rolling.iloc[0, 0] = 99.0
+        self.assertNotEqual(self.my_object.correlation(window=10).iloc[0, 0], 99.0)
+        columns = list(correlation.columns)
+        self.assertTrue(all(column.endswith("_quantity") for column in columns))
+
+        # Every rolling window matches pandas on the same rows
+        rolling = self.my_object.correlation(window=10)
+        df = self.my_object.df
+        for year in (1970, 2019):
+            expected = df[df["Year"].between(year - 9, year)][columns].corr()
+            np.testing.assert_allclose(rolling.loc[year].to_numpy(), expected.to_numpy(), atol=1e-10)
+
+        subset = self.my_object.correlation(years=(1990, 2000), countries=["Germany", "France"])
+        rows = df[df["Entity"].isin(["Germany", "France"]) & df["Year"].between(1990, 2000)]
+        np.testing.assert_allclose(subset.to_numpy(), rows[columns].corr().to_numpy())
+
+        self.assertRaises(TypeError, self.my_object.correlation, [1990, 2000])
+        self.assertRaises(ValueError, self.my_object.correlation, None, ["Non-existent country"])
+        self.assertRaises(ValueError, self.my_object.correlation, None, None, 0)
+
     def plot_area_chart(self):
         self.assertIsNone(self.my_object.plot_area_chart("World"))
         self.assertRaises(TypeError, self.my_object.plot_area_chart, 123)
@@ -45,5 +601,226 @@ class TestGroup01(unittest.TestCase):
         
         # Add more test cases
         
+    def test_choropleth(self):
+        self.assertRaises(TypeError, self.my_object.choropleth, "2000")
+        self.assertRaises(ValueError, self.my_object.choropleth, 3000)
+        df = self.my_object.df.copy()
+        self.assertIsNone(self.my_object.choropleth(2000))
+        pd.testing.assert_frame_equal(self.my_object.df, df)  # self.df is not renamed
+
+        positions, entities = self.my_object._geo_join_index()
+        names = self.my_object.df_geographical["name"].to_numpy()[positions]
+        self.assertIn(("United States of America", "United States"), set(zip(names, entities)))
+        growth = self.my_object._geo_year_values(2000, "tfp_growth")
+        germany = list(entities).index("Germany")
+        self.assertAlmostEqual(growth[germany], self.my_object._derived_values(2000, "Germany", "tfp_growth"))
+        self.assertIsNotNone(self.my_object.choropleth(2000, output="figure", column="tfp_growth"))
+        # The growth has no value in the first year, no map without a colour scale
+        first = min(self.my_object._available_years())
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            self.assertRaises(ValueError, self.my_object.choropleth, first, "figure", "tfp_growth")
+            with tempfile.TemporaryDirectory() as out_dir:
+                self.assertRaises(ValueError, self.my_object.choropleth_series, [first], out_dir,
+                                  column="tfp_growth")
+
+        cached_object = Group01("cached_object")
+        cached_object.get_data()
+        self.assertTrue(cached_object.df_geographical.geom_equals(
+            self.my_object.df_geographical).all())
+
+    def test_spatial(self):
+        import shapely
+
+        matrix, entities = self.my_object.get_adjacency()
+        entities = list(entities)
+        self.assertEqual((matrix != matrix.T).nnz, 0)
+        geometries = np.asarray(self.my_object.df_geographical.geometry)
+        # The STRtree query finds the same pairs as the pairwise check
+        pairwise = shapely.intersects(geometries[:, None], geometries[None, :])
+        np.fill_diagonal(pairwise, False)
+        np.testing.assert_array_equal(adjacency(geometries).toarray(), pairwise)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            written = cached_adjacency(geometries, 1.0, cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            self.assertEqual((cached_adjacency(geometries, 1.0, cache_dir) != written).nnz, 0)
+
+        lags = self.my_object.spatial_lag(years=[2000]).set_index("Entity")
+        neighbours = [entities[i] for i in matrix[entities.index("Germany")].indices]
+        self.assertIn("France", neighbours)
+        self.assertAlmostEqual(lags.loc["Germany", "tfp_lag"], lags.loc[neighbours, "tfp"].mean())
+
+        # Moran's I of one year, from its definition
+        values = lags["tfp"].reindex(entities).to_numpy()
+        present = ~np.isnan(values)
+        weights = matrix.toarray()[present][:, present]
+        deviations = values[present] - values[present].mean()
+        expected = present.sum() / weights.sum() * deviations @ weights @ deviations / (deviations @ deviations)
+        self.assertAlmostEqual(morans_i(matrix, values[:, None])["I"][0], expected)
+        table = self.my_object.morans_i(years=[2000, 2015])
+        self.assertAlmostEqual(table["I"][0], expected)
+        self.assertTrue(np.isnan(table["I"][1]))  # every tfp index is 100 in 2015
+
+        spots = self.my_object.hot_spots("tfp_growth", years=[2019])
+        self.assertEqual(list(spots.columns), ["Entity", "Year", "tfp_growth", "z", "spot"])
+        self.assertTrue((spots.loc[spots["spot"] == "hot", "z"] > 1.96).all())
+        self.assertRaises(ValueError, self.my_object.get_adjacency, -1)
+
+        streaming_object = Group01("streaming_object", streaming=True)
+        pd.testing.assert_frame_equal(streaming_object.morans_i(years=[2000, 2019]),
+                                      self.my_object.morans_i(years=[2000, 2019]))
+
+    def test_choropleth_series(self):
+        self.assertRaises(ValueError, self.my_object.choropleth_series, [2000])
+        self.assertRaises(ValueError, self.my_object.choropleth_series, [3000], "out")
+        self.assertRaises(TypeError, self.my_object.choropleth_series, ["2000"], "out")
+        with tempfile.TemporaryDirectory() as out_dir:
+            animation = os.path.join(out_dir, "tfp.gif")
+            written = self.my_object.choropleth_series([1961, 2019], out_dir, animation)
+            self.assertEqual(written, [os.path.join(out_dir, "choropleth_1961.png"),
+                                       os.path.join(out_dir, "choropleth_2019.png"), animation])
+            self.assertTrue(all(os.path.getsize(path) > 0 for path in written))
+
+    def test_headless(self):
+        from matplotlib import pyplot as plt
+        from matplotlib.figure import Figure
+
+        plt.close("all")
+        headless_object = Group01("headless_object", headless=True)
+        figures = [
+            headless_object.plot_quantity(),
+            headless_object.plot_area_chart("Germany", True),
+            headless_object.plot_country_chart(["Germany", "France"]),
+            headless_object.gapminder(2000),
+            headless_object.choropleth(2000),
+            headless_object.plot_forecast(headless_object.forecast(["Germany"], order=(1, 1, 0))),
+        ]
+        self.assertTrue(all(isinstance(fig, Figure) for fig in figures))
+        self.assertEqual(plt.get_fignums(), [])
+
+        self.assertTrue(self.my_object.gapminder(2000, output="png").startswith(b"\x89PNG"))
+        self.assertIn(b"<svg", self.my_object.plot_area_chart(output="svg"))
+        with tempfile.TemporaryDirectory() as out_dir:
+            path = os.path.join(out_dir, "chart.png")
+            self.assertEqual(self.my_object.plot_country_chart("Germany", output=path), path)
+            self.assertTrue(os.path.getsize(path) > 0)
+        self.assertEqual(plt.get_fignums(), [])
+        self.assertRaises(ValueError, self.my_object.choropleth, 2000, "jpg")
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            images = list(executor.map(render_choropleth, [1961, 2019]))
+        self.assertTrue(all(image.startswith(b"\x89PNG") for image in images))
+
+    def test_forecast(self):
+        countries = ["Germany", "France", "Iraq", "Japan", "Non-existent country"]
+        forecasts = self.my_object.forecast(countries, order=(1, 1, 0), max_workers=2)
+        self.assertEqual(forecasts["Entity"].unique().tolist(), countries[:-1])
+        self.assertEqual(forecasts.columns.tolist(), ["Entity", "Year", "tfp"])
+        self.assertEqual(forecasts["Year"].min(), 2020)
+        self.assertEqual(forecasts["Year"].max(), 2050)
+        self.assertFalse(forecasts["tfp"].isna().any())
+        self.assertIsNone(self.my_object.plot_forecast(forecasts))
+
+    def test_forecast_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.my_object.forecast_cache = ForecastCache(cache_dir, max_entries=2, store_params=True)
+            forecasts = self.my_object.forecast(["Germany", "France"], order=(1, 1, 0))
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+            cached = self.my_object.forecast(["Germany", "France"], order=(1, 1, 0))
+            pd.testing.assert_frame_equal(forecasts, cached)
+
+            years = np.arange(3)
+            key = ForecastCache.key("Germany", (1, 1, 0), 31, years, np.ones(3))
+            self.assertNotEqual(key, ForecastCache.key("Germany", (1, 1, 0), 31, years, np.zeros(3)))
+            self.assertNotEqual(key, ForecastCache.key("Germany", (2, 1, 0), 31, years, np.ones(3)))
+            self.my_object.forecast_cache.put(key, np.zeros(31), np.ones(2))
+            self.assertEqual(len(os.listdir(cache_dir)), 2)  # the oldest entry was evicted
+            forecasts, params = self.my_object.forecast_cache.get(key)
+            np.testing.assert_array_equal(params, np.ones(2))
+
+    def test_forecast_fast(self):
+        countries = ["Germany", "South Sudan"]
+        fast = self.my_object.forecast(countries, engine="fast")
+        arima = self.my_object.forecast(countries, order=(1, 1, 0), use_cache=False)
+        pd.testing.assert_frame_equal(fast[["Entity", "Year"]], arima[["Entity", "Year"]])
+        self.assertFalse(fast["tfp"].isna().any())
+        self.assertRaises(ValueError, self.my_object.forecast, countries, engine="slow")
+
+        # A linear trend is continued exactly
+        years = np.arange(2000, 2020)
+        line = fast_batch_forecast({"line": (years, 2.0 * years)}, order=(2, 1, 0), end_year=2022)
+        np.testing.assert_allclose(line["tfp"], [4040, 4042, 4044], rtol=1e-6)
+        # Without lags, (0, 1, 0) repeats the last value and (0, 2, 0) the last difference
+        walk = fast_batch_forecast({"line": (years, 2.0 * years)}, order=(0, 1, 0), end_year=2022)
+        np.testing.assert_allclose(walk["tfp"], [4038, 4038, 4038])
+        np.testing.assert_allclose(
+            fast_batch_forecast({"line": (years, 2.0 * years)}, order=(0, 2, 0), end_year=2022)["tfp"], line["tfp"]
+        )
+        germany = self.my_object.forecast(["Germany"], order=(0, 1, 0), engine="fast")
+        last = self.my_object._entity_frame("Germany", ["tfp"])["tfp"].iloc[-1]
+        np.testing.assert_allclose(germany["tfp"], last)
+
+        # Missing values are dropped, a series without values warns and forecasts NaN
+        gaps = 2.0 * years
+        gaps[[5, -1]] = np.nan
+        with self.assertWarnsRegex(UserWarning, "empty"):
+            forecasts = fast_batch_forecast(
+                {"gaps": (years, gaps), "empty": (years, np.full(len(years), np.nan))},
+                order=(0, 1, 0), end_year=2022,
+            ).set_index("Entity")
+        np.testing.assert_allclose(forecasts.loc["gaps", "tfp"], [4036, 4036, 4036, 4036])
+        self.assertEqual(list(forecasts.loc["gaps", "Year"]), [2019, 2020, 2021, 2022])
+        self.assertTrue(forecasts.loc["empty", "tfp"].isna().all())
+
+    def test_select_orders(self):
+        grid = [(p, d, q) for p in range(4) for d in (1, 2) for q in range(2)]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            my_object = Group01("orders_object")
+            my_object.forecast_cache = ForecastCache(cache_dir)
+            my_object.order_grid = grid
+            orders = my_object.select_orders(["Germany", "Chile"], max_workers=2)
+            self.assertEqual(list(orders["Entity"]), ["Germany", "Chile"])
+            self.assertEqual(my_object.orders, {row.Entity: (row.p, row.d, row.q) for row in orders.itertuples()})
+
+            # The pruned search finds the best order of the grid, up to the optimizer
+            series = my_object._tfp_series(["Germany"])
+            exhaustive = min(_fit_order(series["Germany"][1], order, "aic")[0] for order in grid)
+            self.assertLess(orders.loc[0, "aic"], exhaustive + 0.5)
+
+            # The selected orders are cached, forecast(order="auto") does not search again
+            cached = Group01("cached_orders_object")
+            cached.forecast_cache = my_object.forecast_cache
+            cached.order_grid = grid
+            forecasts = cached.forecast(["Germany", "Chile"], order="auto")
+            self.assertEqual(cached.orders, my_object.orders)
+            pd.testing.assert_frame_equal(
+                forecasts[forecasts["Entity"] == "Chile"].reset_index(drop=True),
+                cached.forecast(["Chile"], order=cached.orders["Chile"]),
+            )
+            self.assertRaises(ValueError, cached.forecast, ["Germany"], order="auto", engine="fast")
+            self.assertRaises(ValueError, cached.select_orders, ["Germany"], criterion="r2")
+
+    def test_backtest(self):
+        table = self.my_object.backtest(["Germany", "Chile"], order=(1, 1, 0), horizon=3, max_workers=2)
+        self.assertEqual(list(table.columns), ["Entity", "horizon", "MAE", "MAPE", "count"])
+        self.assertEqual(list(table["count"]), [3, 2, 1, 3, 2, 1])
+
+        # The one-year errors of Germany, refitted by hand at every cutoff
+        years, tfp = self.my_object._tfp_series(["Germany"])["Germany"]
+        errors = [forecast_arima(tfp[years <= cutoff], (1, 1, 0), 1)[0] - tfp[years == cutoff + 1][0]
+                  for cutoff in range(2016, 2019)]
+        germany = table[table["Entity"] == "Germany"].set_index("horizon")
+        self.assertAlmostEqual(germany.loc[1, "MAE"], np.mean(np.abs(errors)), places=4)
+        self.assertAlmostEqual(germany.loc[1, "MAPE"],
+                               np.mean(np.abs(errors) / tfp[-3:]) * 100, places=4)
+
+        cutoffs = backtest({"Germany": (years, tfp)}, order=(1, 1, 0), cutoffs=[2030], horizon=2)
+        self.assertTrue(cutoffs["MAE"].isna().all())
+        self.assertRaises(ValueError, self.my_object.backtest, ["Germany"], horizon=0)
+
+    def test_predictor(self):
+        self.assertRaises(TypeError, self.my_object.predictor, "Germany")
+        self.assertRaises(ValueError, self.my_object.predictor, ["Non-existent country"])
+
 if __name__ == '__main__':
     unittest.main()